@@ -1,38 +1,38 @@
 from models.task import Task
 from models.member import Member
-from models.assignment import Assignment
+from models.assignment import Assignment, AssignmentPool
 from models.project import Project
-import setup, proof_setup
 import fitness_checker
-import random, pickle
+import checkpoint
+from checkpoint import Checkpointer
+from profiler import Profiler, NullProfiler
+from telemetry import Telemetry, NullTelemetry, ConsoleTelemetry
+from stopping import StoppingPolicy
+from problem_instance import ProblemInstance
+import random
 import numpy as np
-from matplotlib import pyplot as plt
 import difference_checker
 
-class Node(Assignment):
-    '''represent a node taken choosen by the ant'''
-    def __init__(self, task, member):
-        super().__init__(task, member)
-        self.pheromone = 1
-
 class Ant:
-    '''represent an ant in the colony'''
+    '''represent an ant in the colony
+
+    a node is a shared (task, member) assignment, its pheromone is kept by the colony'''
     def __init__(self, tasks: list[Task]):
         self.tasks = tasks
-        self.nodes: list[Node] = list()
+        self.nodes: list[Assignment] = list()
         self.fitness = 0
 
-    def explore(self, nodes: list[Node]):
+    def explore(self, nodes: list[Assignment], pheromone: dict):
         '''explore and choose the node
         
         leaves pheromones on the node'''
         path = list()
         for t in self.tasks:
-            valid_nodes: list[Node] = [n for n in nodes if n.task == t]
+            valid_nodes: list[Assignment] = [n for n in nodes if n.task == t]
             
             # calculating the probabilitiy of choosing a node to explore 
-            sum_of_pheromone = sum([n.pheromone for n in valid_nodes])
-            probability = [n.pheromone/sum_of_pheromone for n in valid_nodes]
+            sum_of_pheromone = sum([pheromone[n] for n in valid_nodes])
+            probability = [pheromone[n]/sum_of_pheromone for n in valid_nodes]
             
             # choose node based on probability
             choosen_node = random.choices(valid_nodes, probability)
@@ -41,43 +41,85 @@ class Ant:
 
         self.nodes = path
     
-    def leave_pheromone(self, rank: int):
+    def leave_pheromone(self, rank: int, pheromone: dict):
         '''leaves pheromone on the choosen nodes'''
         # using ranking as pheromone value, because sometimes ant may have fitness of 0
         for n in self.nodes:
-            n.pheromone += 1/rank
+            pheromone[n] += 1/rank
 
 
 class ACO:
-    def __init__(self, members: list[Member], tasks: list[Task], population: int = 100, evaporate: float = 0.2):
+    def __init__(self, members: list[Member], tasks: list[Task], population: int = 100, evaporate: float = 0.2, pool: AssignmentPool = None):
         self.members = members
         self.tasks = tasks
+        # every node is taken from the shared pool (eg ProblemInstance.assignment_pool) instead of creating a new one
+        self.pool = AssignmentPool(tasks, members) if pool is None else pool
         
         self.population = population
         self.evaporate = 1 - evaporate
         self.iteration = 1
         self.ants = [Ant(tasks) for i in range(self.population)]
         self.path_nodes = self.initilize_path_nodes()
+        # pheromone of every node, the shared nodes are never changed
+        self.pheromone: dict[Assignment, float] = dict.fromkeys(self.path_nodes, 1)
+        # fitness of previously seen solutions, used when set
+        self.cache: fitness_checker.FitnessCache = None
         
         self.best: Ant = None
         self.average_fit = list()
         self.best_fit = list()
+        self.telemetry: Telemetry = NullTelemetry()
+        # number of candidate solutions scored so far
+        self.evaluations = 0
 
-    def initilize_path_nodes(self) -> list[Node]:
-        '''generates all possible node'''
-        nodes = list()
-        for t in self.tasks:
-            for m in self.members:
-                node = Node(t, m)
-                nodes.append(node)
-        
-        return nodes
+    def initilize_path_nodes(self) -> list[Assignment]:
+        '''every possible node'''
+        return list(self.pool)
+
+    def seed_pheromone(self, assignments: list[Assignment], share: float = 0.5):
+        '''add pheromone to the nodes of a previous solution
+
+        the first ants then choose the member of the solution for a task with probability share'''
+        for a in assignments:
+            node = self.pool.get(a.task, a.member)
+            total = sum(self.pheromone[n] for n in self.pool.assignments[self.pool.task_index[a.task]])
+            self.pheromone[node] += max((share * total - self.pheromone[node]) / (1 - share), 0)
+
+    def checkpoint_state(self) -> dict:
+        '''the pheromone, the ants and the history as arrays, see checkpoint.py'''
+        member_index = self.pool.member_index
+        return {
+            "pheromone": np.array([self.pheromone[n] for n in self.path_nodes], dtype=float),
+            "paths": np.array([[member_index[n.member] for n in a.nodes] for a in self.ants], dtype=np.intp),
+            "fitness": np.array([a.fitness for a in self.ants], dtype=float),
+            # the best ant is one of the ants, its nodes change with the next exploration
+            "best": np.array(next(i for i, a in enumerate(self.ants) if a is self.best)),
+            "iteration": np.array(self.iteration),
+            "evaluations": np.array(self.evaluations),
+            "average_fit": checkpoint.history(self.average_fit),
+            "best_fit": checkpoint.history(self.best_fit),
+        }
 
-    def evaluate_fitness(self, initial_formation: Project):
+    def restore(self, state: dict):
+        '''continue from a checkpoint_state'''
+        for n, pheromone in zip(self.path_nodes, state["pheromone"]):
+            self.pheromone[n] = pheromone
+        for a, path, fitness in zip(self.ants, state["paths"], state["fitness"]):
+            a.nodes = [self.pool[t, m] for t, m in enumerate(path)]
+            a.fitness = fitness
+        self.best = self.ants[int(state["best"])]
+        self.iteration = int(state["iteration"])
+        self.evaluations = int(state["evaluations"])
+        self.average_fit = list(state["average_fit"])
+        self.best_fit = list(state["best_fit"])
+
+    def evaluate_fitness(self, initial_formation: Project, instance: ProblemInstance = None):
         '''evaluates the fitness of each ant
         returns average fitness and the best fitness'''        
-        for a in self.ants:
-            a.fitness = fitness_checker.check_fitness(a.nodes, initial_formation)
+        self.evaluations += len(self.ants)
+        ant_fitness = fitness_checker.evaluate_solutions([a.nodes for a in self.ants], initial_formation, instance, self.cache)
+        for a, fit in zip(self.ants, ant_fitness):
+            a.fitness = fit
 
         fitness = [a.fitness for a in self.ants]
         return np.mean(fitness), max(fitness)
@@ -89,18 +131,18 @@ class ACO:
         top_ranking_ants = self.ants[:int(len(self.ants) * top)]
 
         for rank, a in enumerate(top_ranking_ants):
-            a.leave_pheromone(rank+1)
+            a.leave_pheromone(rank+1, self.pheromone)
             
         # evaporates the pheromone of each node
         for n in self.path_nodes:
-            n.pheromone *= self.evaporate
+            self.pheromone[n] *= self.evaporate
 
         # recording the best ant
         if self.iteration == 1:
             self.best = top_ranking_ants[0]
         else:
             if top_ranking_ants[0].fitness > self.best_fit[-1]:
-                print(f"new best found! {self.best_fit[-1]}->{top_ranking_ants[0].fitness}")
+                self.telemetry.event("ACO", self.iteration, "new best", previous=self.best_fit[-1], fitness=top_ranking_ants[0].fitness)
                 self.best = top_ranking_ants[0]
     
     def record_fitness(self, average_fitness: float, best_fitness: float):
@@ -111,32 +153,244 @@ class ACO:
         else:
             self.best_fit.append(best_fitness if best_fitness > self.best_fit[-1] else self.best_fit[-1])
 
+class PheromoneACO:
+    '''ant colony that keeps the pheromone of every (task, member) node in a (tasks x members) array
+
+    the ants of an iteration are built and evaluated all at once'''
+    def __init__(self, instance: ProblemInstance, population: int = 100, evaporate: float = 0.2, seed: int = None):
+        self.instance = instance
+        self.population = population
+        self.evaporate = 1 - evaporate
+        self.iteration = 1
+
+        # the seed is taken from the random module when not given so that random.seed still applies
+        self.rng = np.random.default_rng(random.getrandbits(64) if seed is None else seed)
+        self.pheromone = np.ones((instance.total_tasks, instance.total_members))
+        # the member choosen by each ant for each task
+        self.paths = np.zeros((population, instance.total_tasks), dtype=np.intp)
+        self.fitness = np.zeros(population)
+        # fitness of previously seen solutions, used when set
+        self.cache: fitness_checker.FitnessCache = None
+
+        self.best: np.ndarray = None
+        self.best_fitness = 0
+        self.average_fit = list()
+        self.best_fit = list()
+        self.telemetry: Telemetry = NullTelemetry()
+        # number of candidate solutions scored so far
+        self.evaluations = 0
+
+    def explore(self):
+        '''every ant chooses a member for each task with probability proportional to the pheromone'''
+        total_tasks, total_members = self.pheromone.shape
+        # a single cumulative sum over every node, each task owns a slice of it
+        cumulative = np.cumsum(self.pheromone.ravel())
+        row_start = np.arange(total_tasks) * total_members
+        row_end = row_start + total_members - 1
+        lower = np.where(row_start > 0, cumulative[row_start - 1], 0)
+        upper = cumulative[row_end]
+
+        draws = lower + self.rng.random((self.population, total_tasks)) * (upper - lower)
+        # rounding may land the draw on the end of the slice, which would choose the node after it,
+        # below the end the side="right" search never chooses a node without pheromone
+        np.minimum(draws, np.nextafter(upper, lower), out=draws)
+        nodes = np.searchsorted(cumulative, draws, side="right")
+        np.clip(nodes, row_start, row_end, out=nodes)
+        self.paths = nodes - row_start
+
+    def seed_pheromone(self, solution: np.ndarray, share: float = 0.5):
+        '''add pheromone to the nodes of a previous solution
+
+        the first ants then choose the member of the solution for a task with probability share'''
+        tasks = np.arange(len(solution))
+        total = self.pheromone.sum(axis=1)
+        node = self.pheromone[tasks, solution]
+        self.pheromone[tasks, solution] += np.maximum((share * total - node) / (1 - share), 0)
+
+    def checkpoint_state(self) -> dict:
+        '''the pheromone, the best path, the generator and the history as arrays, see checkpoint.py'''
+        return {
+            "pheromone": self.pheromone.copy(),
+            "paths": self.paths.copy(),
+            "fitness": self.fitness.copy(),
+            "best": self.best.copy(),
+            "best_fitness": np.array(self.best_fitness),
+            "rng": checkpoint.generator_state(self.rng),
+            "iteration": np.array(self.iteration),
+            "evaluations": np.array(self.evaluations),
+            "average_fit": checkpoint.history(self.average_fit),
+            "best_fit": checkpoint.history(self.best_fit),
+        }
+
+    def restore(self, state: dict):
+        '''continue from a checkpoint_state'''
+        self.pheromone = state["pheromone"].copy()
+        self.paths = state["paths"].astype(np.intp)
+        self.fitness = state["fitness"].copy()
+        self.best = state["best"].astype(np.intp)
+        self.best_fitness = state["best_fitness"][()]
+        checkpoint.set_generator_state(self.rng, state["rng"])
+        self.iteration = int(state["iteration"])
+        self.evaluations = int(state["evaluations"])
+        self.average_fit = list(state["average_fit"])
+        self.best_fit = list(state["best_fit"])
+
+    def evaluate_fitness(self, initial_formation: Project = None, baseline: np.ndarray = None):
+        '''evaluates the fitness of each ant
+        returns average fitness and the best fitness
+
+        the baseline vector of the initial formation can be given instead of the formation'''
+        if baseline is None:
+            baseline = fitness_checker.baseline_vector(initial_formation)
+        self.evaluations += len(self.paths)
+        self.fitness = fitness_checker.evaluate_population(self.paths, self.instance, baseline, self.cache)
+
+        return np.mean(self.fitness), self.fitness.max()
+
+    def update_pheromone(self, top: float = 0.6):
+        '''updates the pheromone'''
+        # only allowing top ranking ants to leave pheromone, ranking is used as the pheromone value
+        ranking = np.argsort(-self.fitness, kind="stable")
+        top_ranking = ranking[:int(self.population * top)]
+        deposit = 1 / np.arange(1, len(top_ranking) + 1)
+
+        tasks = np.broadcast_to(np.arange(self.pheromone.shape[0]), (len(top_ranking), self.pheromone.shape[0]))
+        np.add.at(self.pheromone, (tasks, self.paths[top_ranking]), deposit[:, None])
+
+        # evaporates the pheromone of each node
+        self.pheromone *= self.evaporate
+
+        # recording the best ant
+        best_ant = top_ranking[0]
+        if self.iteration == 1 or self.fitness[best_ant] > self.best_fitness:
+            if self.iteration > 1:
+                self.telemetry.event("ACO", self.iteration, "new best", previous=float(self.best_fitness), fitness=float(self.fitness[best_ant]))
+            self.best = self.paths[best_ant].copy()
+            self.best_fitness = self.fitness[best_ant]
+
+    def record_fitness(self, average_fitness: float, best_fitness: float):
+        '''record the average fitness and best fitness'''
+        self.average_fit.append(average_fitness)
+        if len(self.best_fit) == 0:
+            self.best_fit.append(best_fitness)
+        else:
+            self.best_fit.append(best_fitness if best_fitness > self.best_fit[-1] else self.best_fit[-1])
+
 def print_previous_output(before_path: str, after_path: str):
     '''print the solution difference from previous runs'''
-    before: Project = None
-    after: Project = None
-    with open(f"data/solution/before/{before_path}", "rb") as f:
-        before = pickle.load(f)
-    with open(f"data/solution/after/{after_path}", "rb") as f:
-        after = pickle.load(f)
-    difference_checker.print_difference(before, after)
-
-def run(members: list[Member], tasks: list[Task], initial_formation: Project, max_iteration: int = 800, enable_visuals: bool = True) -> tuple:
-    aco = ACO(members, tasks, population=100, evaporate=0.01)
-    while aco.iteration <= max_iteration:
-        for a in aco.ants:
-            a.explore(aco.path_nodes)
-        average_fitness, best_fitness = aco.evaluate_fitness(initial_formation)
+    import setup
+
+    difference_checker.print_saved_difference(before_path, after_path, setup.members, setup.tasks, setup.collaboration, setup.instance_hash)
+
+def run_arrays(instance: ProblemInstance, baseline: np.ndarray, start: np.ndarray, max_iteration: int = 800, seed: int = None, stopping: StoppingPolicy = None, population: int = 100, cache_size: int = 0) -> tuple:
+    '''run PheromoneACO on the arrays of an instance only, eg attached from shared memory in a worker
+
+    no member, task or Project object is needed, baseline is the baseline vector of the initial
+    formation and start its encoded solution, which the ants do not start from (as in run),
+    returns the average fitness and the best fitness of each iteration'''
+    stopping = StoppingPolicy(max_iteration=max_iteration) if stopping is None else stopping
+    stopping.start()
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+    aco = PheromoneACO(instance, population=population, evaporate=0.01)
+    if cache_size > 0:
+        aco.cache = fitness_checker.FitnessCache(cache_size)
+
+    while not stopping.should_stop(aco.iteration - 1, aco.evaluations, aco.best_fit):
+        aco.explore()
+        average_fitness, best_fitness = aco.evaluate_fitness(baseline=baseline)
         aco.update_pheromone(top=0.1)
         aco.record_fitness(average_fitness, best_fitness)
+        aco.iteration += 1
 
-        print(f"ACO | Iteration {aco.iteration} | Average fitness: {average_fitness:.4f} | Best: {aco.best_fit[-1]:.4f}")
+    return aco.average_fit, aco.best_fit
+
+def run(members: list[Member], tasks: list[Task], initial_formation: Project, max_iteration: int = 800, enable_visuals: bool = True, use_batch: bool = False, engine: str = "node", cache_size: int = 0, seed: int = None, telemetry: Telemetry = None, stopping: StoppingPolicy = None, instance: ProblemInstance = None, save: bool = True, warm_start: list[Assignment] = None, checkpointer: Checkpointer = None, resume: str = None, profiler: Profiler = None, population: int = 100) -> tuple:
+    '''run the ant colony
+
+    engine "node" keeps the pheromone in a dict of the nodes, engine "matrix" uses PheromoneACO,
+    the random generators are seeded when seed is given, the seed is saved with the solution,
+    the progress is printed every iteration unless another telemetry sink is given,
+    the run stops after max_iteration iterations unless a stopping policy is given,
+    a prebuilt instance (eg attached from shared memory) is used for the batch evaluation instead of building one,
+    the assignments are taken from the assignment pool of the instance when there is one,
+    the solution is saved unless save is False, it is also reported to the telemetry as a "solution" event,
+    the pheromone is seeded from the warm_start solution when given (see warm_start.py),
+    the checkpointer saves the state of the run every few iterations, resume continues from a saved
+    checkpoint (see checkpoint.py), the profiler times every phase of an iteration (see profiler.py),
+    population ants explore every iteration'''
+    stopping = StoppingPolicy(max_iteration=max_iteration) if stopping is None else stopping
+    stopping.start()
+    telemetry = ConsoleTelemetry() if telemetry is None else telemetry
+    profiler = NullProfiler() if profiler is None else profiler
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+    # precomputed arrays for the batch fitness evaluation
+    if instance is not None:
+        instance.bind(members, tasks)
+    elif use_batch or engine == "matrix":
+        instance = ProblemInstance.from_models(members, tasks, initial_formation.collaboration)
+    if engine == "matrix":
+        aco = PheromoneACO(instance, population=population, evaporate=0.01)
+        if warm_start is not None:
+            aco.seed_pheromone(instance.encode(warm_start))
+    else:
+        aco = ACO(members, tasks, population=population, evaporate=0.01, pool=instance.assignment_pool() if instance is not None else None)
+        if warm_start is not None:
+            aco.seed_pheromone(warm_start)
+    if resume is not None:
+        state = checkpoint.load(resume)
+        checkpoint.check(state, "ACO", engine, initial_formation.instance_hash, (len(tasks), len(members)))
+        aco.restore(state)
+        checkpoint.set_random_state(state)
+        stopping.resume(state)
+    if cache_size > 0:
+        aco.cache = fitness_checker.FitnessCache(cache_size)
+    aco.telemetry = telemetry
+
+    profiler.start("ACO")
+    while not stopping.should_stop(aco.iteration - 1, aco.evaluations, aco.best_fit):
+        with profiler.phase("explore"):
+            if engine == "matrix":
+                aco.explore()
+            else:
+                for a in aco.ants:
+                    a.explore(aco.path_nodes, aco.pheromone)
+        with profiler.phase("evaluate_fitness", aco):
+            if engine == "matrix":
+                average_fitness, best_fitness = aco.evaluate_fitness(initial_formation)
+            else:
+                average_fitness, best_fitness = aco.evaluate_fitness(initial_formation, instance)
+        with profiler.phase("update_pheromone"):
+            aco.update_pheromone(top=0.1)
+
+        with profiler.phase("telemetry"):
+            aco.record_fitness(average_fitness, best_fitness)
+            telemetry.iteration("ACO", aco.iteration, average_fitness, aco.best_fit[-1])
         aco.iteration += 1
+        if checkpointer is not None and checkpointer.due(aco.iteration - 1):
+            with profiler.phase("checkpoint"):
+                checkpointer.save("ACO", engine, initial_formation.instance_hash, (len(tasks), len(members)), aco.checkpoint_state(), stopping)
+    profiler.stop()
+    if checkpointer is not None:
+        checkpointer.close()
+    telemetry.event("ACO", aco.iteration - 1, "stopped", reason=stopping.reason, evaluations=aco.evaluations, elapsed_time=stopping.elapsed)
 
-    # saving the best solution as pickle file
-    new_solution: Project = Project(initial_formation.name, aco.best.nodes)
-    new_solution.save_project(before=False, mh_name="ACO")
+    # saving the best solution
+    best_assignments = instance.decode(aco.best) if engine == "matrix" else aco.best.nodes
+    new_solution: Project = Project(initial_formation.name, best_assignments, initial_formation.collaboration, initial_formation.instance_hash)
+    params = dict(use_batch=use_batch, engine=engine, population=population, cache_size=cache_size, warm_start=warm_start is not None, **stopping.settings(), stop_reason=stopping.reason)
+    if save:
+        record = new_solution.save_project(before=False, mh_name="ACO", params=params, seed=seed)
+    elif telemetry.enabled:
+        record = new_solution.to_record("ACO", params, seed)
+    if telemetry.enabled:
+        telemetry.event("ACO", aco.iteration - 1, "solution", fitness=float(aco.best_fit[-1]), solution=record)
     if enable_visuals:   
+        from matplotlib import pyplot as plt
+
         plt.plot(aco.average_fit)
         plt.show()
         difference_checker.print_difference(initial_formation, new_solution)
@@ -144,12 +398,16 @@ def run(members: list[Member], tasks: list[Task], initial_formation: Project, ma
 
     return aco.average_fit, aco.best_fit
 
-# run(proof_setup.members, proof_setup.tasks, proof_setup.project)
-run(setup.members, setup.tasks, setup.projects[0])
+if __name__ == "__main__":
+    import setup, proof_setup
+    setup.save_scenarios()
+
+    # run(proof_setup.members, proof_setup.tasks, proof_setup.project)
+    run(setup.members, setup.tasks, setup.projects[0])
 
-# for p in setup.projects:
-#     print(f"////////////////{p.name}////////////////")
-#     before = f"{p.name}/{p.name}.pickle"
-#     after = f"{p.name}/ACO.pickle"
-#     print_previous_output(before, after)
-#     print("")
\ No newline at end of file
+    # for p in setup.projects:
+    #     print(f"////////////////{p.name}////////////////")
+    #     before = f"{p.name}/{p.name}.json"
+    #     after = f"{p.name}/ACO.json"
+    #     print_previous_output(before, after)
+    #     print("")
@@ -1,22 +1,25 @@
-from models.assignment import Assignment
+from models.assignment import Assignment, AssignmentPool
 from models.task import Task
 from models.member import Member
 from models.project import Project
-import setup, proof_setup
 import fitness_checker
-import random, pickle
+import checkpoint
+from checkpoint import Checkpointer
+from profiler import Profiler, NullProfiler
+from telemetry import Telemetry, NullTelemetry, ConsoleTelemetry
+from stopping import StoppingPolicy
+from problem_instance import ProblemInstance
+from shared_instance import SharedInstance, SharedInstanceHandle, attach
+import random, queue, multiprocessing
 import difference_checker
 import numpy as np
-from matplotlib import pyplot as plt
-
-class Genes(Assignment):
-    def __init__(self, task, member):
-        super().__init__(task, member)
 
 class Chromosomes:
-    def __init__(self, genes: list[Genes]):
-        self.genes: list[Genes] = genes
+    def __init__(self, genes: list[Assignment]):
+        self.genes: list[Assignment] = genes
         self.fitness = 0
+        # a chromosome is dirty until its fitness is evaluated
+        self.dirty = True
     
     def produce_bebe(self, partner: 'Chromosomes'):
         k = random.randint(1, len(self.genes) - 1)
@@ -30,10 +33,13 @@ class Chromosomes:
         return b1, b2
     
 class GeneticAlgoritm:
-    def __init__(self, members: list[Member], tasks: list[Task], size: int = 400, mutation: float = 0.5, cross_over: float = 0.5):
+    def __init__(self, members: list[Member], tasks: list[Task], size: int = 400, mutation: float = 0.5, cross_over: float = 0.5, pool: AssignmentPool = None):
         self.members = members
         self.tasks = tasks
         
+        # every gene is taken from the shared pool (eg ProblemInstance.assignment_pool) instead of creating a new one
+        self.pool = AssignmentPool(tasks, members) if pool is None else pool
+
         self.size = size
         self.chromosomes: list[Chromosomes] = list()
         self.generation = 1
@@ -41,26 +47,74 @@ class GeneticAlgoritm:
         self.mutation = mutation
         self.cross_over = cross_over
         self.initialize_population()
+        # fitness of previously seen solutions, used when set
+        self.cache: fitness_checker.FitnessCache = None
 
         self.best:Chromosomes = None
         self.average_fit = list()
         self.best_fit = list()
+        self.telemetry: Telemetry = NullTelemetry()
+        # number of candidate solutions scored so far
+        self.evaluations = 0
 
     def initialize_population(self):
         for i in range(self.size):
             chromosome = Chromosomes(
                 [
-                    Genes(t, random.choice(self.members)) for t in self.tasks
+                    self.pool.get(t, random.choice(self.members)) for t in self.tasks
                 ]
             )
 
             self.chromosomes.append(chromosome)
 
-    def evaluate_chromosome(self, initial_formation: Project):
+    def seed_population(self, assignments: list[Assignment], share: float = 0.5):
+        '''replace a share of the population by a previous solution and mutated copies of it'''
+        genes = [self.pool.get(a.task, a.member) for a in assignments]
+        self.chromosomes[0] = Chromosomes(list(genes))
+        for i in range(1, max(1, int(self.size * share))):
+            self.chromosomes[i] = Chromosomes([
+                self.pool.get(g.task, random.choice(self.members)) if random.random() < self.mutation else g for g in genes
+            ])
+
+    def checkpoint_state(self) -> dict:
+        '''the population, the best chromosome and the history as arrays, see checkpoint.py'''
+        member_index = self.pool.member_index
+        return {
+            "chromosomes": np.array([[member_index[g.member] for g in c.genes] for c in self.chromosomes], dtype=np.intp),
+            "fitness": np.array([c.fitness for c in self.chromosomes], dtype=float),
+            "dirty": np.array([c.dirty for c in self.chromosomes], dtype=bool),
+            "best": np.array([member_index[g.member] for g in self.best.genes], dtype=np.intp),
+            "best_fitness": np.array(self.best.fitness),
+            "generation": np.array(self.generation),
+            "evaluations": np.array(self.evaluations),
+            "average_fit": checkpoint.history(self.average_fit),
+            "best_fit": checkpoint.history(self.best_fit),
+        }
+
+    def restore(self, state: dict):
+        '''continue from a checkpoint_state'''
+        self.chromosomes = list()
+        for row, fitness, dirty in zip(state["chromosomes"], state["fitness"], state["dirty"]):
+            c = Chromosomes([self.pool[t, m] for t, m in enumerate(row)])
+            c.fitness, c.dirty = fitness, bool(dirty)
+            self.chromosomes.append(c)
+        self.best = Chromosomes([self.pool[t, m] for t, m in enumerate(state["best"])])
+        self.best.fitness, self.best.dirty = state["best_fitness"][()], False
+        self.generation = int(state["generation"])
+        self.evaluations = int(state["evaluations"])
+        self.average_fit = list(state["average_fit"])
+        self.best_fit = list(state["best_fit"])
+
+    def evaluate_chromosome(self, initial_formation: Project, instance: ProblemInstance = None):
         '''evaluates the fitness of the chromosomes
         returns average of fitness and the best fitness'''
-        for c in self.chromosomes:
-            c.fitness = fitness_checker.check_fitness(c.genes, initial_formation)
+        # chromosomes that survived unchanged keep their fitness
+        dirty = [c for c in self.chromosomes if c.dirty]
+        self.evaluations += len(dirty)
+        dirty_fitness = fitness_checker.evaluate_solutions([c.genes for c in dirty], initial_formation, instance, self.cache)
+        for c, fit in zip(dirty, dirty_fitness):
+            c.fitness = fit
+            c.dirty = False
 
         fitness = [c.fitness for c in self.chromosomes]
         return np.mean(fitness), max(fitness)
@@ -76,7 +130,7 @@ class GeneticAlgoritm:
         else:
             # if the current_best is better than previoud best, accept it
             if current_best.fitness > self.best.fitness:
-                print(f"new best found! {self.best.fitness}->{current_best.fitness}")
+                self.telemetry.event("GA", self.generation, "new best", previous=self.best.fitness, fitness=current_best.fitness)
                 self.best = current_best
     
     def tournament_selection(self, tournament_size: int = 2, parent_num: int = 20):
@@ -96,7 +150,7 @@ class GeneticAlgoritm:
         else:
             # if the current_best is better than previoud best, accept it
             if current_best.fitness > self.best.fitness:
-                print(f"new best found! {self.best.fitness}->{current_best.fitness}")
+                self.telemetry.event("GA", self.generation, "new best", previous=self.best.fitness, fitness=current_best.fitness)
                 self.best = current_best
     
     def produce_bebes(self):
@@ -116,7 +170,8 @@ class GeneticAlgoritm:
             for i, g in enumerate(b.genes):
                 if random.random() < self.mutation:
                     new_member = random.choice([m for m in self.members if m != g.member])
-                    b.genes[i] = Genes(g.task, new_member)
+                    b.genes[i] = self.pool.get(g.task, new_member)
+                    b.dirty = True
         
         self.chromosomes += bebes
         
@@ -131,31 +186,449 @@ class GeneticAlgoritm:
         else:
             self.best_fit.append(best_fitness if best_fitness > self.best_fit[-1] else self.best_fit[-1])
 
+class ArrayGeneticAlgorithm:
+    '''genetic algorithm that keeps the population in a (population x tasks) array of member indices
+
+    crossover, mutation, selection and resampling work on the whole array at once'''
+    def __init__(self, instance: ProblemInstance, size: int = 400, mutation: float = 0.5, cross_over: float = 0.5, seed: int = None):
+        self.instance = instance
+
+        self.size = size
+        self.generation = 1
+
+        self.mutation = mutation
+        self.cross_over = cross_over
+        # the seed is taken from the random module when not given so that random.seed still applies
+        self.rng = np.random.default_rng(random.getrandbits(64) if seed is None else seed)
+        self.chromosomes: np.ndarray = self.rng.integers(instance.total_members, size=(size, instance.total_tasks))
+        # a nan fitness marks a chromosome that still has to be evaluated
+        self.fitness: np.ndarray = np.full(size, np.nan)
+        # fitness of previously seen solutions, used when set
+        self.cache: fitness_checker.FitnessCache = None
+
+        self.best: np.ndarray = None
+        self.best_fitness = 0
+        self.average_fit = list()
+        self.best_fit = list()
+        self.telemetry: Telemetry = NullTelemetry()
+        # number of candidate solutions scored so far
+        self.evaluations = 0
+
+    def seed_population(self, solution: np.ndarray, share: float = 0.5):
+        '''replace a share of the population by a previous solution and mutated copies of it'''
+        total_members = self.instance.total_members
+        copies = np.broadcast_to(solution, (max(1, int(self.size * share)), len(solution)))
+        mutate = self.rng.random(copies.shape) < self.mutation
+        # the first copy is the solution itself
+        mutate[0] = False
+        offset = self.rng.integers(1, total_members, size=copies.shape)
+        self.chromosomes[:len(copies)] = np.where(mutate, (copies + offset) % total_members, copies)
+        self.fitness[:len(copies)] = np.nan
+
+    def evaluate_chromosome(self, initial_formation: Project = None, baseline: np.ndarray = None):
+        '''evaluates the fitness of the chromosomes
+        returns average of fitness and the best fitness
+
+        the baseline vector of the initial formation can be given instead of the formation'''
+        if baseline is None:
+            baseline = fitness_checker.baseline_vector(initial_formation)
+        # chromosomes that survived unchanged keep their fitness
+        dirty = np.flatnonzero(np.isnan(self.fitness))
+        self.evaluations += len(dirty)
+        self.fitness[dirty] = fitness_checker.evaluate_population(self.chromosomes[dirty], self.instance, baseline, self.cache)
+
+        return np.mean(self.fitness), self.fitness.max()
+
+    def checkpoint_state(self) -> dict:
+        '''the population, the best chromosome, the generator and the history as arrays, see checkpoint.py'''
+        return {
+            "chromosomes": self.chromosomes.copy(),
+            "fitness": self.fitness.copy(),
+            "best": self.best.copy(),
+            "best_fitness": np.array(self.best_fitness),
+            "rng": checkpoint.generator_state(self.rng),
+            "generation": np.array(self.generation),
+            "evaluations": np.array(self.evaluations),
+            "average_fit": checkpoint.history(self.average_fit),
+            "best_fit": checkpoint.history(self.best_fit),
+        }
+
+    def restore(self, state: dict):
+        '''continue from a checkpoint_state'''
+        self.chromosomes = state["chromosomes"].astype(np.intp)
+        self.fitness = state["fitness"].copy()
+        self.best = state["best"].astype(np.intp)
+        self.best_fitness = state["best_fitness"][()]
+        checkpoint.set_generator_state(self.rng, state["rng"])
+        self.generation = int(state["generation"])
+        self.evaluations = int(state["evaluations"])
+        self.average_fit = list(state["average_fit"])
+        self.best_fit = list(state["best_fit"])
+
+    def elites(self, k: int) -> tuple:
+        '''copies of the k fittest evaluated chromosomes and their fitness'''
+        top = np.argsort(-self.fitness, kind="stable")[:k]
+        return self.chromosomes[top].copy(), self.fitness[top].copy()
+
+    def receive_migrants(self, chromosomes: np.ndarray, fitness: np.ndarray):
+        '''replace the least fit chromosomes by the migrants, their fitness comes with them'''
+        worst = np.argsort(self.fitness, kind="stable")[:len(chromosomes)]
+        self.chromosomes[worst] = chromosomes
+        self.fitness[worst] = fitness
+
+    def tournament_selection(self, tournament_size: int = 2, parent_num: int = 20):
+        '''use tournament selection to choose parent for crossover operation
+
+        a chromosome can only win once, the tournaments for the open places are held together
+        and repeated until every place is filled'''
+        candidates = np.arange(len(self.chromosomes))
+        winners = np.empty(0, dtype=candidates.dtype)
+        while len(winners) < parent_num:
+            places = parent_num - len(winners)
+            # every row is one tournament, contestants are drawn with replacement
+            contestants = candidates[self.rng.integers(len(candidates), size=(places, tournament_size))]
+            round_winners = contestants[np.arange(places), np.argmax(self.fitness[contestants], axis=1)]
+
+            # keep the first win of each chromosome
+            _, first = np.unique(round_winners, return_index=True)
+            round_winners = round_winners[np.sort(first)]
+            winners = np.concatenate([winners, round_winners])
+            candidates = np.setdiff1d(candidates, round_winners, assume_unique=True)
+
+        self.chromosomes = self.chromosomes[winners]
+        self.fitness = self.fitness[winners]
+
+        current_best = int(np.argmax(self.fitness))
+        if self.generation == 1:
+            self.best = self.chromosomes[current_best].copy()
+            self.best_fitness = self.fitness[current_best]
+        else:
+            # if the current_best is better than previoud best, accept it
+            if self.fitness[current_best] > self.best_fitness:
+                self.telemetry.event("GA", self.generation, "new best", previous=float(self.best_fitness), fitness=float(self.fitness[current_best]))
+                self.best = self.chromosomes[current_best].copy()
+                self.best_fitness = self.fitness[current_best]
+
+    def produce_bebes(self):
+        '''produce new bebes and make mutation'''
+        parents, total_tasks = self.chromosomes.shape
+        total_members = self.instance.total_members
+
+        # cross over operation, GeneticAlgoritm retries until a cross over happens
+        # so every bebe comes from a cross over of two different parents
+        pairs = -(-(self.size - parents) // 2)
+        parent_1 = self.rng.integers(parents, size=pairs)
+        parent_2 = self.rng.integers(parents - 1, size=pairs)
+        parent_2 += parent_2 >= parent_1
+        k = self.rng.integers(1, total_tasks, size=pairs)
+        head = np.arange(total_tasks) < k[:, None]
+
+        bebes = np.concatenate([
+            np.where(head, self.chromosomes[parent_1], self.chromosomes[parent_2]),
+            np.where(head, self.chromosomes[parent_2], self.chromosomes[parent_1]),
+        ])
+
+        # mutation operation, adding an offset in [1, members) always gives a different member
+        mutate = self.rng.random(bebes.shape) < self.mutation
+        offset = self.rng.integers(1, total_members, size=bebes.shape)
+        bebes = np.where(mutate, (bebes + offset) % total_members, bebes)
+
+        chromosomes = np.concatenate([self.chromosomes, bebes])
+        fitness = np.concatenate([self.fitness, np.full(len(bebes), np.nan)])
+
+        # resample to make sure that the size of chromosome is equal to population size
+        chosen = self.rng.choice(len(chromosomes), self.size, replace=False)
+        self.chromosomes = chromosomes[chosen]
+        self.fitness = fitness[chosen]
+
+    def record_fitness(self, average_fitness: float, best_fitness: float):
+        '''record the average fitness and best fitness'''
+        self.average_fit.append(average_fitness)
+        if len(self.best_fit) == 0:
+            self.best_fit.append(best_fitness)
+        else:
+            self.best_fit.append(best_fitness if best_fitness > self.best_fit[-1] else self.best_fit[-1])
+
+def island_topology(islands: int, topology: 'str | list[list[int]]' = "ring") -> list[list[int]]:
+    '''the islands each island sends its migrants to
+
+    "ring" sends to the next island, "full" to every other island, or a list of destinations per island'''
+    if islands == 1:
+        return [[]]
+    if topology == "ring":
+        return [[(i + 1) % islands] for i in range(islands)]
+    if topology == "full":
+        return [[j for j in range(islands) if j != i] for i in range(islands)]
+    if len(topology) != islands:
+        raise ValueError(f"the topology has {len(topology)} islands instead of {islands}")
+    return [list(destinations) for destinations in topology]
+
+def island_worker(index: int, handle: SharedInstanceHandle, scenario: str, settings: dict, stopping: StoppingPolicy, inbox, outboxes: list, results):
+    '''evolve one island of run_islands in its own process
+
+    the instance arrays are attached from the shared memory published by run_islands,
+    every migration_interval generations the elites are sent to the outboxes, and the migrants
+    waiting in the inbox replace the least fit chromosomes, an island never waits for migrants'''
+    # migrants that are never read must not keep the process from exiting
+    for outbox in outboxes:
+        outbox.cancel_join_thread()
+
+    instance = attach(handle)
+    baseline = handle.baseline(scenario)
+    ga = ArrayGeneticAlgorithm(instance, settings["population"], settings["mutation"], settings["cross_over"], seed=settings["seed"])
+    received = 0
+    # the clock of the policy was started by run_islands, perf_counter is system wide so the
+    # time budget includes starting the processes
+    while not stopping.should_stop(ga.generation - 1, ga.evaluations, ga.best_fit):
+        average_fitness, best_fitness = ga.evaluate_chromosome(baseline=baseline)
+
+        if settings["migration_interval"] and ga.generation % settings["migration_interval"] == 0:
+            chromosomes, fitness = ga.elites(settings["migrants"])
+            # members are sent as 32 bit indices instead of Assignment objects
+            message = (chromosomes.astype(np.int32), fitness)
+            for outbox in outboxes:
+                outbox.put(message)
+            while True:
+                try:
+                    chromosomes, fitness = inbox.get_nowait()
+                except queue.Empty:
+                    break
+                ga.receive_migrants(chromosomes.astype(np.intp), fitness)
+                received += len(chromosomes)
+            best_fitness = max(best_fitness, ga.fitness.max())
+
+        ga.tournament_selection(tournament_size=4, parent_num=int(settings["population"] * 0.8))
+        ga.produce_bebes()
+        ga.record_fitness(average_fitness, best_fitness)
+        ga.generation += 1
+
+    results.put({
+        "island": index,
+        "best": ga.best.astype(np.int32),
+        "best_fitness": float(ga.best_fitness),
+        "average_fit": ga.average_fit,
+        "best_fit": ga.best_fit,
+        "evaluations": ga.evaluations,
+        "migrants": received,
+        "reason": stopping.reason,
+    })
+
+def run_islands(
+    members: list[Member],
+    tasks: list[Task],
+    initial_formation: Project,
+    islands: int = 4,
+    migration_interval: int = 10,
+    migrants: int = 2,
+    topology: 'str | list[list[int]]' = "ring",
+    population: int = 100,
+    mutation: 'float | list[float]' = 0.1,
+    cross_over: 'float | list[float]' = 0.9,
+    max_iteration: int = 800,
+    enable_visuals: bool = True,
+    seed: int = None,
+    telemetry: Telemetry = None,
+    stopping: StoppingPolicy = None,
+) -> tuple:
+    '''run the array genetic algorithm on several islands, one process each, with elite migration
+
+    every island gets its own seed and can get its own mutation and cross over rate, the best
+    chromosome of all the islands is saved, returns the average over the islands of the average
+    fitness and the best over the islands of the best fitness of each generation'''
+    stopping = StoppingPolicy(max_iteration=max_iteration) if stopping is None else stopping
+    stopping.start()
+    telemetry = ConsoleTelemetry() if telemetry is None else telemetry
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+
+    instance = ProblemInstance.from_models(members, tasks, initial_formation.collaboration)
+    baseline = fitness_checker.baseline_vector(initial_formation)
+    mutation = mutation if isinstance(mutation, list) else [mutation] * islands
+    cross_over = cross_over if isinstance(cross_over, list) else [cross_over] * islands
+    # independent seeds for the islands, taken from the random module when no seed is given
+    seeds = np.random.SeedSequence(random.getrandbits(64) if seed is None else seed).spawn(islands)
+    destinations = island_topology(islands, topology)
+
+    # the islands attach to the arrays instead of receiving a copy each
+    shared = SharedInstance.publish(instance, {initial_formation.name: baseline})
+    context = multiprocessing.get_context("spawn")
+    inboxes = [context.Queue() for i in range(islands)]
+    results = context.Queue()
+    processes = list()
+    for i in range(islands):
+        settings = dict(
+            population=population,
+            mutation=mutation[i],
+            cross_over=cross_over[i],
+            seed=int(seeds[i].generate_state(1, np.uint64)[0]),
+            migration_interval=migration_interval,
+            migrants=migrants,
+        )
+        process = context.Process(
+            target=island_worker,
+            args=(i, shared.handle, initial_formation.name, settings, stopping, inboxes[i], [inboxes[j] for j in destinations[i]], results),
+        )
+        process.start()
+        processes.append(process)
+
+    # the results are read before joining, a process does not exit until its result is read
+    try:
+        island_results = list()
+        while len(island_results) < islands:
+            try:
+                island_results.append(results.get(timeout=1))
+            except queue.Empty:
+                failed = [p.exitcode for p in processes if p.exitcode not in (None, 0)]
+                if failed:
+                    raise RuntimeError(f"an island process failed with exit code {failed[0]}")
+        island_results.sort(key=lambda r: r["island"])
+        for process in processes:
+            process.join()
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        shared.close()
+
+    for r in island_results:
+        telemetry.event(
+            "GA", len(r["best_fit"]), "island stopped", island=r["island"], best_fitness=r["best_fitness"],
+            evaluations=r["evaluations"], migrants=r["migrants"], reason=r["reason"],
+        )
+    best = max(island_results, key=lambda r: r["best_fitness"])
+    generations = min(len(r["best_fit"]) for r in island_results)
+    average_fit = [float(np.mean([r["average_fit"][g] for r in island_results])) for g in range(generations)]
+    best_fit = [max(r["best_fit"][g] for r in island_results) for g in range(generations)]
+    telemetry.event("GA", generations, "stopped", reason=best["reason"], best_fitness=best["best_fitness"], island=best["island"])
+
+    new_solution: Project = Project(initial_formation.name, instance.decode(best["best"]), initial_formation.collaboration, initial_formation.instance_hash)
+    params = dict(
+        engine="islands", islands=islands, migration_interval=migration_interval, migrants=migrants,
+        topology=topology, population=population, mutation=mutation, cross_over=cross_over,
+        **stopping.settings(), stop_reason=best["reason"],
+    )
+    new_solution.save_project(before=False, mh_name="GA", params=params, seed=seed)
+    if enable_visuals:
+        from matplotlib import pyplot as plt
+
+        plt.plot(average_fit)
+        plt.show()
+
+        difference_checker.print_difference(initial_formation, new_solution)
+
+    return average_fit, best_fit
+
 def print_previous_output(before_path: str, after_path: str):
     '''print the solution difference from previous runs'''
-    before: Project = None
-    after: Project = None
-    with open(f"data/solution/before/{before_path}", "rb") as f:
-        before = pickle.load(f)
-    with open(f"data/solution/after/{after_path}", "rb") as f:
-        after = pickle.load(f)
-
-    difference_checker.print_difference(before, after)
-
-def run(members: list[Member], tasks: list[Task], initial_formation: Project, max_iteration: int = 800, enable_visuals:bool = True) -> tuple:
-    ga = GeneticAlgoritm(members, tasks, 100, 0.1, 0.9)
-    while ga.generation <= max_iteration:
-        average_fitness, best_fitness = ga.evaluate_chromosome(initial_formation)
-        ga.tournament_selection(tournament_size=4, parent_num=80)
-        ga.produce_bebes()
+    import setup
+
+    difference_checker.print_saved_difference(before_path, after_path, setup.members, setup.tasks, setup.collaboration, setup.instance_hash)
+
+def run_arrays(instance: ProblemInstance, baseline: np.ndarray, start: np.ndarray, max_iteration: int = 800, seed: int = None, stopping: StoppingPolicy = None, population: int = 100, mutation: float = 0.1, cross_over: float = 0.9, cache_size: int = 0) -> tuple:
+    '''run ArrayGeneticAlgorithm on the arrays of an instance only, eg attached from shared memory in a worker
 
+    no member, task or Project object is needed, baseline is the baseline vector of the initial
+    formation and start its encoded solution, which the population does not start from (as in run),
+    returns the average fitness and the best fitness of each generation'''
+    stopping = StoppingPolicy(max_iteration=max_iteration) if stopping is None else stopping
+    stopping.start()
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+    ga = ArrayGeneticAlgorithm(instance, population, mutation, cross_over)
+    if cache_size > 0:
+        ga.cache = fitness_checker.FitnessCache(cache_size)
+
+    while not stopping.should_stop(ga.generation - 1, ga.evaluations, ga.best_fit):
+        average_fitness, best_fitness = ga.evaluate_chromosome(baseline=baseline)
+        ga.tournament_selection(tournament_size=4, parent_num=int(population * 0.8))
+        ga.produce_bebes()
         ga.record_fitness(average_fitness, best_fitness)
-        print(f"GA | Generation: {ga.generation} | Population: {len(ga.chromosomes)} | Average fitness: {average_fitness:.4f} | Best fit: {ga.best_fit[-1]:.4f}")
         ga.generation += 1
 
-    new_solution: Project = Project(initial_formation.name, ga.best.genes)
-    new_solution.save_project(before=False, mh_name="GA")
+    return ga.average_fit, ga.best_fit
+
+def run(members: list[Member], tasks: list[Task], initial_formation: Project, max_iteration: int = 800, enable_visuals:bool = True, use_batch: bool = False, engine: str = "object", cache_size: int = 0, seed: int = None, telemetry: Telemetry = None, stopping: StoppingPolicy = None, instance: ProblemInstance = None, save: bool = True, warm_start: list[Assignment] = None, checkpointer: Checkpointer = None, resume: str = None, profiler: Profiler = None, population: int = 100, mutation: float = 0.1, cross_over: float = 0.9) -> tuple:
+    '''run the genetic algorithm
+
+    engine "object" keeps the chromosomes as lists of assignments, engine "array" uses ArrayGeneticAlgorithm,
+    the random generators are seeded when seed is given, the seed is saved with the solution,
+    the progress is printed every generation unless another telemetry sink is given,
+    the run stops after max_iteration iterations unless a stopping policy is given,
+    a prebuilt instance (eg attached from shared memory) is used for the batch evaluation instead of building one,
+    the assignments are taken from the assignment pool of the instance when there is one,
+    the solution is saved unless save is False, it is also reported to the telemetry as a "solution" event,
+    half of the first population is seeded from the warm_start solution when given (see warm_start.py),
+    the checkpointer saves the state of the run every few generations, resume continues from a saved
+    checkpoint (see checkpoint.py), the profiler times every phase of a generation (see profiler.py),
+    population chromosomes are kept, 80% of them are selected as parents of the next generation'''
+    stopping = StoppingPolicy(max_iteration=max_iteration) if stopping is None else stopping
+    stopping.start()
+    telemetry = ConsoleTelemetry() if telemetry is None else telemetry
+    profiler = NullProfiler() if profiler is None else profiler
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+    # precomputed arrays for the batch fitness evaluation
+    if instance is not None:
+        instance.bind(members, tasks)
+    elif use_batch or engine == "array":
+        instance = ProblemInstance.from_models(members, tasks, initial_formation.collaboration)
+    if engine == "array":
+        ga = ArrayGeneticAlgorithm(instance, population, mutation, cross_over)
+        if warm_start is not None:
+            ga.seed_population(instance.encode(warm_start))
+    else:
+        ga = GeneticAlgoritm(members, tasks, population, mutation, cross_over, pool=instance.assignment_pool() if instance is not None else None)
+        if warm_start is not None:
+            ga.seed_population(warm_start)
+    if resume is not None:
+        state = checkpoint.load(resume)
+        checkpoint.check(state, "GA", engine, initial_formation.instance_hash, (len(tasks), len(members)))
+        ga.restore(state)
+        checkpoint.set_random_state(state)
+        stopping.resume(state)
+    if cache_size > 0:
+        ga.cache = fitness_checker.FitnessCache(cache_size)
+    ga.telemetry = telemetry
+
+    profiler.start("GA")
+    while not stopping.should_stop(ga.generation - 1, ga.evaluations, ga.best_fit):
+        with profiler.phase("evaluate_chromosome", ga):
+            if engine == "array":
+                average_fitness, best_fitness = ga.evaluate_chromosome(initial_formation)
+            else:
+                average_fitness, best_fitness = ga.evaluate_chromosome(initial_formation, instance)
+        with profiler.phase("tournament_selection"):
+            ga.tournament_selection(tournament_size=4, parent_num=int(population * 0.8))
+        with profiler.phase("produce_bebes"):
+            ga.produce_bebes()
+
+        with profiler.phase("telemetry"):
+            ga.record_fitness(average_fitness, best_fitness)
+            telemetry.iteration("GA", ga.generation, average_fitness, ga.best_fit[-1], population=len(ga.chromosomes))
+        ga.generation += 1
+        if checkpointer is not None and checkpointer.due(ga.generation - 1):
+            with profiler.phase("checkpoint"):
+                checkpointer.save("GA", engine, initial_formation.instance_hash, (len(tasks), len(members)), ga.checkpoint_state(), stopping)
+    profiler.stop()
+    if checkpointer is not None:
+        checkpointer.close()
+    telemetry.event("GA", ga.generation - 1, "stopped", reason=stopping.reason, evaluations=ga.evaluations, elapsed_time=stopping.elapsed)
+
+    best_assignments = instance.decode(ga.best) if engine == "array" else ga.best.genes
+    new_solution: Project = Project(initial_formation.name, best_assignments, initial_formation.collaboration, initial_formation.instance_hash)
+    params = dict(use_batch=use_batch, engine=engine, population=population, mutation=mutation, cross_over=cross_over, cache_size=cache_size, warm_start=warm_start is not None, **stopping.settings(), stop_reason=stopping.reason)
+    if save:
+        record = new_solution.save_project(before=False, mh_name="GA", params=params, seed=seed)
+    elif telemetry.enabled:
+        record = new_solution.to_record("GA", params, seed)
+    if telemetry.enabled:
+        telemetry.event("GA", ga.generation - 1, "solution", fitness=float(ga.best_fit[-1]), solution=record)
     if enable_visuals:
+        from matplotlib import pyplot as plt
+
         plt.plot(ga.average_fit)
         plt.show()
 
@@ -163,12 +636,16 @@ def run(members: list[Member], tasks: list[Task], initial_formation: Project, ma
 
     return ga.average_fit, ga.best_fit
 
-# run(proof_setup.members, proof_setup.tasks, proof_setup.project)
-run(setup.members, setup.tasks, setup.projects[0])
+if __name__ == "__main__":
+    import setup, proof_setup
+    setup.save_scenarios()
+
+    # run(proof_setup.members, proof_setup.tasks, proof_setup.project)
+    run(setup.members, setup.tasks, setup.projects[0])
 
-# for p in setup.projects:
-#     print(f"////////////////{p.name}////////////////")
-#     before = f"{p.name}/{p.name}.pickle"
-#     after = f"{p.name}/GA.pickle"
-#     print_previous_output(before, after)
-#     print("")
\ No newline at end of file
+    # for p in setup.projects:
+    #     print(f"////////////////{p.name}////////////////")
+    #     before = f"{p.name}/{p.name}.json"
+    #     after = f"{p.name}/GA.json"
+    #     print_previous_output(before, after)
+    #     print("")
@@ -1,28 +1,30 @@
-from models.assignment import Assignment
+from models.assignment import Assignment, AssignmentPool
 from models.project import Project
 from models.task import Task
 from models.member import Member 
-import setup, proof_setup
 import fitness_checker
-import random, pickle
+import checkpoint
+from checkpoint import Checkpointer
+from profiler import Profiler, NullProfiler
+from telemetry import Telemetry, NullTelemetry, ConsoleTelemetry
+from stopping import StoppingPolicy
+from problem_instance import ProblemInstance
+import random
 import numpy as np
-from matplotlib import pyplot as plt
 import difference_checker
 
-class State(Assignment):
-    '''represent a possible state'''
-    def __init__(self, task, member):
-        super().__init__(task, member)
-
 class Solution:
     def __init__(self, states: list):
-        self.states:list[State] = states
+        # the assignments of the solution
+        self.states:list[Assignment] = states
         self.fitness = 0
 
 class SimulatedAnnealing:
-    def __init__(self, members: list[Member], tasks: list[Task], current_solution: Solution, initial_temperature: float = 1000, cd: float = 0.99, total_neighbour: int = 5):
+    def __init__(self, members: list[Member], tasks: list[Task], current_solution: Solution, initial_temperature: float = 1000, cd: float = 0.99, total_neighbour: int = 5, pool: AssignmentPool = None):
         self.members = members
         self.task = tasks
+        # every state is taken from the shared pool (eg ProblemInstance.assignment_pool) instead of creating a new one
+        self.pool = AssignmentPool(tasks, members) if pool is None else pool
         
         self.temperature = initial_temperature
         self.cd = cd
@@ -30,12 +32,56 @@ class SimulatedAnnealing:
         self.neighbours:list[Solution] = list()
         # the current selected solution
         self.current_solution:Solution = current_solution
+        # scores the neighbours by their changes to the current solution when set
+        self.evaluator: fitness_checker.IncrementalFitness = None
+        # fitness of previously seen solutions, used when set
+        self.cache: fitness_checker.FitnessCache = None
 
         self.iteration = 1
+        # cooling steps skipped by a warm start, the neighbours change as if they were that many iterations later
+        self.skipped_iterations = 0
 
         self.average_fit = list()
         self.best_fit = list()
+        self.telemetry: Telemetry = NullTelemetry()
+        # number of candidate solutions scored so far
+        self.evaluations = 0
     
+    def warm_start(self, solution: Solution, change_rate: float = 0.2):
+        '''start from a previous solution instead of the initial formation
+
+        the hot start of the cooling schedule would replace almost every state of the solution,
+        so the schedule is resumed where a neighbour changes about change_rate of the states'''
+        self.current_solution = solution
+        while np.exp(-(self.iteration + self.skipped_iterations) / self.temperature) > change_rate:
+            self.cooldown()
+            self.skipped_iterations += 1
+
+    def checkpoint_state(self) -> dict:
+        '''the current solution, the schedule and the history as arrays, see checkpoint.py'''
+        return {
+            "tasks": np.array([self.pool.task_index[s.task] for s in self.current_solution.states], dtype=np.intp),
+            "members": np.array([self.pool.member_index[s.member] for s in self.current_solution.states], dtype=np.intp),
+            "fitness": np.array(self.current_solution.fitness),
+            "temperature": np.array(self.temperature),
+            "iteration": np.array(self.iteration),
+            "skipped_iterations": np.array(self.skipped_iterations),
+            "evaluations": np.array(self.evaluations),
+            "average_fit": checkpoint.history(self.average_fit),
+            "best_fit": checkpoint.history(self.best_fit),
+        }
+
+    def restore(self, state: dict):
+        '''continue from a checkpoint_state'''
+        self.current_solution = Solution([self.pool[t, m] for t, m in zip(state["tasks"], state["members"])])
+        self.current_solution.fitness = state["fitness"][()]
+        self.temperature = state["temperature"][()]
+        self.iteration = int(state["iteration"])
+        self.skipped_iterations = int(state["skipped_iterations"])
+        self.evaluations = int(state["evaluations"])
+        self.average_fit = list(state["average_fit"])
+        self.best_fit = list(state["best_fit"])
+
     def cooldown(self):
         '''cool down the temperature'''
         self.temperature *= self.cd
@@ -51,16 +97,16 @@ class SimulatedAnnealing:
         
         lower - less changes'''
         new_neighbours = list()
-        change_prob = np.exp(-self.iteration/self.temperature) 
+        change_prob = np.exp(-(self.iteration + self.skipped_iterations)/self.temperature) 
 
         for i in range(self.total_neighbours):
             states = list()
             for a in self.current_solution.states:
                 state = None
                 if random.random() < change_prob:
-                    state = State(a.task, random.choice(self.members))
+                    state = self.pool.get(a.task, random.choice(self.members))
                 else:
-                    state = State(a.task, a.member)
+                    state = self.pool.get(a.task, a.member)
                 
                 states.append(state)
             
@@ -69,11 +115,42 @@ class SimulatedAnnealing:
         
         self.neighbours = new_neighbours
     
-    def evaluate_solution(self, initial_solution: Project):
+    def evaluate_solution(self, initial_solution: Project, instance: ProblemInstance = None):
         '''evaluates the fitness of all solutions
         returns the average fitness and best fitness'''
-        for n in self.neighbours:
-            n.fitness = fitness_checker.check_fitness(n.states, initial_solution)
+        self.evaluations += len(self.neighbours)
+        if self.evaluator is not None:
+            # neighbours found in the cache are not scored again
+            keys = None
+            if self.cache is not None:
+                baseline_key = self.cache.baseline_key(initial_solution)
+                keys = [self.cache.key(fitness_checker.solution_vector(n.states), baseline_key) for n in self.neighbours]
+
+            # neighbours with few changed states are scored by their changes to the current solution
+            member_index = self.evaluator.instance.member_index
+            current_states = self.current_solution.states
+            self.evaluator.assign([member_index[s.member] for s in current_states])
+            for i, n in enumerate(self.neighbours):
+                if keys is not None:
+                    n.fitness = self.cache.get(keys[i])
+                    if n.fitness is not None:
+                        continue
+
+                changes = [(t, s.member) for t, (s, current) in enumerate(zip(n.states, current_states)) if s.member is not current.member]
+                if len(changes) > len(current_states) // 4:
+                    n.fitness = fitness_checker.check_fitness(n.states, initial_solution)
+                else:
+                    for t, m in changes:
+                        self.evaluator.move(t, member_index[m])
+                    n.fitness = self.evaluator.fitness
+                    self.evaluator.rollback()
+
+                if keys is not None:
+                    self.cache.put(keys[i], n.fitness)
+        else:
+            neighbour_fitness = fitness_checker.evaluate_solutions([n.states for n in self.neighbours], initial_solution, instance, self.cache)
+            for n, fit in zip(self.neighbours, neighbour_fitness):
+                n.fitness = fit
         
         fitness = [n.fitness for n in self.neighbours]
         return np.mean(fitness), max(fitness)
@@ -95,11 +172,11 @@ class SimulatedAnnealing:
         if random.random() < accept_prob:
             # when diff > 0, the new solution is worse than the current solution
             if diff > 0:
-                print("God has accepted the worse solution")
+                self.telemetry.event("SA", self.iteration, "accepted worse", fitness=best_neighbour.fitness, probability=float(accept_prob))
 
             # when diff < 0, the new solution is better than the current solution
             elif diff < 0:
-                print("New best found!")
+                self.telemetry.event("SA", self.iteration, "new best", previous=self.current_solution.fitness, fitness=best_neighbour.fitness)
             
             self.current_solution = best_neighbour
 
@@ -121,33 +198,189 @@ class SimulatedAnnealing:
         else:
             self.best_fit.append(best_fitness if best_fitness > self.best_fit[-1] else self.best_fit[-1])
     
+class ArraySimulatedAnnealing:
+    '''simulated annealing on an array of member indices of a ProblemInstance
+
+    the neighbours of an iteration are a (neighbours x tasks) array built and evaluated all at once'''
+    def __init__(self, instance: ProblemInstance, current_solution: np.ndarray, initial_temperature: float = 1000, cd: float = 0.99, total_neighbour: int = 5, seed: int = None):
+        self.instance = instance
+
+        self.temperature = initial_temperature
+        self.cd = cd
+        self.total_neighbours = total_neighbour
+        # the seed is taken from the random module when not given so that random.seed still applies
+        self.rng = np.random.default_rng(random.getrandbits(64) if seed is None else seed)
+        self.neighbours = np.zeros((total_neighbour, instance.total_tasks), dtype=np.intp)
+        self.fitness = np.zeros(total_neighbour)
+        # the current selected solution, its fitness starts at 0 like Solution
+        self.current_solution = np.array(current_solution, dtype=np.intp)
+        self.current_fitness = 0
+        # fitness of previously seen solutions, used when set
+        self.cache: fitness_checker.FitnessCache = None
+
+        self.iteration = 1
+        self.average_fit = list()
+        self.best_fit = list()
+        self.telemetry: Telemetry = NullTelemetry()
+        # number of candidate solutions scored so far
+        self.evaluations = 0
+
+    def cooldown(self):
+        '''cool down the temperature'''
+        self.temperature = max(self.temperature * self.cd, 0.0001)
+
+    def create_neighbour_solution(self):
+        '''every task of every neighbour gets a random member with a probability that falls with the temperature'''
+        change_prob = np.exp(-self.iteration / self.temperature)
+        shape = (self.total_neighbours, self.instance.total_tasks)
+        changed = self.rng.random(shape) < change_prob
+        self.neighbours = np.where(changed, self.rng.integers(self.instance.total_members, size=shape), self.current_solution)
+
+    def evaluate_solution(self, baseline: np.ndarray):
+        '''evaluates the fitness of all neighbours
+        returns the average fitness and best fitness'''
+        self.evaluations += len(self.neighbours)
+        self.fitness = fitness_checker.evaluate_population(self.neighbours, self.instance, baseline, self.cache)
+
+        return np.mean(self.fitness), self.fitness.max()
+
+    def decide_solution(self):
+        '''move to the best neighbour when it is better, or with the annealing probability when it is worse'''
+        best = int(np.argmax(self.fitness))
+        diff = self.current_fitness - self.fitness[best]
+        accept_prob = np.exp(-diff / self.temperature)
+        if self.rng.random() < accept_prob:
+            if diff > 0:
+                self.telemetry.event("SA", self.iteration, "accepted worse", fitness=float(self.fitness[best]), probability=float(accept_prob))
+            elif diff < 0:
+                self.telemetry.event("SA", self.iteration, "new best", previous=float(self.current_fitness), fitness=float(self.fitness[best]))
+            self.current_solution = self.neighbours[best].copy()
+            self.current_fitness = self.fitness[best]
+
+        # recording the best fitness, like SimulatedAnnealing
+        if len(self.best_fit) == 0 or self.best_fit[-1] < self.current_fitness:
+            self.best_fit.append(self.current_fitness)
+        else:
+            self.best_fit.append(self.best_fit[-1])
+
+    def record_fitness(self, average_fitness: float, best_fitness: float):
+        '''record the average fitness and best fitness'''
+        self.average_fit.append(average_fitness)
+        if len(self.best_fit) == 0:
+            self.best_fit.append(best_fitness)
+        else:
+            self.best_fit.append(best_fitness if best_fitness > self.best_fit[-1] else self.best_fit[-1])
+
 def print_previous_output(before_path: str, after_path: str):
     '''print the solution difference from previous runs'''
+    import setup
 
-    before: Project = None
-    after: Project = None
-    with open(f"data/solution/before/{before_path}", "rb") as f:
-        before = pickle.load(f)
-    with open(f"data/solution/after/{after_path}", "rb") as f:
-        after = pickle.load(f)
+    difference_checker.print_saved_difference(before_path, after_path, setup.members, setup.tasks, setup.collaboration, setup.instance_hash)
 
-    difference_checker.print_difference(before, after)
+def run_arrays(instance: ProblemInstance, baseline: np.ndarray, start: np.ndarray, max_iteration: int = 800, seed: int = None, stopping: StoppingPolicy = None, cache_size: int = 0) -> tuple:
+    '''run ArraySimulatedAnnealing on the arrays of an instance only, eg attached from shared memory in a worker
 
-def run(members: list[Member], tasks: list[Task], initial_formation: Project, max_iteration: int = 800, enable_visuals: bool = True) -> tuple:
-    sa = SimulatedAnnealing(members, tasks, Solution(initial_formation.assignments), initial_temperature=20000, cd=0.99, total_neighbour=100)
-    while sa.iteration <= max_iteration:
+    no member, task or Project object is needed, baseline is the baseline vector of the initial
+    formation and start its encoded solution, where the annealing starts,
+    returns the average fitness and the best fitness of each iteration'''
+    stopping = StoppingPolicy(max_iteration=max_iteration) if stopping is None else stopping
+    stopping.start()
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+    sa = ArraySimulatedAnnealing(instance, start, initial_temperature=20000, cd=0.99, total_neighbour=100)
+    if cache_size > 0:
+        sa.cache = fitness_checker.FitnessCache(cache_size)
+
+    while not stopping.should_stop(sa.iteration - 1, sa.evaluations, sa.best_fit):
         sa.create_neighbour_solution()
-        average_fitness, best_fitness = sa.evaluate_solution(initial_formation)
+        average_fitness, best_fitness = sa.evaluate_solution(baseline)
         sa.decide_solution()
         sa.cooldown()
         sa.record_fitness(average_fitness, best_fitness)
-        
-        print(f"SA | Iteration {sa.iteration} | temperature={sa.temperature:.8f} | Average fitness:{average_fitness:.4f} | Best fit: {sa.best_fit[-1]:.4f}")
         sa.iteration += 1
 
-    new_solution: Project = Project(initial_formation.name, sa.current_solution.states)
-    new_solution.save_project(before=False, mh_name="SA")
+    return sa.average_fit, sa.best_fit
+
+def run(members: list[Member], tasks: list[Task], initial_formation: Project, max_iteration: int = 800, enable_visuals: bool = True, use_batch: bool = False, use_delta: bool = False, cache_size: int = 0, seed: int = None, telemetry: Telemetry = None, stopping: StoppingPolicy = None, instance: ProblemInstance = None, save: bool = True, warm_start: list[Assignment] = None, checkpointer: Checkpointer = None, resume: str = None, profiler: Profiler = None) -> tuple:
+    '''run the simulated annealing
+
+    the random generators are seeded when seed is given, the seed is saved with the solution,
+    the progress is printed every iteration unless another telemetry sink is given,
+    the run stops after max_iteration iterations unless a stopping policy is given,
+    a prebuilt instance (eg attached from shared memory) is used for the batch evaluation instead of building one,
+    the assignments are taken from the assignment pool of the instance when there is one,
+    the solution is saved unless save is False, it is also reported to the telemetry as a "solution" event,
+    the annealing starts from the warm_start solution when given (see warm_start.py),
+    the checkpointer saves the state of the run every few iterations, resume continues from a saved
+    checkpoint (see checkpoint.py), the profiler times every phase of an iteration (see profiler.py)'''
+    stopping = StoppingPolicy(max_iteration=max_iteration) if stopping is None else stopping
+    stopping.start()
+    telemetry = ConsoleTelemetry() if telemetry is None else telemetry
+    profiler = NullProfiler() if profiler is None else profiler
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+    # precomputed arrays for the batch and incremental fitness evaluation
+    if instance is not None:
+        instance.bind(members, tasks)
+    elif use_batch or use_delta:
+        instance = ProblemInstance.from_models(members, tasks, initial_formation.collaboration)
+    sa = SimulatedAnnealing(
+        members, tasks, Solution(initial_formation.assignments), initial_temperature=20000, cd=0.99, total_neighbour=100,
+        pool=instance.assignment_pool() if instance is not None else None,
+    )
+    if warm_start is not None:
+        solution = Solution([sa.pool.get(a.task, a.member) for a in warm_start])
+        solution.fitness = fitness_checker.check_fitness(solution.states, initial_formation)
+        sa.warm_start(solution)
+    if resume is not None:
+        state = checkpoint.load(resume)
+        checkpoint.check(state, "SA", "delta" if use_delta else "object", initial_formation.instance_hash, (len(tasks), len(members)))
+        sa.restore(state)
+        checkpoint.set_random_state(state)
+        stopping.resume(state)
+    if use_delta:
+        sa.evaluator = fitness_checker.IncrementalFitness(
+            instance, fitness_checker.baseline_vector(initial_formation), instance.encode(initial_formation.assignments)
+        )
+    if cache_size > 0:
+        sa.cache = fitness_checker.FitnessCache(cache_size)
+    sa.telemetry = telemetry
+
+    profiler.start("SA")
+    while not stopping.should_stop(sa.iteration - 1, sa.evaluations, sa.best_fit):
+        with profiler.phase("create_neighbour_solution"):
+            sa.create_neighbour_solution()
+        with profiler.phase("evaluate_solution", sa):
+            average_fitness, best_fitness = sa.evaluate_solution(initial_formation, instance)
+        with profiler.phase("decide_solution"):
+            sa.decide_solution()
+            sa.cooldown()
+
+        with profiler.phase("telemetry"):
+            sa.record_fitness(average_fitness, best_fitness)
+            telemetry.iteration("SA", sa.iteration, average_fitness, sa.best_fit[-1], temperature=sa.temperature)
+        sa.iteration += 1
+        if checkpointer is not None and checkpointer.due(sa.iteration - 1):
+            with profiler.phase("checkpoint"):
+                checkpointer.save("SA", "delta" if use_delta else "object", initial_formation.instance_hash, (len(tasks), len(members)), sa.checkpoint_state(), stopping)
+    profiler.stop()
+    if checkpointer is not None:
+        checkpointer.close()
+    telemetry.event("SA", sa.iteration - 1, "stopped", reason=stopping.reason, evaluations=sa.evaluations, elapsed_time=stopping.elapsed)
+
+    new_solution: Project = Project(initial_formation.name, sa.current_solution.states, initial_formation.collaboration, initial_formation.instance_hash)
+    params = dict(use_batch=use_batch, use_delta=use_delta, cache_size=cache_size, warm_start=warm_start is not None, **stopping.settings(), stop_reason=stopping.reason)
+    if save:
+        record = new_solution.save_project(before=False, mh_name="SA", params=params, seed=seed)
+    elif telemetry.enabled:
+        record = new_solution.to_record("SA", params, seed)
+    if telemetry.enabled:
+        telemetry.event("SA", sa.iteration - 1, "solution", fitness=float(sa.current_solution.fitness), solution=record)
     if enable_visuals: 
+        from matplotlib import pyplot as plt
+
         plt.plot(sa.average_fit)
         plt.show()
 
@@ -155,12 +388,16 @@ def run(members: list[Member], tasks: list[Task], initial_formation: Project, ma
 
     return sa.average_fit, sa.best_fit
 
-# run(proof_setup.members, proof_setup.tasks, proof_setup.project)
-run(setup.members, setup.tasks, setup.projects[3])
+if __name__ == "__main__":
+    import setup, proof_setup
+    setup.save_scenarios()
+
+    # run(proof_setup.members, proof_setup.tasks, proof_setup.project)
+    run(setup.members, setup.tasks, setup.projects[3])
 
-# for p in setup.projects:
-#     print(f"////////////////{p.name}////////////////")
-#     before = f"{p.name}/{p.name}.pickle"
-#     after = f"{p.name}/SA.pickle"
-#     print_previous_output(before, after)
-#     print("")
\ No newline at end of file
+    # for p in setup.projects:
+    #     print(f"////////////////{p.name}////////////////")
+    #     before = f"{p.name}/{p.name}.json"
+    #     after = f"{p.name}/SA.json"
+    #     print_previous_output(before, after)
+    #     print("")
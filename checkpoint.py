@@ -0,0 +1,151 @@
+'''checkpoints of long GA, SA and ACO runs
+
+the whole state of the optimiser (population or current solution, pheromone, fitness history,
+random generator states, the time spent and the stagnation window of the stopping policy) is
+copied into numpy arrays at the end of an iteration and written to a .npz file by a background
+thread, a run resumed from a checkpoint follows the same trajectory as the uninterrupted run
+
+example:
+    GA.run(members, tasks, project, engine="array", seed=7, checkpointer=Checkpointer("ga.npz", every=50))
+    # after a crash
+    GA.run(members, tasks, project, engine="array", seed=7, resume="ga.npz")'''
+import json, os, queue, random, tempfile, threading, time
+import numpy as np
+
+CHECKPOINT_VERSION = 1
+
+def random_state() -> dict:
+    '''the states of the random module and of the numpy global generator'''
+    version, python_state, gauss_next = random.getstate()
+    _, keys, position, has_gauss, cached_gaussian = np.random.get_state()
+    return {
+        "python_random": np.array(python_state, dtype=np.uint32),
+        "python_gauss": np.array(np.nan if gauss_next is None else gauss_next),
+        "numpy_random": keys.copy(),
+        "numpy_random_extra": np.array([position, has_gauss, cached_gaussian], dtype=float),
+    }
+
+def set_random_state(state: dict):
+    '''restore the states saved by random_state'''
+    gauss_next = float(state["python_gauss"])
+    random.setstate((3, tuple(int(x) for x in state["python_random"]), None if np.isnan(gauss_next) else gauss_next))
+    position, has_gauss, cached_gaussian = state["numpy_random_extra"]
+    np.random.set_state(("MT19937", state["numpy_random"], int(position), int(has_gauss), float(cached_gaussian)))
+
+def generator_state(rng: np.random.Generator) -> np.ndarray:
+    '''the state of a numpy generator as a json string array'''
+    return np.array(json.dumps(rng.bit_generator.state))
+
+def set_generator_state(rng: np.random.Generator, state: np.ndarray):
+    rng.bit_generator.state = json.loads(str(state))
+
+def history(values: list) -> np.ndarray:
+    return np.array(values, dtype=float)
+
+def write(path: str, state: dict):
+    '''write the arrays to path, through a temporary file so that a crash never leaves half a checkpoint'''
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez_compressed(f, **state)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+def load(path: str) -> dict:
+    '''the arrays of a checkpoint'''
+    with np.load(path, allow_pickle=False) as data:
+        state = {key: data[key] for key in data.files}
+    if int(state["version"]) != CHECKPOINT_VERSION:
+        raise ValueError(f"{path} was written with checkpoint version {int(state['version'])}")
+    return state
+
+def check(state: dict, algorithm: str, engine: str, instance_hash: str, shape: tuple):
+    '''raise ValueError when a checkpoint does not belong to the run resuming from it'''
+    if str(state["algorithm"]) != algorithm or str(state["engine"]) != engine:
+        raise ValueError(f"the checkpoint is a {state['algorithm']} {state['engine']} run, not {algorithm} {engine}")
+    if instance_hash is not None and str(state["instance"]) not in ("", instance_hash):
+        raise ValueError(f"the checkpoint was written for another instance ({state['instance']})")
+    if tuple(state["shape"]) != tuple(shape):
+        raise ValueError(f"the checkpoint has {tuple(state['shape'])} tasks x members instead of {tuple(shape)}")
+
+class Checkpointer:
+    '''writes the state of a run to path every `every` iterations and at most every interval seconds
+
+    the state is copied on the calling thread and written by a background thread, when the thread
+    is still writing the previous checkpoint only the newest pending one is kept'''
+    def __init__(self, path: str, every: int = 100, interval: float = 0):
+        self.path = path
+        self.every = every
+        self.interval = interval
+        self.last_save = float("-inf")
+        # number of checkpoints written
+        self.written = 0
+        self.error: BaseException = None
+        self.pending: queue.Queue = queue.Queue(maxsize=1)
+        self.thread: threading.Thread = None
+
+    def due(self, iteration: int) -> bool:
+        '''whether a checkpoint is taken after the iteration'''
+        return iteration % self.every == 0 and time.perf_counter() - self.last_save >= self.interval
+
+    def save(self, algorithm: str, engine: str, instance_hash: str, shape: tuple, state: dict, stopping: 'StoppingPolicy'):
+        '''queue the state of the optimiser, the random states and the state of the stopping policy are added here'''
+        if self.error is not None:
+            raise RuntimeError(f"writing the checkpoint {self.path} failed") from self.error
+        self.last_save = time.perf_counter()
+        state = dict(
+            state,
+            **random_state(),
+            **stopping.checkpoint_state(),
+            version=np.array(CHECKPOINT_VERSION),
+            algorithm=np.array(algorithm),
+            engine=np.array(engine),
+            instance=np.array(instance_hash or ""),
+            shape=np.array(shape),
+        )
+
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._write, daemon=True)
+            self.thread.start()
+        # the newest state replaces one that is still waiting
+        try:
+            self.pending.get_nowait()
+            self.pending.task_done()
+        except queue.Empty:
+            pass
+        self.pending.put(state)
+
+    def _write(self):
+        while True:
+            state = self.pending.get()
+            try:
+                if state is None:
+                    return
+                write(self.path, state)
+                self.written += 1
+            except BaseException as e:
+                self.error = e
+            finally:
+                self.pending.task_done()
+
+    def close(self):
+        '''wait for the pending checkpoint to be written and stop the thread'''
+        if self.thread is not None:
+            self.pending.join()
+            self.pending.put(None)
+            self.thread.join()
+            self.thread = None
+        if self.error is not None:
+            raise RuntimeError(f"writing the checkpoint {self.path} failed") from self.error
+
+    def __enter__(self) -> 'Checkpointer':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,171 @@
+'''generate synthetic staff and task files of any size for stress and scaling tests
+
+the staff file has the same layout as staff_expertise.json, except that the collaboration
+scores are written as a sparse "ratings" list of [member id, score] pairs instead of a dense
+"scores" list, setup.load reads both layouts
+
+members are generated and written in chunks, so neither the staff list nor the
+collaboration matrix is ever held in memory
+
+example:
+    python data/instance_generator.py --members 10000 --tasks 1000 --skills 500 --density 0.01'''
+import argparse
+import json
+import os
+import numpy as np
+
+
+def member_skill_counts(rng: np.random.Generator, size: int, skills: int, distribution: str, low: int, high: int) -> np.ndarray:
+    """number of skills of each member
+
+    uniform: between low and high, poisson: mean of (low + high) / 2 clipped to [low, high]"""
+    if distribution == "uniform":
+        counts = rng.integers(low, high + 1, size=size)
+    elif distribution == "poisson":
+        counts = np.clip(rng.poisson((low + high) / 2, size=size), low, high)
+    else:
+        raise ValueError(f"unknown skill distribution {distribution!r}")
+
+    return np.minimum(counts, skills)
+
+
+def skill_popularity(skills: int, skew: float) -> np.ndarray:
+    """probability of each skill, skew 0 gives every skill the same probability, higher skew follows zipf"""
+    weights = 1 / np.arange(1, skills + 1) ** skew
+    return weights / weights.sum()
+
+
+def sample_skills(rng: np.random.Generator, counts: np.ndarray, popularity: np.ndarray) -> list[list[str]]:
+    """draw the given number of distinct skills for every row"""
+    return [
+        [f"skill{s}" for s in rng.choice(len(popularity), size=c, replace=False, p=popularity)]
+        for c in counts
+    ]
+
+
+def sample_ratings(rng: np.random.Generator, member_id: int, members: int, density: float) -> list[list[int]]:
+    """[member id, score] pairs of the members rated by this member, each other member is rated with probability density"""
+    # a single member has nobody to rate
+    if members < 2:
+        return list()
+    rated = rng.binomial(members - 1, density)
+    others = np.sort(rng.choice(members - 1, size=rated, replace=False))
+    # skip the member itself
+    others[others >= member_id] += 1
+    scores = rng.integers(1, 6, size=len(others))
+
+    return [[int(o), int(s)] for o, s in zip(others, scores)]
+
+
+def write_staff(
+    path: str,
+    members: int,
+    skills: int,
+    rng: np.random.Generator,
+    skill_distribution: str = "uniform",
+    member_skills: tuple = (1, 5),
+    skill_skew: float = 0.0,
+    density: float = 1.0,
+    chunk_size: int = 1000,
+):
+    """stream the staff file to disk, chunk_size members at a time"""
+    popularity = skill_popularity(skills, skill_skew)
+    with open(path, "w") as f:
+        f.write("{\n")
+        for start in range(0, members, chunk_size):
+            size = min(chunk_size, members - start)
+            counts = member_skill_counts(rng, size, skills, skill_distribution, *member_skills)
+            expertise = sample_skills(rng, counts, popularity)
+            salary = rng.integers(1000, 5001, size=size)
+            # efficiency in (0, 1], a zero efficiency would give an infinite estimated time
+            efficiency = 1 - rng.random(size=size)
+
+            lines = list()
+            for i in range(size):
+                member_id = start + i
+                record = {
+                    "expertise": expertise[i],
+                    "salary": int(salary[i]),
+                    "efficiency": float(efficiency[i]),
+                    "ratings": sample_ratings(rng, member_id, members, density),
+                }
+                lines.append(f"{json.dumps(f'staff{member_id}')}: {json.dumps(record)}")
+
+            f.write(",\n".join(lines))
+            f.write(",\n" if start + size < members else "\n")
+        f.write("}\n")
+
+
+def write_tasks(
+    path: str,
+    tasks: int,
+    skills: int,
+    rng: np.random.Generator,
+    task_skills: tuple = (1, 4),
+    skill_skew: float = 0.0,
+    chunk_size: int = 1000,
+):
+    """stream the task file to disk, chunk_size tasks at a time"""
+    popularity = skill_popularity(skills, skill_skew)
+    with open(path, "w") as f:
+        f.write("[\n")
+        for start in range(0, tasks, chunk_size):
+            size = min(chunk_size, tasks - start)
+            counts = member_skill_counts(rng, size, skills, "uniform", *task_skills)
+            required = sample_skills(rng, counts, popularity)
+
+            lines = [
+                json.dumps({"task": f"task{start + i}", "skills_required": required[i]})
+                for i in range(size)
+            ]
+            f.write(",\n".join(lines))
+            f.write(",\n" if start + size < tasks else "\n")
+        f.write("]\n")
+
+
+def generate(
+    out_dir: str,
+    members: int,
+    tasks: int,
+    skills: int,
+    seed: int = 1,
+    skill_distribution: str = "uniform",
+    member_skills: tuple = (1, 5),
+    task_skills: tuple = (1, 4),
+    skill_skew: float = 0.0,
+    density: float = 1.0,
+    chunk_size: int = 1000,
+) -> tuple:
+    """generate a staff file and a task file in out_dir, returns their paths"""
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    staff_path = os.path.join(out_dir, "staff_expertise.json")
+    task_path = os.path.join(out_dir, "task.json")
+
+    write_staff(staff_path, members, skills, rng, skill_distribution, member_skills, skill_skew, density, chunk_size)
+    write_tasks(task_path, tasks, skills, rng, task_skills, skill_skew, chunk_size)
+
+    return staff_path, task_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="generate a synthetic team formation instance")
+    parser.add_argument("--members", type=int, default=1000)
+    parser.add_argument("--tasks", type=int, default=100)
+    parser.add_argument("--skills", type=int, default=200, help="size of the skill vocabulary")
+    parser.add_argument("--member-skills", type=int, nargs=2, default=(1, 5), metavar=("MIN", "MAX"))
+    parser.add_argument("--task-skills", type=int, nargs=2, default=(1, 4), metavar=("MIN", "MAX"))
+    parser.add_argument("--distribution", choices=("uniform", "poisson"), default="uniform", help="distribution of the number of skills per member")
+    parser.add_argument("--skew", type=float, default=0.0, help="zipf exponent of the skill popularity, 0 for uniform")
+    parser.add_argument("--density", type=float, default=1.0, help="probability that a member rated another member")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--out-dir", default=None, help="defaults to data/synthetic/<members>x<tasks>")
+    args = parser.parse_args()
+
+    out_dir = args.out_dir or f"data/synthetic/{args.members}x{args.tasks}"
+    paths = generate(
+        out_dir, args.members, args.tasks, args.skills, args.seed, args.distribution,
+        tuple(args.member_skills), tuple(args.task_skills), args.skew, args.density, args.chunk_size,
+    )
+    print(*paths, sep="\n")
@@ -1,5 +1,7 @@
 from models.project import Project
-import pandas as pd
+from models.member import Member
+from models.task import Task
+from models.collaboration import CollaborationMatrix
 
 def calculate_improvement(before: dict, after: dict, key: str):
     if before[key] == 0:
@@ -9,6 +11,8 @@ def calculate_improvement(before: dict, after: dict, key: str):
     return f"{improvement * 100:.2f}%"
 
 def print_improvement(before: Project, after: Project):
+    import pandas as pd
+
     before_metrics = before.formation_metrics()
     after_metrics = after.formation_metrics()
     data = {
@@ -23,6 +27,8 @@ def print_improvement(before: Project, after: Project):
     print(df)
 
 def print_member_changes(before: Project, after: Project):
+    import pandas as pd
+
     data = {
         "before": before.assingment_member(),
         "after": after.assingment_member(),
@@ -37,4 +43,15 @@ def print_difference(before: Project, after: Project):
     print_member_changes(before, after)
     print("+++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++")
     print_improvement(before, after)
-    print("=====================================================================")
\ No newline at end of file
+    print("=====================================================================")
+
+def load_difference(before_path: str, after_path: str, members: list[Member], tasks: list[Task], collaboration: CollaborationMatrix = None, instance_hash: str = None) -> tuple:
+    '''load a saved initial formation and a saved solution, paths are relative to data/solution/before and after'''
+    before = Project.load_project(f"data/solution/before/{before_path}", members, tasks, collaboration, instance_hash)
+    after = Project.load_project(f"data/solution/after/{after_path}", members, tasks, collaboration, instance_hash)
+
+    return before, after
+
+def print_saved_difference(before_path: str, after_path: str, members: list[Member], tasks: list[Task], collaboration: CollaborationMatrix = None, instance_hash: str = None):
+    '''print the difference between a saved initial formation and a saved solution'''
+    print_difference(*load_difference(before_path, after_path, members, tasks, collaboration, instance_hash))
@@ -1,7 +1,10 @@
 from models.assignment import Assignment
 import numpy as np
 from models.project import Project
+from problem_instance import ProblemInstance
 from itertools import combinations
+from collections import OrderedDict
+import hashlib
 
 # to maximize - use new-old / old
 # to minimize - use old-new / old
@@ -78,18 +81,21 @@ def check_total_time_imp(assignments: list[Assignment], initial_formation: Proje
 
 
 def check_collaboration_score_imp(assignments: list[Assignment], initial_formation: Project) -> float:
-    new_collab_score = 0
     members = {a.member for a in assignments}
-    member_combinations = combinations(members, 2)
-    n = 0
-    for m_comb in member_combinations:
-        score = m_comb[0].collaboration_scores[m_comb[1]] + m_comb[1].collaboration_scores[m_comb[0]]
-        average = score / 2
-        new_collab_score += average
-        n += 1
-    
-    if n > 0:
-        new_collab_score /= n
+    if initial_formation.collaboration is not None:
+        new_collab_score = initial_formation.collaboration.team_average([m.id for m in members])
+    else:
+        new_collab_score = 0
+        member_combinations = combinations(members, 2)
+        n = 0
+        for m_comb in member_combinations:
+            score = m_comb[0].collaboration_scores[m_comb[1]] + m_comb[1].collaboration_scores[m_comb[0]]
+            average = score / 2
+            new_collab_score += average
+            n += 1
+        
+        if n > 0:
+            new_collab_score /= n
 
     imp = maximize_imp(new_collab_score, initial_formation.collab_score)
     
@@ -119,6 +125,358 @@ def check_fitness(assignments: list[Assignment], initial_formation: Project) ->
 
     return fitness
 
+# objectives in the order they are summed in check_fitness
+OBJECTIVES = (
+    "task compatibility",
+    "total salary",
+    "task load",
+    "estimated total time",
+    "harmony among team member",
+    "team size",
+)
+
+def baseline_vector(initial_formation: Project) -> np.ndarray:
+    '''return the metrics of the initial formation in the order of OBJECTIVES'''
+    return np.array([
+        initial_formation.task_compatility,
+        initial_formation.total_salary,
+        initial_formation.task_load,
+        initial_formation.total_estimated_time,
+        initial_formation.collab_score,
+        initial_formation.team_size,
+    ], dtype=float)
+
+def _improvement_batch(new: np.ndarray, old: float, maximize: bool) -> np.ndarray:
+    '''vectorized version of maximize_imp and minimize_imp'''
+    if old == 0:
+        # same as the scalar version, the new value is returned when old is 0
+        return new.astype(float)
+    if maximize:
+        return (new - old) / abs(old)
+    return (old - new) / abs(old)
+
+def check_fitness_batch(population: np.ndarray, instance: ProblemInstance, baseline: np.ndarray) -> tuple:
+    '''check the fitness of a whole population at once
+
+    population is a (solutions x tasks) array of member indices
+
+    returns a (solutions x objectives) array of improvements and the total fitness of each solution'''
+    population = np.asarray(population, dtype=np.intp)
+    total_solutions, total_tasks = population.shape
+    total_members = instance.total_members
+
+    task_compatibility = instance.compatibility[np.arange(total_tasks), population].sum(axis=1)
+    times = instance.time[population]
+    total_time = times.sum(axis=1)
+
+    # per member task count and processing time of each solution
+    flat = (population + (np.arange(total_solutions) * total_members)[:, None]).ravel()
+    counts = np.bincount(flat, minlength=total_solutions * total_members).reshape(total_solutions, total_members)
+    loads = np.bincount(flat, weights=times.ravel(), minlength=total_solutions * total_members).reshape(total_solutions, total_members)
+    present = counts > 0
+
+    team_size = present.sum(axis=1)
+    # distinct salary values of the team, same as the set used by check_salary_budget_imp
+    rows, cols = np.nonzero(present)
+    salary_present = np.zeros((total_solutions, len(instance.salary_values)), dtype=bool)
+    salary_present[rows, instance.salary_level[cols]] = True
+    total_salary = salary_present @ instance.salary_values
+
+    # load variance among the members in the team
+    average_time = total_time / team_size
+    task_load = (((loads - average_time[:, None]) ** 2) * present).sum(axis=1) / team_size
+
+    # average collaboration score over every pair of members in the team
+    if instance.sparse_collaboration:
+        pair_sum = instance.pair_collaboration.pair_sums(present)
+    else:
+        x = present.astype(float)
+        pair_sum = ((x @ instance.pair_collaboration) * x).sum(axis=1) / 2
+    pairs = team_size * (team_size - 1) / 2
+    collab_score = np.divide(pair_sum, pairs, out=np.zeros_like(pair_sum), where=pairs > 0)
+
+    improvements = np.column_stack([
+        _improvement_batch(task_compatibility, baseline[0], True),
+        _improvement_batch(total_salary, baseline[1], False),
+        _improvement_batch(task_load, baseline[2], False),
+        _improvement_batch(total_time, baseline[3], False),
+        _improvement_batch(collab_score, baseline[4], True),
+        _improvement_batch(team_size, baseline[5], False),
+    ])
+
+    return improvements, improvements.sum(axis=1)
+
+class IncrementalFitness:
+    '''keeps the running totals of one solution so that reassigning a single task can be scored
+    without checking the whole solution again
+
+    the solution is an array of member indices of a ProblemInstance, moves are kept on an undo stack
+    until commit or rollback is called'''
+    def __init__(self, instance: ProblemInstance, baseline: np.ndarray, solution: np.ndarray):
+        self.instance = instance
+        self.baseline = baseline
+
+        # python lists are faster than numpy arrays for single element updates
+        self.compatibility: list = instance.compatibility.tolist()
+        self.time: list = instance.time.tolist()
+        self.salary_values: list = instance.salary_values.tolist()
+        self.salary_level: list = instance.salary_level.tolist()
+        # collaboration rows converted to lists when a member first joins the team
+        self.pair_rows: dict = dict()
+
+        self.reset(solution)
+
+    def reset(self, solution: np.ndarray):
+        '''rebuild the running totals from scratch'''
+        total_members = self.instance.total_members
+        self.solution: list = [int(m) for m in solution]
+        self.counts: list = [0] * total_members
+        self.loads: list = [0.0] * total_members
+        self.salary_counts: list = [0] * len(self.salary_values)
+        self.team: set = set()
+
+        self.task_compatibility = 0.0
+        self.total_time = 0.0
+        self.load_squared = 0.0
+        self.total_salary = 0.0
+        self.pair_score = 0.0
+        self.history: list = list()
+
+        for t, m in enumerate(self.solution):
+            self.task_compatibility += self.compatibility[t][m]
+            self.total_time += self.time[m]
+            self.loads[m] += self.time[m]
+            self.counts[m] += 1
+
+        for m, count in enumerate(self.counts):
+            if count > 0:
+                self._join(m)
+                self.load_squared += self.loads[m] ** 2
+
+    def _member_sum(self, member: int) -> float:
+        '''sum of the pair scores of the member with the rest of the team'''
+        if not self.team:
+            return 0.0
+        if self.instance.sparse_collaboration:
+            return self.instance.pair_collaboration.member_sum(member, list(self.team))
+
+        row = self.pair_rows.get(member)
+        if row is None:
+            row = self.instance.pair_collaboration[member].tolist()
+            self.pair_rows[member] = row
+        return sum([row[m] for m in self.team])
+
+    def _join(self, member: int):
+        '''add a member to the team'''
+        self.pair_score += self._member_sum(member)
+        self.team.add(member)
+
+        level = self.salary_level[member]
+        if self.salary_counts[level] == 0:
+            self.total_salary += self.salary_values[level]
+        self.salary_counts[level] += 1
+
+    def _leave(self, member: int):
+        '''remove a member from the team'''
+        self.team.discard(member)
+        self.pair_score -= self._member_sum(member)
+
+        level = self.salary_level[member]
+        self.salary_counts[level] -= 1
+        if self.salary_counts[level] == 0:
+            self.total_salary -= self.salary_values[level]
+
+    def _reassign(self, task: int, member: int):
+        old_member = self.solution[task]
+        self.solution[task] = member
+
+        self.task_compatibility += self.compatibility[task][member] - self.compatibility[task][old_member]
+        old_time = self.time[old_member]
+        new_time = self.time[member]
+        self.total_time += new_time - old_time
+
+        # remove the task from the old member
+        self.load_squared -= self.loads[old_member] ** 2
+        self.counts[old_member] -= 1
+        if self.counts[old_member] == 0:
+            self.loads[old_member] = 0.0
+            self._leave(old_member)
+        else:
+            self.loads[old_member] -= old_time
+            self.load_squared += self.loads[old_member] ** 2
+
+        # give the task to the new member
+        if self.counts[member] == 0:
+            self._join(member)
+        else:
+            self.load_squared -= self.loads[member] ** 2
+        self.counts[member] += 1
+        self.loads[member] += new_time
+        self.load_squared += self.loads[member] ** 2
+
+    def move(self, task: int, member: int):
+        '''reassign the task to the member, the move is kept until commit or rollback'''
+        old_member = self.solution[task]
+        if old_member != member:
+            self._reassign(task, member)
+            self.history.append((task, old_member))
+
+    def score(self, task: int, member: int) -> float:
+        '''return the fitness of reassigning the task to the member without keeping the change'''
+        old_member = self.solution[task]
+        if old_member == member:
+            return self.fitness
+
+        self._reassign(task, member)
+        fitness = self.fitness
+        self._reassign(task, old_member)
+
+        return fitness
+
+    def commit(self):
+        '''keep every move since the last commit'''
+        self.history.clear()
+
+    def rollback(self):
+        '''undo every move since the last commit'''
+        while self.history:
+            task, member = self.history.pop()
+            self._reassign(task, member)
+
+    def assign(self, solution: np.ndarray):
+        '''move to another solution by reassigning only the tasks that differ'''
+        for t, m in enumerate(solution):
+            if self.solution[t] != m:
+                self._reassign(t, int(m))
+        self.history.clear()
+
+    @property
+    def team_size(self) -> int:
+        return len(self.team)
+
+    @property
+    def task_load(self) -> float:
+        '''variance of the member loads, same as check_task_load'''
+        team_size = len(self.team)
+        average_time = self.total_time / team_size
+        return max(self.load_squared / team_size - average_time ** 2, 0.0)
+
+    @property
+    def collab_score(self) -> float:
+        team_size = len(self.team)
+        pairs = team_size * (team_size - 1) / 2
+        return self.pair_score / pairs if pairs > 0 else 0
+
+    @property
+    def fitness(self) -> float:
+        '''fitness of the current solution, same as check_fitness'''
+        baseline = self.baseline
+        fitness = 0
+        fitness += maximize_imp(self.task_compatibility, baseline[0])
+        fitness += minimize_imp(self.total_salary, baseline[1])
+        fitness += minimize_imp(self.task_load, baseline[2])
+        fitness += minimize_imp(self.total_time, baseline[3])
+        fitness += maximize_imp(self.collab_score, baseline[4])
+        fitness += minimize_imp(self.team_size, baseline[5])
+
+        return fitness
+
+class FitnessCache:
+    '''bounded cache of solution fitness, the least recently used solution is evicted first
+
+    solutions are keyed by a hash of their member vector and the baseline of the initial formation'''
+    def __init__(self, max_size: int = 100000):
+        self.max_size = max_size
+        self.entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def baseline_key(initial_formation: Project) -> bytes:
+        return baseline_vector(initial_formation).tobytes()
+
+    @staticmethod
+    def key(solution: np.ndarray, baseline_key: bytes) -> bytes:
+        '''compact hash of the member vector of the solution'''
+        digest = hashlib.blake2b(np.asarray(solution, dtype=np.intp).tobytes(), digest_size=16)
+        digest.update(baseline_key)
+        return digest.digest()
+
+    def get(self, key: bytes) -> float:
+        '''return the cached fitness, None when the solution is not cached'''
+        fitness = self.entries.get(key)
+        if fitness is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+
+        return fitness
+
+    def put(self, key: bytes, fitness: float):
+        self.entries[key] = fitness
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+def solution_vector(assignments: list[Assignment]) -> np.ndarray:
+    '''member ids of the solution in task order'''
+    return np.fromiter((a.member.id for a in assignments), dtype=np.intp, count=len(assignments))
+
+def evaluate_solutions(solutions: list[list[Assignment]], initial_formation: Project, instance: ProblemInstance = None, cache: FitnessCache = None) -> list[float]:
+    '''check the fitness of every solution
+
+    uses the batch evaluation when the instance is given and skips the solutions found in the cache'''
+    fitness = [None] * len(solutions)
+    if cache is not None:
+        baseline_key = cache.baseline_key(initial_formation)
+        keys = [cache.key(solution_vector(s), baseline_key) for s in solutions]
+        fitness = [cache.get(k) for k in keys]
+
+    missing = [i for i, f in enumerate(fitness) if f is None]
+    if not missing:
+        return fitness
+
+    if instance is not None:
+        population = instance.encode_population([solutions[i] for i in missing])
+        _, batch_fitness = check_fitness_batch(population, instance, baseline_vector(initial_formation))
+        for i, fit in zip(missing, batch_fitness):
+            fitness[i] = float(fit)
+    else:
+        for i in missing:
+            fitness[i] = check_fitness(solutions[i], initial_formation)
+
+    if cache is not None:
+        for i in missing:
+            cache.put(keys[i], fitness[i])
+
+    return fitness
+
+def evaluate_population(population: np.ndarray, instance: ProblemInstance, baseline: np.ndarray, cache: FitnessCache = None) -> np.ndarray:
+    '''check the fitness of every row of the population, skipping the rows found in the cache'''
+    if cache is None:
+        return check_fitness_batch(population, instance, baseline)[1]
+
+    baseline_key = baseline.tobytes()
+    keys = [cache.key(row, baseline_key) for row in population]
+    fitness = np.array([cache.get(k) for k in keys], dtype=float)
+
+    missing = np.flatnonzero(np.isnan(fitness))
+    if len(missing) > 0:
+        _, fitness[missing] = check_fitness_batch(population[missing], instance, baseline)
+        for i in missing:
+            cache.put(keys[i], float(fitness[i]))
+
+    return fitness
+
 def average_fitness(solution_fitness: list[float]) -> float:
     avg = np.mean(solution_fitness)
 
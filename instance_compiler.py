@@ -0,0 +1,192 @@
+'''compiles the staff and task json files into arrays on disk
+
+a compiled instance is a directory of .npy files named after the hash of the json files,
+so it is rebuilt whenever one of the files changes and can be opened with mmap by every worker
+
+the collaboration scores are stored as a dense matrix, or as the CSR arrays of a
+SparseCollaborationMatrix when the staff file uses sparse ratings'''
+from problem_instance import ProblemInstance
+from models.collaboration import SparseCollaborationMatrix
+from setup import STAFF_PATH, TASK_PATH, collaboration_scores, collaboration_ratings, uses_sparse_ratings
+import hashlib, json, os, shutil, tempfile
+import numpy as np
+
+COMPILED_DIR = "data/compiled"
+FORMAT_VERSION = 2
+
+ARRAYS = (
+    "compatibility",
+    "time",
+    "salary",
+    "efficiency",
+    "member_skills",
+    "task_skills",
+)
+DENSE_ARRAYS = ("collaboration", "pair_collaboration")
+SPARSE_ARRAYS = ("pair_indptr", "pair_indices", "pair_data")
+
+def _file_digest(digest, paths: tuple) -> str:
+    for path in paths:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+
+    return digest.hexdigest()
+
+def content_hash(*paths: str) -> str:
+    '''content hash of the source files, saved solutions and checkpoints refer to their instance by it
+
+    it does not depend on FORMAT_VERSION, so a new compiled format keeps the saved solutions valid'''
+    return _file_digest(hashlib.sha256(), paths)
+
+def source_hash(*paths: str) -> str:
+    '''hash of the source files and the compiled format, the key of a compiled instance'''
+    return _file_digest(hashlib.sha256(f"version {FORMAT_VERSION}".encode()), paths)
+
+def skill_matrix(skill_lists: list[list[str]], skill_ids: dict) -> np.ndarray:
+    '''boolean (rows x skills) matrix of the skills of each row'''
+    matrix = np.zeros((len(skill_lists), len(skill_ids)), dtype=bool)
+    for i, skills in enumerate(skill_lists):
+        matrix[i, [skill_ids[s] for s in skills]] = True
+
+    return matrix
+
+def compile_arrays(staff_json: dict, task_json: list, sparse: bool = None) -> tuple:
+    '''build the arrays and the names from the parsed json files, without creating any model object
+
+    the collaboration is sparse by default when the staff json uses sparse ratings'''
+    member_names = list(staff_json)
+    task_names = [t["task"] for t in task_json]
+
+    # skills are numbered in the order setup creates them, staff expertise first
+    skill_ids = dict()
+    for s in member_names:
+        for skill in staff_json[s]["expertise"]:
+            skill_ids.setdefault(skill, len(skill_ids))
+    for t in task_json:
+        for skill in t["skills_required"]:
+            skill_ids.setdefault(skill, len(skill_ids))
+
+    member_skills = skill_matrix([set(staff_json[s]["expertise"]) for s in member_names], skill_ids)
+    task_skills = skill_matrix([set(t["skills_required"]) for t in task_json], skill_ids)
+
+    # compatibility is the shared skills over all the skills of the task and the member
+    overlap = task_skills.astype(np.int64) @ member_skills.T.astype(np.int64)
+    union = task_skills.sum(axis=1)[:, None] + member_skills.sum(axis=1)[None, :] - overlap
+    if (union == 0).any():
+        raise ValueError("a task and a member without any skill cannot be compared")
+    compatibility = overlap / union
+
+    efficiency = np.array([staff_json[s]["efficiency"] for s in member_names], dtype=float)
+    salary = np.array([staff_json[s]["salary"] for s in member_names], dtype=float)
+
+    arrays = {
+        "compatibility": compatibility,
+        "time": 1 / efficiency,
+        "salary": salary,
+        "efficiency": efficiency,
+        # skill bitsets, one bit per skill id
+        "member_skills": np.packbits(member_skills, axis=1),
+        "task_skills": np.packbits(task_skills, axis=1),
+    }
+
+    if sparse is None:
+        sparse = uses_sparse_ratings(staff_json)
+    if sparse:
+        raters, rated, scores = collaboration_ratings(staff_json)
+        pairs = SparseCollaborationMatrix.from_ratings(raters, rated, scores, len(member_names))
+        arrays["pair_indptr"] = pairs.indptr
+        arrays["pair_indices"] = pairs.indices
+        arrays["pair_data"] = pairs.data
+    else:
+        collaboration = collaboration_scores(staff_json)
+        pair_collaboration = (collaboration + collaboration.T) / 2
+        np.fill_diagonal(pair_collaboration, 0)
+        arrays["collaboration"] = collaboration
+        arrays["pair_collaboration"] = pair_collaboration
+
+    names = {
+        "members": member_names,
+        "tasks": task_names,
+        "skills": list(skill_ids),
+        "collaboration": "sparse" if sparse else "dense",
+    }
+
+    return arrays, names
+
+def compile_instance(staff_path: str = STAFF_PATH, task_path: str = TASK_PATH, compiled_dir: str = COMPILED_DIR) -> str:
+    '''compile the json files unless they are already compiled, returns the directory of the instance'''
+    compiled_hash = source_hash(staff_path, task_path)
+    instance_dir = os.path.join(compiled_dir, compiled_hash)
+    if os.path.exists(os.path.join(instance_dir, "meta.json")):
+        return instance_dir
+
+    with open(staff_path, "r") as f:
+        staff_json = json.load(f)
+    with open(task_path, "r") as f:
+        task_json = json.load(f)
+    arrays, names = compile_arrays(staff_json, task_json)
+
+    # written to a temporary directory first so that a reader never sees a half written instance
+    os.makedirs(compiled_dir, exist_ok=True)
+    temp_dir = tempfile.mkdtemp(dir=compiled_dir, prefix=".compiling-")
+    try:
+        for name, array in arrays.items():
+            np.save(os.path.join(temp_dir, f"{name}.npy"), array)
+        meta = {
+            "version": FORMAT_VERSION,
+            "hash": compiled_hash,
+            "sources": [staff_path, task_path],
+            **names,
+        }
+        with open(os.path.join(temp_dir, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        os.replace(temp_dir, instance_dir)
+    except OSError:
+        # another process finished compiling the same instance first
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        if not os.path.exists(os.path.join(instance_dir, "meta.json")):
+            raise
+
+    return instance_dir
+
+def load_compiled(instance_dir: str, mmap: bool = True) -> ProblemInstance:
+    '''open a compiled instance, the arrays are memory mapped unless mmap is False'''
+    with open(os.path.join(instance_dir, "meta.json"), "r") as f:
+        meta = json.load(f)
+    if meta["version"] != FORMAT_VERSION:
+        raise ValueError(f"{instance_dir} was compiled with format version {meta['version']}")
+
+    sparse = meta["collaboration"] == "sparse"
+    arrays = {
+        name: np.load(os.path.join(instance_dir, f"{name}.npy"), mmap_mode="r" if mmap else None)
+        for name in ARRAYS + (SPARSE_ARRAYS if sparse else DENSE_ARRAYS)
+    }
+    if sparse:
+        collaboration = None
+        pair_collaboration = SparseCollaborationMatrix(
+            arrays["pair_indptr"], arrays["pair_indices"], arrays["pair_data"], len(meta["members"])
+        )
+    else:
+        collaboration = arrays["collaboration"]
+        pair_collaboration = arrays["pair_collaboration"]
+
+    instance = ProblemInstance(
+        arrays["compatibility"],
+        arrays["time"],
+        arrays["salary"],
+        collaboration,
+        pair_collaboration=pair_collaboration,
+    )
+    instance.member_names = meta["members"]
+    instance.task_names = meta["tasks"]
+    instance.source_hash = meta["hash"]
+
+    return instance
+
+def load_instance(staff_path: str = STAFF_PATH, task_path: str = TASK_PATH, compiled_dir: str = COMPILED_DIR, mmap: bool = True) -> ProblemInstance:
+    '''compile the json files if needed and open the compiled instance'''
+    return load_compiled(compile_instance(staff_path, task_path, compiled_dir), mmap)
+
+if __name__ == "__main__":
+    print(compile_instance())
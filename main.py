@@ -0,0 +1,120 @@
+'''command line entry point for running a single optimisation
+
+example:
+    python main.py GA --scenario "low compatibility team" --iterations 200 --seed 7 --engine array'''
+import argparse, importlib, sys
+import telemetry
+from checkpoint import Checkpointer
+from profiler import Profiler, format_report
+from stopping import StoppingPolicy
+
+ALGORITHMS = ("GA", "SA", "ACO")
+
+def parse_args(argv: list[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="optimise a team formation with GA, SA or ACO")
+    parser.add_argument("algorithm", choices=ALGORITHMS, help="metaheuristic to run")
+    parser.add_argument("--scenario", default="0", help="index or name of the scenario in setup.projects")
+    parser.add_argument("--proof", action="store_true", help="use the small problem of proof_setup instead of the scenarios")
+    parser.add_argument("--iterations", type=int, default=800, help="maximum number of iterations or generations")
+    parser.add_argument("--time-budget", type=float, default=None, help="stop before this many seconds have passed")
+    parser.add_argument("--max-evaluations", type=int, default=None, help="stop after scoring this many candidate solutions")
+    parser.add_argument("--patience", type=int, default=None, help="stop when the best fitness did not improve for this many iterations")
+    parser.add_argument("--target", type=float, default=None, help="stop when the best fitness reaches this value")
+    parser.add_argument("--seed", type=int, default=None, help="random seed of the run")
+    parser.add_argument("--engine", default=None, help="GA: object or array, ACO: node or matrix")
+    parser.add_argument("--batch", action="store_true", help="use the batch fitness evaluation")
+    parser.add_argument("--cache-size", type=int, default=0, help="size of the fitness cache, 0 to disable")
+    parser.add_argument("--no-visuals", action="store_true", help="do not plot or print the difference at the end")
+    parser.add_argument("--population", type=int, default=None, help="GA: chromosomes in the population, of every island with --islands, ACO: ants")
+    parser.add_argument("--mutation", type=float, default=None, help="GA: mutation rate of every gene")
+    parser.add_argument("--cross-over", type=float, default=None, help="GA: cross over rate")
+    parser.add_argument("--islands", type=int, default=0, help="GA: run this many island populations in parallel processes")
+    parser.add_argument("--migration-interval", type=int, default=10, help="GA islands: generations between migrations")
+    parser.add_argument("--migrants", type=int, default=2, help="GA islands: elite chromosomes sent at each migration")
+    parser.add_argument("--topology", choices=("ring", "full"), default="ring", help="GA islands: where the migrants are sent")
+    parser.add_argument("--checkpoint", default=None, help="write the state of the run to this .npz file every few iterations")
+    parser.add_argument("--checkpoint-every", type=int, default=100, help="iterations between two checkpoints")
+    parser.add_argument("--resume", default=None, help="continue the run saved in this checkpoint")
+    parser.add_argument("--profile", default=None, help="time every phase of the iterations and save the report to this .json file")
+    parser.add_argument("--profile-memory", action="store_true", help="also track the peak memory of every phase with tracemalloc")
+    parser.add_argument(
+        "--telemetry", default="console",
+        help="where the progress goes: none, console, console:<every>, ring:<size>, jsonl:<path> or csv:<path>, comma separated",
+    )
+
+    return parser.parse_args(argv)
+
+def select_problem(args: argparse.Namespace) -> tuple:
+    '''return the members, tasks and initial formation selected by the arguments'''
+    if args.proof:
+        import proof_setup
+        return proof_setup.members, proof_setup.tasks, proof_setup.project
+
+    import setup
+    if args.scenario.isdigit():
+        initial_formation = setup.projects[int(args.scenario)]
+    else:
+        matches = [p for p in setup.projects if p.name == args.scenario]
+        if not matches:
+            names = ", ".join(p.name for p in setup.projects)
+            raise SystemExit(f"unknown scenario {args.scenario!r}, choose one of: {names}")
+        initial_formation = matches[0]
+
+    # the initial formation is saved so that print_previous_output can compare against it
+    initial_formation.save_project(before=True)
+    return setup.members, setup.tasks, initial_formation
+
+def main(argv: list[str] = None):
+    args = parse_args(argv)
+    members, tasks, initial_formation = select_problem(args)
+
+    stopping = StoppingPolicy(
+        max_iteration=args.iterations,
+        time_budget=args.time_budget,
+        max_evaluations=args.max_evaluations,
+        patience=args.patience,
+        target=args.target,
+    )
+    options = dict(use_batch=args.batch, cache_size=args.cache_size, seed=args.seed, stopping=stopping)
+    if args.engine is not None:
+        if args.algorithm == "SA":
+            raise SystemExit("SA has no engine option")
+        options["engine"] = args.engine
+    population_options = {name: value for name, value in (("population", args.population), ("mutation", args.mutation), ("cross_over", args.cross_over)) if value is not None}
+    if population_options and args.algorithm == "SA":
+        raise SystemExit("SA has no population")
+    if ("mutation" in population_options or "cross_over" in population_options) and args.algorithm != "GA":
+        raise SystemExit("--mutation and --cross-over are only available for GA")
+    options.update(population_options)
+    if args.checkpoint is not None:
+        options["checkpointer"] = Checkpointer(args.checkpoint, every=args.checkpoint_every)
+    options["resume"] = args.resume
+    profiler = None
+    if args.profile is not None or args.profile_memory:
+        profiler = options["profiler"] = Profiler(memory=args.profile_memory)
+
+    mh_func = importlib.import_module(args.algorithm)
+    if args.islands:
+        if args.algorithm != "GA":
+            raise SystemExit("islands are only available for GA")
+        if args.checkpoint is not None or args.resume is not None:
+            raise SystemExit("island runs cannot be checkpointed")
+        if profiler is not None:
+            raise SystemExit("island runs cannot be profiled")
+        with telemetry.from_spec(args.telemetry) as sink:
+            mh_func.run_islands(
+                members, tasks, initial_formation, islands=args.islands, migration_interval=args.migration_interval,
+                migrants=args.migrants, topology=args.topology, enable_visuals=not args.no_visuals,
+                seed=args.seed, telemetry=sink, stopping=stopping, **population_options,
+            )
+        return
+
+    with telemetry.from_spec(args.telemetry) as sink:
+        mh_func.run(members, tasks, initial_formation, max_iteration=args.iterations, enable_visuals=not args.no_visuals, telemetry=sink, **options)
+    if profiler is not None:
+        print(format_report(profiler.report()))
+        if args.profile is not None:
+            profiler.save(args.profile)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
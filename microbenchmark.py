@@ -0,0 +1,203 @@
+'''micro-benchmarks of the fitness functions and the models
+
+every case (check_fitness, its six objectives, building the assignments of a solution and building
+a Project with its metrics) is timed on synthetic problems of several tasks x members x team sizes,
+the loop count of a case is calibrated until one repeat takes min_time, the warm-up repeats are
+dropped and the median and interquartile range of the time per call are reported
+
+a report saved as a baseline is compared with a later run, a case regressed when its median is
+more than threshold slower and the interquartile ranges of the two runs do not overlap
+
+example:
+    python microbenchmark.py --save baseline.json
+    python microbenchmark.py --baseline baseline.json --threshold 0.1 --filter check_'''
+import argparse, gc, json, platform, random, sys, time
+import numpy as np
+import fitness_checker
+from models.assignment import Assignment
+from models.collaboration import CollaborationMatrix
+from models.member import Member
+from models.project import Project
+from models.skill import Skill
+from models.task import Task
+
+BENCHMARK_VERSION = 1
+# (tasks, members, team size)
+DEFAULT_SIZES = ((20, 50, 5), (100, 200, 20), (500, 1000, 50))
+REGRESSION = "regression"
+IMPROVEMENT = "improvement"
+UNCHANGED = "unchanged"
+
+def synthetic_problem(total_tasks: int, total_members: int, team_size: int, seed: int = 0) -> tuple:
+    '''(members, tasks, initial formation, solution) of a random problem
+
+    the initial formation and the solution each assign every task to one of team_size members'''
+    rng = random.Random(seed)
+    skills = [Skill(f"skill {i}", id=i) for i in range(max(10, total_tasks // 2))]
+    members = [
+        Member(f"member {i}", rng.uniform(1000, 5000), rng.uniform(0.5, 1.5), set(rng.sample(skills, rng.randint(3, 8))), id=i)
+        for i in range(total_members)
+    ]
+    tasks = [Task(f"task {i}", set(rng.sample(skills, rng.randint(2, 5))), id=i) for i in range(total_tasks)]
+    collaboration = CollaborationMatrix(np.random.default_rng(seed).uniform(0, 5, size=(total_members, total_members)))
+
+    def formation() -> list[Assignment]:
+        team = rng.sample(members, min(team_size, total_members))
+        return [Assignment(t, rng.choice(team)) for t in tasks]
+
+    initial_formation = Project("benchmark", formation(), collaboration)
+    return members, tasks, initial_formation, formation()
+
+def cases(members: list[Member], tasks: list[Task], initial_formation: Project, solution: list[Assignment]) -> dict:
+    '''name -> function without arguments of every benchmark'''
+    pairs = [(a.task, a.member) for a in solution]
+    cases = {"check_fitness": lambda: fitness_checker.check_fitness(solution, initial_formation)}
+    for objective in (
+        fitness_checker.check_task_compatibility_imp,
+        fitness_checker.check_salary_budget_imp,
+        fitness_checker.check_task_load,
+        fitness_checker.check_total_time_imp,
+        fitness_checker.check_collaboration_score_imp,
+        fitness_checker.check_team_size,
+    ):
+        cases[objective.__name__] = lambda objective=objective: objective(solution, initial_formation)
+    cases["Assignment"] = lambda: [Assignment(t, m) for t, m in pairs]
+    cases["Project"] = lambda: Project("benchmark", solution, initial_formation.collaboration).formation_metrics()
+    return cases
+
+def measure(func, repeat: int = 15, warmup: int = 3, min_time: float = 0.01) -> dict:
+    '''median, quartiles and interquartile range of the time per call of func in seconds
+
+    the garbage collector is disabled while timing, like timeit'''
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        if time.perf_counter() - start >= min_time:
+            break
+        loops *= 2
+
+    samples = list()
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for i in range(warmup + repeat):
+            start = time.perf_counter()
+            for _ in range(loops):
+                func()
+            if i >= warmup:
+                samples.append((time.perf_counter() - start) / loops)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    q1, median, q3 = np.percentile(samples, [25, 50, 75])
+    return {"median": float(median), "q1": float(q1), "q3": float(q3), "iqr": float(q3 - q1), "min": min(samples), "loops": loops, "repeat": repeat}
+
+def case_key(name: str, size: tuple) -> str:
+    return f"{name}[{size[0]}x{size[1]}x{size[2]}]"
+
+def run(sizes: list[tuple] = DEFAULT_SIZES, names: list[str] = None, repeat: int = 15, warmup: int = 3, min_time: float = 0.01, seed: int = 0, progress: bool = False) -> dict:
+    '''benchmark every case on every size, names keeps the cases whose name contains one of them'''
+    results = dict()
+    for size in sizes:
+        problem = synthetic_problem(*size, seed=seed)
+        for name, func in cases(*problem).items():
+            if names and not any(n in name for n in names):
+                continue
+            results[case_key(name, size)] = measure(func, repeat, warmup, min_time)
+            if progress:
+                print(format_result(case_key(name, size), results[case_key(name, size)]), flush=True)
+
+    return {
+        "version": BENCHMARK_VERSION,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "results": results,
+    }
+
+def save(report: dict, path: str):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+def load(path: str) -> dict:
+    with open(path, "r") as f:
+        report = json.load(f)
+    if report["version"] != BENCHMARK_VERSION:
+        raise ValueError(f"{path} was saved with benchmark version {report['version']}")
+    return report
+
+def compare(baseline: dict, report: dict, threshold: float = 0.1) -> dict:
+    '''case -> (status, median ratio) of every case measured in both reports
+
+    a case regressed when its median is more than threshold slower and its first quartile is above
+    the third quartile of the baseline, it improved in the opposite case'''
+    comparison = dict()
+    for key, result in report["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            continue
+        ratio = result["median"] / base["median"]
+        if ratio > 1 + threshold and result["q1"] > base["q3"]:
+            status = REGRESSION
+        elif ratio < 1 / (1 + threshold) and result["q3"] < base["q1"]:
+            status = IMPROVEMENT
+        else:
+            status = UNCHANGED
+        comparison[key] = (status, ratio)
+
+    return comparison
+
+def _duration(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3f} {unit}"
+    return f"{seconds / 1e-9:.1f} ns"
+
+def format_result(key: str, result: dict) -> str:
+    return f"{key:<52} median {_duration(result['median']):>11}  iqr {_duration(result['iqr']):>11}  ({result['loops']} loops x {result['repeat']})"
+
+def format_comparison(baseline: dict, report: dict, comparison: dict) -> str:
+    lines = list()
+    for key, (status, ratio) in comparison.items():
+        before, after = baseline["results"][key]["median"], report["results"][key]["median"]
+        lines.append(f"{key:<52} {_duration(before):>11} -> {_duration(after):>11}  x{ratio:.2f}  {status}")
+    return "\n".join(lines)
+
+def parse_sizes(text: str) -> list[tuple]:
+    '''"20x50x5,100x200x20" -> [(20, 50, 5), (100, 200, 20)]'''
+    return [tuple(int(x) for x in size.split("x")) for size in text.split(",")]
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="micro-benchmarks of the fitness functions and the models")
+    parser.add_argument("--sizes", type=parse_sizes, default=DEFAULT_SIZES, help="tasks x members x team size, comma separated, eg 20x50x5,100x200x20")
+    parser.add_argument("--filter", nargs="*", default=None, help="only the cases whose name contains one of these")
+    parser.add_argument("--repeat", type=int, default=15, help="timed repeats of every case")
+    parser.add_argument("--warmup", type=int, default=3, help="repeats run before the timed ones")
+    parser.add_argument("--min-time", type=float, default=0.01, help="seconds one repeat takes at least")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic problems")
+    parser.add_argument("--save", default=None, help="save the results to this .json file, eg as a baseline")
+    parser.add_argument("--baseline", default=None, help="compare the results with this saved .json file")
+    parser.add_argument("--threshold", type=float, default=0.1, help="slowdown of the median that counts as a regression")
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes, args.filter, args.repeat, args.warmup, args.min_time, args.seed, progress=True)
+    if args.save is not None:
+        save(report, args.save)
+    if args.baseline is None:
+        return 0
+
+    baseline = load(args.baseline)
+    comparison = compare(baseline, report, args.threshold)
+    print(format_comparison(baseline, report, comparison))
+    regressions = [key for key, (status, _) in comparison.items() if status == REGRESSION]
+    if regressions:
+        print(f"{len(regressions)} regressions above {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
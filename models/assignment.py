@@ -2,16 +2,76 @@ from models.task import Task
 from models.member import Member
 
 class Assignment:
-    def __init__(self, task: Task, member: Member):
+    '''a member assigned to a task
+
+    the fields are not changed after creation, so one assignment can be shared by every solution'''
+    __slots__ = ("task", "member", "compatibility", "estimated_time")
+
+    def __init__(self, task: Task, member: Member, compatibility: float = None, estimated_time: float = None):
         self.task: Task = task
         self.member: Member = member
-        
-        self.compatibility:float = self.check_compatibility()
-        self.estimated_time:float = 1 / self.member.efficiency
+
+        # precomputed values are passed in by AssignmentPool
+        self.compatibility:float = self.check_compatibility() if compatibility is None else compatibility
+        self.estimated_time:float = 1 / self.member.efficiency if estimated_time is None else estimated_time
 
     def check_compatibility(self) -> float:
         total_task = len(self.task.skills | self.member.skill_set)
         overlap = len(self.task.skills & self.member.skill_set)
         compatibility = overlap / total_task
 
-        return compatibility
\ No newline at end of file
+        return compatibility
+
+class AssignmentPool:
+    '''shared pool of every (task, member) assignment of a problem
+
+    each assignment is created once and reused by the algorithms instead of creating a new one,
+    the compatibility is computed from bitsets of the skill ids'''
+    def __init__(self, tasks: list[Task], members: list[Member], assignment_type: type = Assignment):
+        self.tasks = tasks
+        self.members = members
+        self.task_index: dict = {t: i for i, t in enumerate(tasks)}
+        self.member_index: dict = {m: i for i, m in enumerate(members)}
+
+        # give every skill a bit position
+        self.skill_bits: dict = dict()
+        task_masks = [self.skill_mask(t.skills) for t in tasks]
+        member_masks = [self.skill_mask(m.skill_set) for m in members]
+        estimated_times = [1 / m.efficiency for m in members]
+
+        self.assignments: tuple = tuple(
+            tuple(
+                assignment_type(
+                    t, m,
+                    compatibility=(task_mask & member_mask).bit_count() / (task_mask | member_mask).bit_count(),
+                    estimated_time=estimated_time,
+                )
+                for m, member_mask, estimated_time in zip(members, member_masks, estimated_times)
+            )
+            for t, task_mask in zip(tasks, task_masks)
+        )
+
+    def skill_mask(self, skills: set) -> int:
+        '''convert a set of skills into a bitset of skill ids'''
+        mask = 0
+        for s in skills:
+            bit = self.skill_bits.get(s)
+            if bit is None:
+                bit = len(self.skill_bits)
+                self.skill_bits[s] = bit
+            mask |= 1 << bit
+
+        return mask
+
+    def get(self, task: Task, member: Member) -> Assignment:
+        '''get the shared assignment of the member to the task'''
+        return self.assignments[self.task_index[task]][self.member_index[member]]
+
+    def __getitem__(self, index: tuple) -> Assignment:
+        '''get the shared assignment by (task index, member index)'''
+        return self.assignments[index[0]][index[1]]
+
+    def __iter__(self):
+        '''iterate over every assignment, task by task'''
+        for row in self.assignments:
+            yield from row
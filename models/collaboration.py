@@ -0,0 +1,239 @@
+import numpy as np
+
+class CollaborationMatrix:
+    '''peer review scores of every member, indexed by member id'''
+    def __init__(self, scores: np.ndarray):
+        # row i is the scores given by member i
+        self.scores: np.ndarray = np.asarray(scores, dtype=float)
+        # a pair is scored by the average of the two scores they gave each other
+        self.pair_scores: np.ndarray = (self.scores + self.scores.T) / 2
+        np.fill_diagonal(self.pair_scores, 0)
+
+    @classmethod
+    def from_members(cls, members: list) -> 'CollaborationMatrix':
+        '''build the matrix from the collaboration scores of each member'''
+        scores = np.zeros((len(members), len(members)), dtype=float)
+        for m in members:
+            for other_member, score in m.collaboration_scores.items():
+                scores[m.id, other_member.id] = score
+
+        return cls(scores)
+
+    def pair_sum(self, ids: list[int]) -> float:
+        '''sum of the pair scores of every pair in the team'''
+        ids = np.asarray(ids, dtype=np.intp)
+        return float(self.pair_scores[np.ix_(ids, ids)].sum()) / 2
+
+    def pair_sums(self, present: np.ndarray) -> np.ndarray:
+        '''pair_sum of many teams at once, present is a (teams x members) boolean matrix
+
+        the stored pairs of every member of every team are gathered in one pass, so the cost grows
+        with the team sizes and the stored pairs of their members, not with the members squared'''
+        present = np.asarray(present, dtype=bool)
+        teams, ids = np.nonzero(present)
+        starts = self.indptr[ids]
+        lengths = self.indptr[ids + 1] - starts
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        positions = offsets + np.arange(lengths.sum())
+        entry_team = np.repeat(teams, lengths)
+        in_team = present[entry_team, self.indices[positions]]
+
+        # every stored pair is seen from both of its members
+        stored_sum = np.bincount(entry_team, weights=np.where(in_team, self.data[positions], 0), minlength=len(present)) / 2
+        stored_pairs = np.bincount(entry_team, weights=in_team, minlength=len(present)) / 2
+        team_size = present.sum(axis=1)
+        pairs = team_size * (team_size - 1) / 2
+
+        return stored_sum + self.default * (pairs - stored_pairs)
+
+    def team_average(self, ids: list[int]) -> float:
+        '''average pair score of the team'''
+        pairs = len(ids) * (len(ids) - 1) / 2
+        if pairs == 0:
+            return 0
+        return self.pair_sum(ids) / pairs
+
+    def member_sum(self, member_id: int, ids: list[int]) -> float:
+        '''sum of the pair scores of the member with each of the other members'''
+        return float(self.pair_scores[member_id, ids].sum())
+
+    def team(self, ids: list[int] = ()) -> 'CollaborationTeam':
+        '''create a team that keeps its score up to date when members are added or removed'''
+        return CollaborationTeam(self, ids)
+
+class SparseCollaborationMatrix:
+    '''peer review scores stored as a symmetric sparse (CSR) matrix of pair scores, indexed by member id
+
+    only the pairs where at least one member rated the other are stored, a missing rating counts as
+    the default score, so a pair rated by a single member scores (score + default) / 2 and a pair
+    that nobody rated scores the default'''
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, data: np.ndarray, size: int, default: float = 0):
+        # the pairs of member i are indices[indptr[i]:indptr[i + 1]], sorted by member id
+        self.indptr: np.ndarray = indptr
+        self.indices: np.ndarray = indices
+        self.data: np.ndarray = data
+        self.size = size
+        self.default = default
+
+    @classmethod
+    def from_ratings(cls, raters: np.ndarray, rated: np.ndarray, scores: np.ndarray, size: int, default: float = 0) -> 'SparseCollaborationMatrix':
+        '''build the matrix from the score given by each rater to each rated member'''
+        raters = np.asarray(raters, dtype=np.int64)
+        rated = np.asarray(rated, dtype=np.int64)
+        scores = np.asarray(scores, dtype=float)
+        keep = raters != rated
+        raters, rated, scores = raters[keep], rated[keep], scores[keep]
+
+        # both ratings of a pair share the key of the unordered pair
+        low = np.minimum(raters, rated)
+        high = np.maximum(raters, rated)
+        keys, pair = np.unique(low * size + high, return_inverse=True)
+        total = np.bincount(pair, weights=scores, minlength=len(keys))
+        count = np.bincount(pair, minlength=len(keys))
+        values = (total + default * (2 - count)) / 2
+
+        return cls.from_pairs(keys // size, keys % size, values, size, default)
+
+    @classmethod
+    def from_pairs(cls, low: np.ndarray, high: np.ndarray, values: np.ndarray, size: int, default: float = 0) -> 'SparseCollaborationMatrix':
+        '''build the matrix from the score of each stored pair, every pair is given once'''
+        low = np.asarray(low, dtype=np.int64)
+        high = np.asarray(high, dtype=np.int64)
+        values = np.asarray(values, dtype=float)
+        rows = np.concatenate([low, high])
+        cols = np.concatenate([high, low])
+        values = np.concatenate([values, values])
+        order = np.lexsort((cols, rows))
+
+        indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=size), out=indptr[1:])
+
+        return cls(indptr, cols[order], values[order], size, default)
+
+    @classmethod
+    def from_dense(cls, scores: np.ndarray, default: float = 0) -> 'SparseCollaborationMatrix':
+        '''build the matrix from a dense score matrix, a score of 0 means the pair was not rated'''
+        raters, rated = np.nonzero(scores)
+        return cls.from_ratings(raters, rated, np.asarray(scores)[raters, rated], len(scores), default)
+
+    @property
+    def stored_pairs(self) -> int:
+        return len(self.data) // 2
+
+    def _team_entries(self, ids: np.ndarray) -> tuple:
+        '''the stored pair scores of the given rows, and whether the other member is in ids'''
+        starts = self.indptr[ids]
+        lengths = self.indptr[ids + 1] - starts
+        # positions of every stored entry of the rows
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        positions = offsets + np.arange(lengths.sum())
+        others = self.indices[positions]
+
+        team = np.sort(ids)
+        found = np.searchsorted(team, others)
+        found = np.minimum(found, len(team) - 1)
+        return self.data[positions], team[found] == others
+
+    def pair_sum(self, ids: list[int]) -> float:
+        '''sum of the pair scores of every pair in the team'''
+        ids = np.unique(np.asarray(ids, dtype=np.int64))
+        if len(ids) < 2:
+            return 0.0
+        values, in_team = self._team_entries(ids)
+        # every stored pair is seen from both of its members
+        stored_sum = values[in_team].sum() / 2
+        stored_pairs = in_team.sum() / 2
+        pairs = len(ids) * (len(ids) - 1) / 2
+
+        return float(stored_sum + self.default * (pairs - stored_pairs))
+
+    def pair_sums(self, present: np.ndarray) -> np.ndarray:
+        '''pair_sum of many teams at once, present is a (teams x members) boolean matrix
+
+        the stored pairs of every member of every team are gathered in one pass, so the cost grows
+        with the team sizes and the stored pairs of their members, not with the members squared'''
+        present = np.asarray(present, dtype=bool)
+        teams, ids = np.nonzero(present)
+        starts = self.indptr[ids]
+        lengths = self.indptr[ids + 1] - starts
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        positions = offsets + np.arange(lengths.sum())
+        entry_team = np.repeat(teams, lengths)
+        in_team = present[entry_team, self.indices[positions]]
+
+        # every stored pair is seen from both of its members
+        stored_sum = np.bincount(entry_team, weights=np.where(in_team, self.data[positions], 0), minlength=len(present)) / 2
+        stored_pairs = np.bincount(entry_team, weights=in_team, minlength=len(present)) / 2
+        team_size = present.sum(axis=1)
+        pairs = team_size * (team_size - 1) / 2
+
+        return stored_sum + self.default * (pairs - stored_pairs)
+
+    def team_average(self, ids: list[int]) -> float:
+        '''average pair score of the team'''
+        pairs = len(ids) * (len(ids) - 1) / 2
+        if pairs == 0:
+            return 0
+        return self.pair_sum(ids) / pairs
+
+    def member_sum(self, member_id: int, ids: list[int]) -> float:
+        '''sum of the pair scores of the member with each of the other members'''
+        ids = np.asarray(ids, dtype=np.int64)
+        ids = ids[ids != member_id]
+        if len(ids) == 0:
+            return 0.0
+        row = slice(self.indptr[member_id], self.indptr[member_id + 1])
+        columns = self.indices[row]
+        found = np.minimum(np.searchsorted(columns, ids), max(len(columns) - 1, 0))
+        stored = (columns[found] == ids) if len(columns) > 0 else np.zeros(len(ids), dtype=bool)
+        values = self.data[row][found] if len(columns) > 0 else np.zeros(len(ids))
+
+        return float(np.where(stored, values, self.default).sum())
+
+    def subset(self, ids: list[int]) -> 'SparseCollaborationMatrix':
+        '''matrix of the given members only, renumbered by their position in ids'''
+        ids = np.asarray(ids, dtype=np.int64)
+        new_id = np.full(self.size, -1, dtype=np.int64)
+        new_id[ids] = np.arange(len(ids))
+
+        rows = np.repeat(np.arange(self.size), np.diff(self.indptr))
+        keep = (new_id[rows] >= 0) & (new_id[self.indices] >= 0)
+        rows, cols, values = new_id[rows[keep]], new_id[self.indices[keep]], self.data[keep]
+        order = np.lexsort((cols, rows))
+
+        indptr = np.zeros(len(ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(ids)), out=indptr[1:])
+
+        return SparseCollaborationMatrix(indptr, cols[order], values[order], len(ids), self.default)
+
+    def team(self, ids: list[int] = ()) -> 'CollaborationTeam':
+        '''create a team that keeps its score up to date when members are added or removed'''
+        return CollaborationTeam(self, ids)
+
+class CollaborationTeam:
+    '''running collaboration score of a team'''
+    def __init__(self, matrix: 'CollaborationMatrix | SparseCollaborationMatrix', ids: list[int] = ()):
+        self.matrix = matrix
+        self.members: list[int] = list()
+        self.pair_sum = 0.0
+        for i in ids:
+            self.add(i)
+
+    def add(self, member_id: int):
+        '''add a member, only the pairs with the new member are summed'''
+        if self.members:
+            self.pair_sum += self.matrix.member_sum(member_id, self.members)
+        self.members.append(member_id)
+
+    def remove(self, member_id: int):
+        '''remove a member, only the pairs with the removed member are subtracted'''
+        self.members.remove(member_id)
+        if self.members:
+            self.pair_sum -= self.matrix.member_sum(member_id, self.members)
+
+    @property
+    def average(self) -> float:
+        pairs = len(self.members) * (len(self.members) - 1) / 2
+        if pairs == 0:
+            return 0
+        return self.pair_sum / pairs
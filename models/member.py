@@ -1,7 +1,11 @@
 class Member:
     '''represents a team member'''
-    def __init__(self, name: str, salary: float, efficiency: float, skill_set:set = set()):
+    __slots__ = ("name", "id", "skill_set", "salary", "efficiency", "collaboration_scores")
+
+    def __init__(self, name: str, salary: float, efficiency: float, skill_set:set = set(), id: int = None):
         self.name = name
+        # position of the member in the collaboration matrix
+        self.id = id
         self.skill_set = skill_set
         self.salary = salary
         self.efficiency = efficiency
@@ -1,20 +1,55 @@
 from models.assignment import Assignment
 from models.task import Task
-import os, pickle
+from models.member import Member
+from models.collaboration import CollaborationMatrix
+import json, os, pickle, tempfile
 from itertools import combinations
+from functools import cached_property
+
+SOLUTION_VERSION = 1
 
 class Project:
-    def __init__(self, name: str, assignments: list[Assignment]):
+    def __init__(self, name: str, assignments: list[Assignment], collaboration: CollaborationMatrix = None, instance_hash: str = None):
         self.name = name
         self.assignments: list[Assignment] = assignments
-        
-        # various project stats
-        self.total_salary = self.get_total_salary()
-        self.task_compatility = self.get_task_compatibility()
-        self.task_load = self.get_task_load()
-        self.total_estimated_time = self.get_total_estimated_time()
-        self.collab_score = self.get_collaboration_score()
-        self.team_size = self.get_team_size()
+        # the collaboration scores of the members, the members own scores are used when not given
+        self.collaboration: CollaborationMatrix = collaboration
+        # hash of the staff and task files the project was built from, saved with the solution
+        self.instance_hash = instance_hash
+
+    # various project stats, each one is only computed when it is first read
+    @cached_property
+    def total_salary(self) -> float:
+        return self.get_total_salary()
+
+    @cached_property
+    def task_compatility(self) -> float:
+        return self.get_task_compatibility()
+
+    @cached_property
+    def task_load(self) -> float:
+        return self.get_task_load()
+
+    @cached_property
+    def total_estimated_time(self) -> float:
+        return self.get_total_estimated_time()
+
+    @cached_property
+    def collab_score(self) -> float:
+        return self.get_collaboration_score()
+
+    @cached_property
+    def team_size(self) -> int:
+        return self.get_team_size()
+
+    @cached_property
+    def member_loads(self) -> dict:
+        '''total estimated time of each member, grouped in a single pass over the assignments'''
+        loads = dict()
+        for a in self.assignments:
+            loads[a.member] = loads.get(a.member, 0) + a.estimated_time
+
+        return loads
     
     def formation_metrics(self) -> dict:
         return {
@@ -36,7 +71,7 @@ class Project:
     
     def get_total_salary(self) -> float:
         '''get the total salary of this project'''
-        total_salary = sum({a.member.salary for a in self.assignments})
+        total_salary = sum({m.salary for m in self.member_loads})
         return total_salary
     
     def get_task_compatibility(self) -> float:
@@ -47,18 +82,17 @@ class Project:
     def get_task_load(self) -> float:
         '''get the average task load of this project'''
         # the average  load for each member in this assignments 
-        members = set(a.member for a in self.assignments)
+        member_loads = self.member_loads
         total_time = sum(a.estimated_time for a in self.assignments)
-        average_time = total_time / len(members)
+        average_time = total_time / len(member_loads)
 
         diffs = list()
         # calculating load variance
-        for m in members:
-            processing_time = sum([a.estimated_time for a in self.assignments if a.member == m])
+        for processing_time in member_loads.values():
             diff = processing_time - average_time
             diffs.append(diff ** 2)
 
-        diff_squared = sum(diffs) / len(members)
+        diff_squared = sum(diffs) / len(member_loads)
 
         return diff_squared
     
@@ -70,8 +104,11 @@ class Project:
 
     def get_collaboration_score(self) -> float:
         '''get the average collaboration score for this project'''
+        if self.collaboration is not None:
+            return self.collaboration.team_average([m.id for m in self.member_loads])
+
         collab_score = 0
-        members = {a.member for a in self.assignments}
+        members = self.member_loads.keys()
         member_combinations = combinations(members, 2)
         n = 0
         for m_comb in member_combinations:
@@ -87,23 +124,73 @@ class Project:
 
     def get_team_size(self) -> int:
         '''get the team size for this project'''
-        members = set(a.member for a in self.assignments)
-        team_size = len(members)
+        team_size = len(self.member_loads)
 
         return team_size
     
-    def save_project(self, before: bool = False, mh_name: str = ""):
-        '''save the project object into a pickle file'''
+    def to_record(self, algorithm: str = None, params: dict = None, seed: int = None) -> dict:
+        '''compact record of the solution
+
+        only the member id of each task is kept, the task ids are left out when they are the task positions'''
+        tasks = [a.task.id for a in self.assignments]
+        record = {
+            "version": SOLUTION_VERSION,
+            "name": self.name,
+            "instance": self.instance_hash,
+            "algorithm": algorithm,
+            "params": params or dict(),
+            "seed": seed,
+            "members": [a.member.id for a in self.assignments],
+            "metrics": self.formation_metrics(),
+        }
+        if tasks != list(range(len(tasks))):
+            record["tasks"] = tasks
+
+        return record
+
+    @classmethod
+    def from_record(cls, record: dict, members: list[Member], tasks: list[Task], collaboration: CollaborationMatrix = None, instance_hash: str = None) -> 'Project':
+        '''rebuild the project of a saved record against the loaded members and tasks'''
+        if record["version"] != SOLUTION_VERSION:
+            raise ValueError(f"solution {record['name']!r} was saved with format version {record['version']}")
+        if instance_hash is not None and record["instance"] is not None and record["instance"] != instance_hash:
+            raise ValueError(f"solution {record['name']!r} was saved for another instance ({record['instance']})")
+
+        member_by_id = {m.id: m for m in members}
+        task_by_id = {t.id: t for t in tasks}
+        task_ids = record.get("tasks", range(len(record["members"])))
+        assignments = [Assignment(task_by_id[t], member_by_id[m]) for t, m in zip(task_ids, record["members"])]
+
+        return cls(record["name"], assignments, collaboration, record["instance"])
+
+    @classmethod
+    def load_project(cls, path: str, members: list[Member], tasks: list[Task], collaboration: CollaborationMatrix = None, instance_hash: str = None) -> 'Project':
+        '''load a saved solution, projects pickled by older versions are still read'''
+        if path.endswith(".pickle"):
+            with open(path, "rb") as f:
+                return pickle.load(f)
+
+        with open(path, "r") as f:
+            record = json.load(f)
+        return cls.from_record(record, members, tasks, collaboration, instance_hash)
+
+    def save_project(self, before: bool = False, mh_name: str = "", params: dict = None, seed: int = None) -> dict:
+        '''save the solution as a compact json record, returns the record
+
+        the initial formation is saved under before, the solution of a metaheuristic under after'''
         if before:
             save_path = f"data/solution/before/{self.name}"
-            if not(os.path.exists(save_path)):
-                os.makedirs(save_path)
-            with open(f"{save_path}/{self.name}.pickle", "wb") as f:
-                pickle.dump(self, f)
-
+            file_name = self.name
         else:
             save_path = f"data/solution/after/{self.name}"
-            if not(os.path.exists(save_path)):
-                os.makedirs(save_path)
-            with open(f"{save_path}/{mh_name}.pickle", "wb") as f:
-                pickle.dump(self, f)
+            file_name = mh_name
+        os.makedirs(save_path, exist_ok=True)
+
+        record = self.to_record(mh_name or None, params, seed)
+        # written to a temporary file first so that parallel runs never leave a half written solution
+        fd, temp_path = tempfile.mkstemp(dir=save_path, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(record, f)
+        os.replace(temp_path, f"{save_path}/{file_name}.json")
+
+        return record
@@ -1,3 +1,7 @@
 class Skill:
-    def __init__(self, name: str):
-        self.name = name
\ No newline at end of file
+    __slots__ = ("name", "id")
+
+    def __init__(self, name: str, id: int = None):
+        self.name = name
+        # position of the skill in the skill list
+        self.id = id
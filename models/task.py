@@ -1,4 +1,8 @@
 class Task:
-    def __init__(self, name: str, skills: set):
+    __slots__ = ("name", "skills", "id")
+
+    def __init__(self, name: str, skills: set, id: int = None):
         self.name = name
-        self.skills = skills
\ No newline at end of file
+        self.skills = skills
+        # position of the task in the task list
+        self.id = id
@@ -1,34 +1,106 @@
-import psutil, time, csv, os, random
+import time, csv, os, random, importlib, re, threading
 import GA, SA, ACO
+import fitness_checker
 import setup, proof_setup
 from models.project import Project
+from problem_instance import ProblemInstance
+from telemetry import Telemetry, NullTelemetry
+from stopping import StoppingPolicy
+from instance_compiler import load_instance
+from shared_instance import SharedInstance, SharedInstanceHandle, attach
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import numpy as np
 
-import matplotlib.pyplot as plt
-import pandas as pd
+# algorithms whose run takes a population size, the scaling sweep can vary it
+POPULATION_ALGORITHMS = ("GA", "ACO")
+
+# psutil, matplotlib and pandas are imported by the functions that need them
+
+def reset_peak_memory() -> bool:
+    '''reset the peak resident memory (VmHWM) of this process to its current memory, only possible on linux'''
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def kernel_peak_memory() -> int:
+    '''peak resident memory of this process in bytes as kept by the kernel, None when it is not available'''
+    try:
+        with open("/proc/self/status", "r") as f:
+            match = re.search(r"VmHWM:\s+(\d+) kB", f.read())
+    except OSError:
+        return None
+    return int(match.group(1)) * 1024 if match else None
+
+class PeakMemory:
+    '''peak resident memory of this process while the block runs, in KB above the memory at its start
+
+    the rss of a process only tells how much memory it holds at the end, memory that was freed
+    again (or reused from an earlier run) makes the difference zero or negative, so the peak is
+    measured instead: on linux the kernel peak is reset when the block starts, which also drops the
+    peak inherited from the parent or an earlier job, elsewhere the rss is sampled every interval'''
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        # KB above the memory at the start of the block
+        self.peak = 0.0
+        # KB still held at the end of the block
+        self.retained = 0.0
+        self._sampled = 0
+        self._done: threading.Event = None
+        self._thread: threading.Thread = None
+
+    def _sample(self, process):
+        while not self._done.wait(self.interval):
+            self._sampled = max(self._sampled, process.memory_info().rss)
+
+    def __enter__(self) -> 'PeakMemory':
+        import psutil
+
+        self.process = psutil.Process()
+        self.start = self.process.memory_info().rss
+        self._sampled = self.start
+        if not reset_peak_memory():
+            self._done = threading.Event()
+            self._thread = threading.Thread(target=self._sample, args=(self.process,), daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        end = self.process.memory_info().rss
+        if self._thread is not None:
+            self._done.set()
+            self._thread.join()
+            peak = self._sampled
+        else:
+            peak = kernel_peak_memory() or end
+        self.peak = max(max(peak, end) - self.start, 0) / 1024
+        self.retained = (end - self.start) / 1024
 
 def monitor_resources(func, *args, **kwargs):
-    """Monitors CPU and RAM usage while running a function."""
+    """Monitors CPU and RAM usage while running a function.
+
+    the memory usage is the peak memory above the memory at the start (KB), see PeakMemory"""
+    import psutil
+
     process = psutil.Process()
     start_time = time.time()
     
-    # Measure initial memory usage
-    initial_memory = process.memory_info().rss 
-    
     # Start measuring CPU usage
     initial_cpu_times = process.cpu_times()
     
     # Execute the algorithm
-    result = func(*args, **kwargs)
+    with PeakMemory() as memory:
+        result = func(*args, **kwargs)
     
     # Measure final CPU usage
     final_cpu_times = process.cpu_times()
     cpu_time_used = sum([final_cpu_times.user - initial_cpu_times.user,
                          final_cpu_times.system - initial_cpu_times.system])
     
-    # Measure final memory usage
-    final_memory = process.memory_info().rss
-    memory_usage = final_memory - initial_memory
-    memory_usage /= 1024
+    memory_usage = memory.peak
     
     # Total execution time
     elapsed_time = time.time() - start_time
@@ -57,18 +129,13 @@ def save_to_csv(mh_name: str, test_case: str, pc_resources:list, fitness:list):
         for row in fitness:
             writer.writerow(row)
 
-def benchmark(mh_func: GA, initial_formation: Project, mh_name: str, random_seeds: list[int]):
-    pc_resources = list()
-    best_fitness = list()
-    average_fitness = list()
+def save_benchmark(mh_name: str, test_case: str, results: list[tuple]):
+    '''average the fitness history of every run and save the results to csv
 
-    for seed, i in enumerate(random_seeds):
-        random.seed(random_seeds[seed])
-        results = monitor_resources(lambda: mh_func.run(setup.members, setup.tasks, initial_formation, max_iteration=800, enable_visuals=False))
-        pc_resources.append((results[0], results[1], results[2]))
-
-        average_fitness.append(results[3])
-        best_fitness.append(results[4])
+    each result is (cpu time, memory usage, elapsed time, average fitness, best fitness)'''
+    pc_resources = [(r[0], r[1], r[2]) for r in results]
+    average_fitness = [r[3] for r in results]
+    best_fitness = [r[4] for r in results]
 
     # calculating the average of i-th iteration best
     transposed = zip(*best_fitness)
@@ -79,7 +146,317 @@ def benchmark(mh_func: GA, initial_formation: Project, mh_name: str, random_seed
     avg_fitness = [sum(group) / len(group) for group in transposed]
     
     fitness = list(zip(avg_best, avg_fitness))
-    save_to_csv(mh_name, initial_formation.name, pc_resources, fitness)
+    save_to_csv(mh_name, test_case, pc_resources, fitness)
+
+def benchmark(mh_func: GA, initial_formation: Project, mh_name: str, random_seeds: list[int]):
+    results = list()
+
+    for seed, i in enumerate(random_seeds):
+        random.seed(random_seeds[seed])
+        results.append(monitor_resources(lambda: mh_func.run(setup.members, setup.tasks, initial_formation, max_iteration=800, enable_visuals=False, seed=random_seeds[seed], telemetry=NullTelemetry())))
+
+    save_benchmark(mh_name, initial_formation.name, results)
+
+def run_benchmark_job(mh_name: str, scenario: int, seed: int, max_iteration: int = 800, sources: tuple = None, options: dict = None) -> tuple:
+    '''run a single (algorithm, scenario, seed) job, meant to run in its own process
+
+    the data is loaded from the sources (staff path, task path) when given, options are passed to run,
+    returns the cpu time, peak memory above the memory at the start of the job (KB, see PeakMemory),
+    elapsed time, the average fitness and the best fitness of each iteration'''
+    mh_func = importlib.import_module(mh_name)
+    if sources is not None:
+        setup.load(*sources)
+    # the random state belongs to this process only
+    random.seed(seed)
+    np.random.seed(seed)
+
+    start_cpu = time.process_time()
+    start_time = time.perf_counter()
+
+    with PeakMemory() as memory:
+        average_fit, best_fit = mh_func.run(
+            setup.members, setup.tasks, setup.projects[scenario], max_iteration=max_iteration, enable_visuals=False,
+            seed=seed, telemetry=NullTelemetry(), **(options or dict()),
+        )
+
+    cpu_time_used = time.process_time() - start_cpu
+    elapsed_time = time.perf_counter() - start_time
+
+    return cpu_time_used, memory.peak, elapsed_time, average_fit, best_fit
+
+def run_shared_job(mh_name: str, handle: SharedInstanceHandle, baseline: np.ndarray, start: np.ndarray, seed: int, max_iteration: int = 800, options: dict = None) -> tuple:
+    '''run_benchmark_job on the instance arrays attached from shared memory
+
+    the job only gets the handle, the baseline vector of the scenario and its encoded initial formation,
+    no member, task or project is built, the array engines are run (see GA.run_arrays) and the
+    engine and evaluation options of run are ignored, returns the same values as run_benchmark_job'''
+    mh_func = importlib.import_module(mh_name)
+    instance = attach(handle)
+    options = {key: value for key, value in (options or dict()).items() if key not in ("engine", "use_batch", "use_delta")}
+    random.seed(seed)
+    np.random.seed(seed)
+
+    start_cpu = time.process_time()
+    start_time = time.perf_counter()
+
+    with PeakMemory() as memory:
+        average_fit, best_fit = mh_func.run_arrays(instance, baseline, start, max_iteration=max_iteration, seed=seed, **options)
+
+    cpu_time_used = time.process_time() - start_cpu
+    elapsed_time = time.perf_counter() - start_time
+
+    return cpu_time_used, memory.peak, elapsed_time, average_fit, best_fit
+
+def encode_formation(instance: ProblemInstance, project: Project) -> np.ndarray:
+    '''the member index of every task of a compiled instance in the project, matched by name'''
+    member_position = {name: i for i, name in enumerate(instance.member_names)}
+    member_of_task = {a.task.name: a.member.name for a in project.assignments}
+    return np.array([member_position[member_of_task[name]] for name in instance.task_names], dtype=np.intp)
+
+def benchmark_parallel(mh_names: list[str], scenarios: list[int], random_seeds: list[int], max_iteration: int = 800, max_workers: int = None, shared: bool = False, options: dict = None):
+    '''run every (algorithm, scenario, seed) job on a process pool and save the results like benchmark
+
+    every job gets a fresh process so that its random state, cpu time and peak memory are its own,
+    without shared every job loads the files of the loaded data and runs the algorithm on the objects,
+    with shared the arrays of the compiled instance of the files (see instance_compiler.py) are
+    published once in shared memory, every job attaches to them and runs the array engine of the
+    algorithm from the baseline and encoded initial formation of its scenario (see run_shared_job),
+    options maps an algorithm to extra run arguments, eg {"GA": {"engine": "array"}}'''
+    shared_instance = None
+    if shared:
+        instance = load_instance(*setup.sources)
+        shared_instance = SharedInstance.publish(instance)
+        formations = {
+            scenario: (fitness_checker.baseline_vector(setup.projects[scenario]), encode_formation(instance, setup.projects[scenario]))
+            for scenario in scenarios
+        }
+    options = options or dict()
+
+    def submit(executor, mh_name: str, scenario: int, seed: int):
+        if shared_instance is None:
+            return executor.submit(run_benchmark_job, mh_name, scenario, seed, max_iteration, setup.sources, options.get(mh_name))
+        baseline, start = formations[scenario]
+        return executor.submit(run_shared_job, mh_name, shared_instance.handle, baseline, start, seed, max_iteration, options.get(mh_name))
+
+    try:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(), mp_context=context, max_tasks_per_child=1) as executor:
+            jobs = {
+                (mh_name, scenario, i): submit(executor, mh_name, scenario, seed)
+                for mh_name in mh_names
+                for scenario in scenarios
+                for i, seed in enumerate(random_seeds)
+            }
+
+            for mh_name in mh_names:
+                for scenario in scenarios:
+                    # the runs are merged in the order of the seeds
+                    results = [jobs[(mh_name, scenario, i)].result() for i in range(len(random_seeds))]
+                    save_benchmark(mh_name, setup.projects[scenario].name, results)
+    finally:
+        if shared_instance is not None:
+            shared_instance.close()
+
+def scaling_instance(members: int, tasks: int, out_dir: str = "data/synthetic", skills: int = 200, density: float = 0.1, seed: int = 1) -> tuple:
+    '''(staff path, task path) of a synthetic instance, generated the first time it is asked for'''
+    from data.instance_generator import generate
+
+    instance_dir = os.path.join(out_dir, f"{members}x{tasks}")
+    staff_path = os.path.join(instance_dir, "staff_expertise.json")
+    task_path = os.path.join(instance_dir, "task.json")
+    if not (os.path.exists(staff_path) and os.path.exists(task_path)):
+        generate(instance_dir, members, tasks, skills, seed=seed, density=density)
+    return staff_path, task_path
+
+class ScalingTelemetry(Telemetry):
+    '''keeps what a scaling job needs: when the best fitness first reached the target and the totals of the run'''
+    # the solution record of the run is not needed
+    enabled = False
+
+    def __init__(self, target: float = None):
+        super().__init__()
+        self.target = target
+        # seconds since the run started, None while the target is not reached
+        self.time_to_target: float = None
+        self.iterations = 0
+        self.best: float = None
+        self.evaluations = 0
+        self.elapsed = 0.0
+
+    def iteration(self, algorithm: str, iteration: int, average: float, best: float, **fields):
+        self.iterations = iteration
+        self.best = float(best)
+        if self.time_to_target is None and self.target is not None and best >= self.target:
+            self.time_to_target = time.perf_counter() - self.start
+
+    def event(self, algorithm: str, iteration: int, name: str, **fields):
+        if name == "stopped":
+            self.evaluations = fields["evaluations"]
+            self.elapsed = fields["elapsed_time"]
+
+    def emit(self, record: dict):
+        pass
+
+def run_scaling_job(mh_name: str, staff_path: str, task_path: str, seed: int, max_evaluations: int, target: float = None, options: dict = None, population: int = None) -> dict:
+    '''run one algorithm on one instance until it scored max_evaluations solutions, meant to run in its own process
+
+    the initial formation is the low compatibility scenario of the instance, population is passed to
+    the run of GA and ACO when given'''
+    mh_func = importlib.import_module(mh_name)
+    options = dict(options or dict())
+    if population is not None:
+        options["population"] = population
+    setup.load(staff_path, task_path)
+    initial_formation = setup.low_compatibility_team(random.Random(seed))
+
+    sink = ScalingTelemetry(target)
+    start_cpu = time.process_time()
+    with PeakMemory() as memory:
+        mh_func.run(
+            setup.members, setup.tasks, initial_formation, enable_visuals=False, seed=seed, telemetry=sink,
+            stopping=StoppingPolicy(max_evaluations=max_evaluations), save=False, **options,
+        )
+    cpu_time_used = time.process_time() - start_cpu
+
+    return {
+        "algorithm": mh_name,
+        "members": len(setup.members),
+        "tasks": len(setup.tasks),
+        "size": len(setup.members) * len(setup.tasks),
+        "population": population,
+        "seed": seed,
+        "iterations": sink.iterations,
+        "evaluations": sink.evaluations,
+        "elapsed": sink.elapsed,
+        "cpu_time": cpu_time_used,
+        "evaluations_per_second": sink.evaluations / sink.elapsed if sink.elapsed else 0.0,
+        "time_per_evaluation": sink.elapsed / sink.evaluations if sink.evaluations else 0.0,
+        "time_to_target": sink.time_to_target,
+        "best_fitness": sink.best,
+        "peak_memory": memory.peak,
+    }
+
+def scaling_sweep(
+    mh_names: list[str],
+    sizes: list[tuple],
+    random_seeds: list[int],
+    max_evaluations: int = 20000,
+    target: float = None,
+    max_workers: int = 1,
+    options: dict = None,
+    out_dir: str = "data/synthetic",
+    path: str = "data/scaling/results.csv",
+    populations: list[int] = None,
+) -> list[dict]:
+    '''run every algorithm on synthetic instances of every (members, tasks) size under the same evaluation budget
+
+    every job gets a fresh process so that its peak memory is its own, the jobs run one at a time by
+    default because parallel jobs compete for the cpu and memory bandwidth and slow each other down,
+    options maps an algorithm to extra run arguments, eg {"GA": {"engine": "array"}}, with populations
+    GA and ACO are also run with every population size (SA has no population), the results are
+    saved to path and returned'''
+    instances = {size: scaling_instance(*size, out_dir=out_dir) for size in sizes}
+    options = options or dict()
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context, max_tasks_per_child=1) as executor:
+        jobs = [
+            executor.submit(run_scaling_job, mh_name, *instances[size], seed, max_evaluations, target, options.get(mh_name), population)
+            for mh_name in mh_names
+            for population in (populations if populations and mh_name in POPULATION_ALGORITHMS else [None])
+            for size in sizes
+            for seed in random_seeds
+        ]
+        results = [job.result() for job in jobs]
+
+    if path is not None:
+        save_scaling(results, path)
+    return results
+
+def save_scaling(results: list[dict], path: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, mode="w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=list(results[0]))
+        writer.writeheader()
+        writer.writerows(results)
+
+def load_scaling(path: str) -> list[dict]:
+    '''the results saved by scaling_sweep, an empty time to target or population is None'''
+    with open(path, mode="r", newline="") as file:
+        rows = list(csv.DictReader(file))
+    for row in rows:
+        for key, value in row.items():
+            if key != "algorithm":
+                row[key] = float(value) if value != "" else None
+    return rows
+
+def scaling_series(result: dict, size: str = "size") -> str:
+    '''name of the curve a result belongs to, the algorithm and the axes other than size
+
+    eg "GA" or "GA population 50" against the instance size, "GA 1000x100" against the population'''
+    if size == "population":
+        return f"{result['algorithm']} {int(result['members'])}x{int(result['tasks'])}"
+    if result.get("population") is not None:
+        return f"{result['algorithm']} population {int(result['population'])}"
+    return result["algorithm"]
+
+def scaling_curve(results: list[dict], series: str, metric: str = "time_per_evaluation", size: str = "size") -> tuple:
+    '''(sizes, median of the metric over the seeds at each size) of one series (see scaling_series), runs without a value are left out'''
+    values = dict()
+    for r in results:
+        if r[size] is not None and scaling_series(r, size) == series and r[metric] is not None:
+            values.setdefault(r[size], list()).append(r[metric])
+    x = np.array(sorted(values), dtype=float)
+    y = np.array([np.median(values[v]) for v in sorted(values)], dtype=float)
+    return x, y
+
+def fit_exponent(x: np.ndarray, y: np.ndarray) -> tuple:
+    '''(exponent, coefficient) of y = coefficient * x ** exponent, fitted by least squares on the log-log values'''
+    exponent, intercept = np.polyfit(np.log(x), np.log(y), 1)
+    return float(exponent), float(np.exp(intercept))
+
+def scaling_exponents(results: list[dict], metric: str = "time_per_evaluation", size: str = "size") -> dict:
+    '''series (see scaling_series) -> empirical complexity exponent of the metric in the size
+
+    with the default metric an exponent above 1 means that an evaluation costs more than linearly in
+    the number of (member, task) pairs, size "population" gives the exponent in the population of
+    each instance, a series measured at fewer than two sizes gets None'''
+    exponents = dict()
+    for series in dict.fromkeys(scaling_series(r, size) for r in results if r[size] is not None):
+        x, y = scaling_curve(results, series, metric, size)
+        exponents[series] = fit_exponent(x, y)[0] if len(x) >= 2 else None
+    return exponents
+
+def plot_scaling(results: list[dict], metrics: list[str] = ("evaluations_per_second", "time_to_target", "peak_memory"), size: str = "size"):
+    '''log-log curves of the metrics of every series (see scaling_series) against the size, with the fitted exponents'''
+    import matplotlib.pyplot as plt
+
+    colors = {'GA': 'red', 'SA': 'green', 'ACO': 'blue'}
+    markers = {'GA': 'o', 'SA': 's', 'ACO': 'D'}
+    fig, axs = plt.subplots(1, len(metrics), figsize=(6 * len(metrics), 5), squeeze=False)
+    for ax, metric in zip(axs.flat, metrics):
+        for series in dict.fromkeys(scaling_series(r, size) for r in results if r[size] is not None):
+            mh_name = series.split()[0]
+            x, y = scaling_curve(results, series, metric, size)
+            if len(x) == 0:
+                continue
+            label = series
+            if len(x) >= 2 and (y > 0).all():
+                exponent, coefficient = fit_exponent(x, y)
+                ax.plot(x, coefficient * x ** exponent, color=colors.get(mh_name), linestyle='--', alpha=0.5)
+                label = f"{series} (exponent {exponent:.2f})"
+            ax.plot(x, y, label=label, color=colors.get(mh_name), marker=markers.get(mh_name))
+
+        ax.set_xscale('log')
+        ax.set_yscale('log')
+        ax.set_xlabel({"size": "Members x tasks", "population": "Population"}.get(size, size.capitalize()), fontsize=12)
+        ax.set_title(metric.replace("_", " ").capitalize(), fontsize=12)
+        ax.grid(True, which='both', linestyle='--', alpha=0.6)
+        ax.legend(fontsize=10, loc='best')
+
+    fig.suptitle('Scaling with the population' if size == "population" else 'Scaling with the instance size', fontsize=16, fontweight='bold')
+    plt.tight_layout(rect=[0, 0, 1, 0.95])
+    plt.show()
 
 def plot_comparison(
     folder: str, 
@@ -88,21 +465,27 @@ def plot_comparison(
     x_label: str,
     marker_size: int = 6, 
 ):
+    import matplotlib.pyplot as plt
+    import pandas as pd
+
     # Read data for each algorithm
     ga_data = [pd.read_csv(f"{folder}/{test}/GA.csv") for test in test_case]
     sa_data = [pd.read_csv(f"{folder}/{test}/SA.csv") for test in test_case]
     aco_data = [pd.read_csv(f"{folder}/{test}/ACO.csv") for test in test_case]
     x = range(len(ga_data[0][column]))
 
-    # Create a 2x2 grid of subplots
-    fig, axs = plt.subplots(2, 2, figsize=(14, 12), sharex=True)
+    # Create a grid of subplots, two per row
+    rows = (len(test_case) + 1) // 2
+    fig, axs = plt.subplots(rows, 2, figsize=(14, 6 * rows), sharex=True, squeeze=False)
+    for ax in axs.flat[len(test_case):]:
+        ax.set_visible(False)
     
     # Define styles
     colors = {'GA': 'red', 'SA': 'green', 'ACO': 'blue'}
     markers = {'GA': 'o', 'SA': 's', 'ACO': 'D'}
     
     # Iterate through test cases
-    for i, ax in enumerate(axs.flat):
+    for i, ax in zip(range(len(test_case)), axs.flat):
         # Plot for each algorithm
         ax.plot(
             x, ga_data[i][column], label='GA', color=colors['GA'], 
@@ -139,21 +522,32 @@ def plot_comparison(
     # Show the plot
     plt.show()
 
-# comparison = 20
-# random_seeds = [random.randint(1, 50) for c in range(comparison)]
-# print(random_seeds)
-# for project in setup.projects:
-#     benchmark(GA, project, "GA", random_seeds)
-#     benchmark(SA, project, "SA", random_seeds)
-#     benchmark(ACO, project, "ACO", random_seeds)
-
-pc_resorces = "data/pc_resources"
-test_case = os.listdir(pc_resorces)
-plot_comparison(pc_resorces, test_case, "CPU Time", "Comparison")
-plot_comparison(pc_resorces, test_case, "Memory Usage", "Comparison")
-plot_comparison(pc_resorces, test_case, "Elapsed Time", "Comparison")
-
-fitness = "data/fitness"
-test_case = os.listdir(fitness)
-plot_comparison(fitness, test_case, "Average Best Fitness", "Iteration", marker_size=0)
-plot_comparison(fitness, test_case, "Grand Average Fitness", "Iteration", marker_size=0)
\ No newline at end of file
+if __name__ == "__main__":
+    # comparison = 20
+    # random_seeds = [random.randint(1, 50) for c in range(comparison)]
+    # print(random_seeds)
+    # for project in setup.projects:
+    #     benchmark(GA, project, "GA", random_seeds)
+    #     benchmark(SA, project, "SA", random_seeds)
+    #     benchmark(ACO, project, "ACO", random_seeds)
+    # or run every job on a process pool
+    # benchmark_parallel(["GA", "SA", "ACO"], list(range(len(setup.projects))), random_seeds)
+    # how the throughput changes with the instance size
+    # results = scaling_sweep(["GA", "SA", "ACO"], [(100, 20), (400, 50), (1600, 100), (6400, 200)], random_seeds[:3])
+    # print(scaling_exponents(results))
+    # plot_scaling(load_scaling("data/scaling/results.csv"))
+    # and with the population of GA and ACO
+    # results = scaling_sweep(["GA", "ACO"], [(400, 50)], random_seeds[:3], populations=[25, 50, 100, 200])
+    # print(scaling_exponents(results, size="population"))
+    # plot_scaling(results, size="population")
+
+    pc_resorces = "data/pc_resources"
+    test_case = os.listdir(pc_resorces)
+    plot_comparison(pc_resorces, test_case, "CPU Time", "Comparison")
+    plot_comparison(pc_resorces, test_case, "Memory Usage", "Comparison")
+    plot_comparison(pc_resorces, test_case, "Elapsed Time", "Comparison")
+
+    fitness = "data/fitness"
+    test_case = os.listdir(fitness)
+    plot_comparison(fitness, test_case, "Average Best Fitness", "Iteration", marker_size=0)
+    plot_comparison(fitness, test_case, "Grand Average Fitness", "Iteration", marker_size=0)
@@ -0,0 +1,129 @@
+from models.member import Member
+from models.task import Task
+from models.assignment import Assignment, AssignmentPool
+from models.collaboration import CollaborationMatrix, SparseCollaborationMatrix
+import numpy as np
+
+class ProblemInstance:
+    '''precomputed arrays of a team formation problem
+
+    members and tasks are referred to by their position in the member and task list'''
+    def __init__(self, compatibility: np.ndarray, time: np.ndarray, salary: np.ndarray, collaboration: np.ndarray, members: list[Member] = None, tasks: list[Task] = None, pair_collaboration: 'np.ndarray | SparseCollaborationMatrix' = None):
+        # task x member compatibility matrix
+        self.compatibility: np.ndarray = compatibility
+        # estimated time and salary of each member
+        self.time: np.ndarray = time
+        self.salary: np.ndarray = salary
+        # check_fitness sums the distinct salary values of the team, so members are grouped by salary
+        self.salary_values, self.salary_level = np.unique(salary, return_inverse=True)
+        # member x member peer review scores, row i is the scores given by member i
+        # None when the scores are only kept as a sparse matrix
+        self.collaboration: np.ndarray = collaboration
+        # average of the two scores of each pair, used for the team collaboration score
+        # either a dense array or a SparseCollaborationMatrix
+        if pair_collaboration is None:
+            pair_collaboration = (collaboration + collaboration.T) / 2
+            np.fill_diagonal(pair_collaboration, 0)
+        self.pair_collaboration = pair_collaboration
+
+        # shared assignments, only available when built from the member and task objects
+        self.pool: AssignmentPool = None
+        self.member_names: list[str] = None
+        self.task_names: list[str] = None
+        self.bind(members, tasks)
+        # hash of the files a compiled instance was built from
+        self.source_hash: str = None
+
+    def bind(self, members: list[Member], tasks: list[Task]) -> 'ProblemInstance':
+        '''set the member and task objects the indices refer to, eg after attaching shared arrays'''
+        # the shared assignments belong to the member and task objects
+        if self.pool is not None and (self.pool.members is not members or self.pool.tasks is not tasks):
+            self.pool = None
+        self.members = members
+        self.tasks = tasks
+        self.member_index: dict = {m: i for i, m in enumerate(members)} if members else dict()
+        # when every member id is its position, a solution is encoded straight from the ids
+        self.ids_are_positions: bool = bool(members) and all(m.id == i for i, m in enumerate(members))
+
+        # names of the members and tasks
+        if members:
+            self.member_names = [m.name for m in members]
+        if tasks:
+            self.task_names = [t.name for t in tasks]
+        return self
+
+    def assignment_pool(self) -> AssignmentPool:
+        '''the shared assignments of the bound members and tasks, built the first time they are needed
+
+        every run on the instance takes its assignments from this pool'''
+        if self.pool is None:
+            self.pool = AssignmentPool(self.tasks, self.members)
+        return self.pool
+
+    @property
+    def sparse_collaboration(self) -> bool:
+        return isinstance(self.pair_collaboration, SparseCollaborationMatrix)
+
+    @property
+    def total_tasks(self) -> int:
+        return self.compatibility.shape[0]
+
+    @property
+    def total_members(self) -> int:
+        return self.compatibility.shape[1]
+
+    @classmethod
+    def from_models(cls, members: list[Member], tasks: list[Task], collaboration: 'CollaborationMatrix | SparseCollaborationMatrix' = None) -> 'ProblemInstance':
+        '''build the arrays from the member and task objects
+
+        the collaboration scores are taken from the matrix when given, else from each member'''
+        pool = AssignmentPool(tasks, members)
+        compatibility = np.array(
+            [[a.compatibility for a in row] for row in pool.assignments], dtype=float
+        ).reshape(len(tasks), len(members))
+        time = np.array([1 / m.efficiency for m in members], dtype=float)
+        salary = np.array([m.salary for m in members], dtype=float)
+
+        if collaboration is not None:
+            scores, pair_scores = cls.collaboration_arrays(members, collaboration)
+        else:
+            pair_scores = None
+            scores = np.zeros((len(members), len(members)), dtype=float)
+            for i, m in enumerate(members):
+                for j, other_member in enumerate(members):
+                    scores[i, j] = m.collaboration_scores.get(other_member, 0)
+
+        instance = cls(compatibility, time, salary, scores, members, tasks, pair_scores)
+        instance.pool = pool
+        return instance
+
+    @staticmethod
+    def collaboration_arrays(members: list[Member], collaboration: 'CollaborationMatrix | SparseCollaborationMatrix') -> tuple:
+        '''(scores, pair scores) of the members taken from the matrix by member id
+
+        a sparse matrix gives no dense scores, a dense matrix gives no pair scores'''
+        ids = [m.id for m in members]
+        if isinstance(collaboration, SparseCollaborationMatrix):
+            # the sparse matrix is kept as it is, only renumbered when the members are not in id order
+            return None, collaboration if ids == list(range(collaboration.size)) else collaboration.subset(ids)
+        return collaboration.scores[np.ix_(ids, ids)], None
+
+    def encode(self, assignments: list[Assignment]) -> np.ndarray:
+        '''convert a list of assignments (in task order) into an array of member indices'''
+        if self.ids_are_positions:
+            return np.fromiter((a.member.id for a in assignments), dtype=np.intp, count=len(assignments))
+        return np.array([self.member_index[a.member] for a in assignments], dtype=np.intp)
+
+    def encode_population(self, solutions: list[list[Assignment]]) -> np.ndarray:
+        '''convert a list of solutions into a (solutions x tasks) array of member indices'''
+        population = np.empty((len(solutions), self.total_tasks), dtype=np.intp)
+        for i, s in enumerate(solutions):
+            population[i] = self.encode(s)
+
+        return population
+
+    def decode(self, solution: np.ndarray) -> list[Assignment]:
+        '''convert an array of member indices back into a list of assignments'''
+        if self.pool is not None:
+            return [self.pool[t, m] for t, m in enumerate(solution)]
+        return [Assignment(t, self.members[m]) for t, m in zip(self.tasks, solution)]
@@ -0,0 +1,168 @@
+'''per phase profiling of the GA, SA and ACO iterations
+
+the run loop of every algorithm wraps each phase of an iteration (eg "evaluate_chromosome",
+"tournament_selection", "produce_bebes") in profiler.phase, a Profiler adds up the wall time,
+the calls and the candidate evaluations of each phase, and optionally the peak memory allocated
+by the phase with tracemalloc, the default NullProfiler records nothing
+
+example:
+    profiler = Profiler(memory=True)
+    GA.run(members, tasks, project, engine="array", profiler=profiler)
+    profiler.save("ga_profile.json")
+    print(format_comparison(compare_reports(load_report("old.json"), profiler.report())))
+
+    python profiler.py compare old.json new.json'''
+import contextlib, json, sys, time, tracemalloc
+
+REPORT_VERSION = 1
+
+class Phase:
+    '''the totals of one phase, also the context manager timing one call of it
+
+    phases are not nested, the memory peak of a phase is measured from its start'''
+    __slots__ = ("name", "calls", "time", "evaluations", "peak_memory", "memory", "counter", "_start", "_start_evaluations", "_start_memory")
+
+    def __init__(self, name: str, memory: bool = False):
+        self.name = name
+        self.calls = 0
+        self.time = 0.0
+        self.evaluations = 0
+        # bytes, only measured with memory
+        self.peak_memory = 0
+        self.memory = memory
+        # object whose evaluations attribute is read before and after the phase, eg the algorithm
+        self.counter = None
+
+    def __enter__(self) -> 'Phase':
+        if self.counter is not None:
+            self._start_evaluations = self.counter.evaluations
+        if self.memory:
+            self._start_memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.time += time.perf_counter() - self._start
+        self.calls += 1
+        if self.counter is not None:
+            self.evaluations += self.counter.evaluations - self._start_evaluations
+        if self.memory:
+            self.peak_memory = max(self.peak_memory, tracemalloc.get_traced_memory()[1] - self._start_memory)
+
+class Profiler:
+    '''records the phases of a run, memory tracks the allocation peaks with tracemalloc'''
+    # False when nothing is recorded
+    enabled = True
+
+    def __init__(self, memory: bool = False):
+        self.memory = memory
+        self.algorithm: str = None
+        self.phases: dict[str, Phase] = dict()
+        # wall time between start and stop
+        self.total = 0.0
+        self._start: float = None
+        self._started_tracing = False
+
+    def start(self, algorithm: str):
+        '''called by run before the first iteration'''
+        self.algorithm = algorithm
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._start = time.perf_counter()
+
+    def stop(self):
+        '''called by run after the last iteration'''
+        self.total += time.perf_counter() - self._start
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def phase(self, name: str, counter=None) -> Phase:
+        '''the context manager of a phase, counter is an object with an evaluations attribute'''
+        phase = self.phases.get(name)
+        if phase is None:
+            phase = self.phases[name] = Phase(name, self.memory)
+        phase.counter = counter
+        return phase
+
+    def report(self) -> dict:
+        '''summary of every phase, the json saved by save'''
+        phases = dict()
+        for name, p in self.phases.items():
+            phases[name] = {
+                "calls": p.calls,
+                "time": p.time,
+                "mean_time": p.time / p.calls if p.calls else 0.0,
+                "share": p.time / self.total if self.total else 0.0,
+                "evaluations": p.evaluations,
+                "evaluations_per_second": p.evaluations / p.time if p.time else 0.0,
+            }
+            if self.memory:
+                phases[name]["peak_memory_kb"] = p.peak_memory / 1024
+
+        return {"version": REPORT_VERSION, "algorithm": self.algorithm, "total_time": self.total, "memory": self.memory, "phases": phases}
+
+    def save(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+
+class NullProfiler(Profiler):
+    '''records nothing, every phase is the same empty context manager'''
+    enabled = False
+    _nothing = contextlib.nullcontext()
+
+    def start(self, algorithm: str):
+        pass
+
+    def stop(self):
+        pass
+
+    def phase(self, name: str, counter=None):
+        return self._nothing
+
+def load_report(path: str) -> dict:
+    with open(path, "r") as f:
+        report = json.load(f)
+    if report["version"] != REPORT_VERSION:
+        raise ValueError(f"{path} was saved with report version {report['version']}")
+    return report
+
+def compare_reports(before: dict, after: dict) -> dict:
+    '''time of every phase before and after, and the ratio after / before'''
+    phases = dict()
+    for name in list(before["phases"]) + [n for n in after["phases"] if n not in before["phases"]]:
+        old = before["phases"].get(name, {}).get("time")
+        new = after["phases"].get(name, {}).get("time")
+        phases[name] = {"before": old, "after": new, "ratio": new / old if old and new is not None else None}
+
+    total = {"before": before["total_time"], "after": after["total_time"], "ratio": after["total_time"] / before["total_time"] if before["total_time"] else None}
+    return {"algorithm": (before["algorithm"], after["algorithm"]), "phases": phases, "total": total}
+
+def format_report(report: dict) -> str:
+    lines = [f"{report['algorithm']} | total {report['total_time']:.4f} s"]
+    for name, p in report["phases"].items():
+        line = f"  {name:<28} {p['time']:10.4f} s {p['share']:7.1%} | calls {p['calls']:>7} | evaluations {p['evaluations']:>9}"
+        if "peak_memory_kb" in p:
+            line += f" | peak {p['peak_memory_kb']:.1f} KB"
+        lines.append(line)
+    return "\n".join(lines)
+
+def format_comparison(comparison: dict) -> str:
+    def cell(value):
+        return "-" if value is None else f"{value:.4f}"
+
+    lines = [f"{comparison['algorithm'][0]} -> {comparison['algorithm'][1]}"]
+    for name, p in list(comparison["phases"].items()) + [("total", comparison["total"])]:
+        ratio = "-" if p["ratio"] is None else f"x{p['ratio']:.2f}"
+        lines.append(f"  {name:<28} {cell(p['before']):>10} s -> {cell(p['after']):>10} s  {ratio}")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "compare":
+        print(format_comparison(compare_reports(load_report(sys.argv[2]), load_report(sys.argv[3]))))
+    elif len(sys.argv) == 3 and sys.argv[1] == "show":
+        print(format_report(load_report(sys.argv[2])))
+    else:
+        raise SystemExit("usage: python profiler.py show <report.json> | compare <before.json> <after.json>")
@@ -3,27 +3,28 @@ from models.member import Member
 from models.task import Task
 from models.assignment import Assignment
 from models.project import Project
+from models.collaboration import CollaborationMatrix
 import random
 
 random.seed(1)
 
-s1 = Skill("s1")
-s2 = Skill("s2")
-s3 = Skill("s3")
-s4 = Skill("s4")
-s5 = Skill("s5")
+s1 = Skill("s1", id=0)
+s2 = Skill("s2", id=1)
+s3 = Skill("s3", id=2)
+s4 = Skill("s4", id=3)
+s5 = Skill("s5", id=4)
 
-m1 = Member("m1", 1000, 1.0, {s1, s2, s3, s4, s5})
-m2 = Member("m2", 1000, 1.0, {s2, s3})
-m3 = Member("m3", 1000, 1.0, {s1, s3, s4})
-m4 = Member("m4", 1000, 1.0, {s2, s4})
-m5 = Member("m5", 1000, 1.0, {s3})
+m1 = Member("m1", 1000, 1.0, {s1, s2, s3, s4, s5}, id=0)
+m2 = Member("m2", 1000, 1.0, {s2, s3}, id=1)
+m3 = Member("m3", 1000, 1.0, {s1, s3, s4}, id=2)
+m4 = Member("m4", 1000, 1.0, {s2, s4}, id=3)
+m5 = Member("m5", 1000, 1.0, {s3}, id=4)
 
-t1 = Task("t1", {s1, s2, s3})
-t2 = Task("t2", {s1, s3, s4})
-t3 = Task("t3", {s1, s4})
-t4 = Task("t4", {s2, s4})
-t5 = Task("t5", {s3})
+t1 = Task("t1", {s1, s2, s3}, id=0)
+t2 = Task("t2", {s1, s3, s4}, id=1)
+t3 = Task("t3", {s1, s4}, id=2)
+t4 = Task("t4", {s2, s4}, id=3)
+t5 = Task("t5", {s3}, id=4)
 
 tasks = [t1, t2, t3, t4, t5] 
 members = [m1, m2, m3, m4, m5]
@@ -38,6 +39,7 @@ for i, m in enumerate(members):
     for j, other_member in enumerate(members):
         if m != other_member:
             m.add_score(other_member, rating_matric[i][j])
+collaboration = CollaborationMatrix(rating_matric)
 
 a1 = Assignment(t1, m3)
 a2 = Assignment(t2, m3)
@@ -45,4 +47,4 @@ a3 = Assignment(t3, m3)
 a4 = Assignment(t4, m4)
 a5 = Assignment(t5, m5)
 
-project = Project("Algorithm proof", [a1, a2, a3, a4, a5])
\ No newline at end of file
+project = Project("Algorithm proof", [a1, a2, a3, a4, a5], collaboration)
\ No newline at end of file
@@ -0,0 +1,470 @@
+'''local optimisation service, team formation jobs are submitted over a unix socket (or tcp) as json lines
+
+every request and every reply is a json object on its own line, the replies of a job carry its id
+
+    {"op": "submit", "job": {...}}    -> {"event": "accepted", "job": 1}, then the progress of the job
+    {"op": "cancel", "job": 1}        -> {"event": "cancelling", "job": 1}
+    {"op": "status"}                  -> {"event": "status", "jobs": {"1": "running"}}
+
+a job is
+    {
+        "algorithm": "GA",
+        "instance": {"staff": "staff.json", "task": "task.json"},  # setup.STAFF_PATH and setup.TASK_PATH by default
+        "scenario": "low compatibility team",                      # or "formation": [member id of each task]
+        "budget": {"max_iteration": 200, "time_budget": 5.0},      # StoppingPolicy arguments
+        "options": {"engine": "array"},                            # extra run arguments
+        "seed": 7
+    }
+
+the progress replies are the iterations of the run ("event": "progress", with the best fitness so far),
+the "new best" and "stopped" events, the last reply of a job is "done" with the solution record,
+"cancelled" (with the best solution found before the cancellation when the job had started) or "error"
+
+the jobs run on a bounded pool of worker processes, every worker keeps the instances it loaded for the
+next jobs, so a job pays neither the python start up nor the load of the json files
+
+example:
+    python service.py serve --socket /tmp/team.sock --workers 4
+    python service.py submit --socket /tmp/team.sock job.json'''
+from concurrent.futures import ProcessPoolExecutor
+from models.assignment import Assignment
+from models.project import Project
+from problem_instance import ProblemInstance
+from stopping import StoppingPolicy, CANCELLED
+from telemetry import QueueTelemetry, RingBufferTelemetry, MultiTelemetry
+import argparse, asyncio, importlib, json, multiprocessing, os, socket, sys, threading
+import numpy as np
+
+ALGORITHMS = ("GA", "SA", "ACO")
+# budget of a job that does not give one
+DEFAULT_BUDGET = {"max_iteration": 800}
+# at most one progress reply per job every this many seconds
+PROGRESS_INTERVAL = 0.2
+# events of the runs that are sent to the client
+STREAMED_EVENTS = ("new best", "stopped")
+# put by a worker on the progress queue after the last record of a job
+FINISHED = "finished"
+# longest request line, a formation of a big instance can be long
+LINE_LIMIT = 2 ** 24
+
+class LoadedInstance:
+    '''the members, tasks, scenarios and arrays of an instance, kept by a worker between jobs'''
+    def __init__(self, staff_path: str, task_path: str):
+        import setup
+
+        # the data is kept here, the module data of setup is left as it is
+        data = setup.read(staff_path, task_path)
+        self.members = data["members"]
+        self.tasks = data["tasks"]
+        self.collaboration = data["collaboration"]
+        self.instance_hash = data["instance_hash"]
+        self.projects: list[Project] = setup.scenarios(data)
+        self.instance = ProblemInstance.from_models(self.members, self.tasks, self.collaboration)
+
+    def formation(self, job: dict) -> Project:
+        '''the initial formation of a job, a scenario index or name, or the member id of every task'''
+        if "formation" in job:
+            member_by_id = {m.id: m for m in self.members}
+            if len(job["formation"]) != len(self.tasks):
+                raise ValueError(f"the formation has {len(job['formation'])} members for {len(self.tasks)} tasks")
+            assignments = [Assignment(t, member_by_id[m]) for t, m in zip(self.tasks, job["formation"])]
+            return Project(job.get("name", "formation"), assignments, self.collaboration, self.instance_hash)
+
+        scenario = job.get("scenario", 0)
+        if isinstance(scenario, int):
+            return self.projects[scenario]
+        for p in self.projects:
+            if p.name == scenario:
+                return p
+        raise ValueError(f"unknown scenario {scenario!r}")
+
+# instances loaded by this worker process, keyed by (staff path, task path)
+_instances: dict = dict()
+
+def instance_key(reference: dict = None) -> tuple:
+    '''(staff path, task path) of an instance reference of a job'''
+    import setup
+
+    reference = reference or dict()
+    return (
+        os.path.abspath(reference.get("staff", setup.STAFF_PATH)),
+        os.path.abspath(reference.get("task", setup.TASK_PATH)),
+    )
+
+def loaded_instance(key: tuple) -> LoadedInstance:
+    '''the instance of the key, loaded on the first job that uses it'''
+    if key not in _instances:
+        _instances[key] = LoadedInstance(*key)
+    return _instances[key]
+
+def preload(keys: list[tuple]):
+    '''load instances when a worker starts, before its first job'''
+    for key in keys:
+        loaded_instance(key)
+
+def run_job(job_id: int, job: dict, progress, cancel) -> dict:
+    '''run one job in a worker process
+
+    the progress records go to the progress queue, the run stops early when cancel is set,
+    returns the "solution" record of the run with the reason it stopped'''
+    try:
+        mh_func = importlib.import_module(job["algorithm"])
+        loaded = loaded_instance(instance_key(job.get("instance")))
+        initial_formation = loaded.formation(job)
+        stopping = StoppingPolicy(**(job.get("budget") or DEFAULT_BUDGET), cancel=cancel)
+
+        # the solution event is the last record of the run, it is kept instead of being streamed
+        last = RingBufferTelemetry(1)
+        sink = MultiTelemetry(
+            QueueTelemetry(progress, {"job": job_id}, interval=PROGRESS_INTERVAL, events=STREAMED_EVENTS), last
+        )
+        mh_func.run(
+            loaded.members, loaded.tasks, initial_formation, enable_visuals=False, seed=job.get("seed"),
+            telemetry=sink, stopping=stopping, instance=loaded.instance, save=False, **job.get("options", dict()),
+        )
+    finally:
+        # the service waits for this before sending the last reply, so no progress arrives after it
+        progress.put({"job": job_id, "event": FINISHED})
+
+    record = last.records[-1]
+    return {"reason": stopping.reason, "iteration": record["iteration"], "fitness": record["fitness"], "solution": record["solution"]}
+
+def validate(job: dict):
+    '''raise ValueError for a job that cannot run, before it is queued'''
+    if not isinstance(job, dict):
+        raise ValueError("a job is a json object")
+    if job.get("algorithm") not in ALGORITHMS:
+        raise ValueError(f"algorithm must be one of {', '.join(ALGORITHMS)}")
+    if "scenario" in job and "formation" in job:
+        raise ValueError("give either a scenario or a formation")
+    try:
+        StoppingPolicy(**(job.get("budget") or DEFAULT_BUDGET))
+    except TypeError as e:
+        raise ValueError(f"invalid budget: {e}")
+    for key in instance_key(job.get("instance")):
+        if not os.path.exists(key):
+            raise ValueError(f"{key} does not exist")
+
+def _json_default(value):
+    # numpy scalars in the telemetry records
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not json serializable")
+
+def encode(message: dict) -> bytes:
+    return json.dumps(message, default=_json_default).encode() + b"\n"
+
+class Job:
+    '''a submitted job as seen by the service'''
+    def __init__(self, id: int, job: dict, cancel):
+        self.id = id
+        self.job = job
+        # set to stop the run, it is shared with the worker process
+        self.cancel = cancel
+        self.cancel_requested = False
+        self.future = None
+        # the progress records of the worker, filled by the progress reader
+        self.records: asyncio.Queue = asyncio.Queue()
+
+    @property
+    def state(self) -> str:
+        if self.cancel_requested:
+            return "cancelling"
+        return "running" if self.future.running() else "queued"
+
+class OptimisationService:
+    '''accepts jobs over a socket and runs them on a bounded process pool
+
+    at most max_jobs jobs are queued or running at once, preload is a list of instance references
+    that every worker loads when it starts'''
+    def __init__(self, max_workers: int = None, max_jobs: int = 100, preload: list[dict] = None):
+        self.max_workers = max_workers or os.cpu_count()
+        self.max_jobs = max_jobs
+        self.preload = [instance_key(reference) for reference in (preload or [dict()])]
+        self.jobs: dict[int, Job] = dict()
+        self.next_id = 1
+        self.server: asyncio.AbstractServer = None
+        # the open connections, closed with the service
+        self.writers: set = set()
+
+    async def start(self, path: str = None, host: str = "127.0.0.1", port: int = 0):
+        '''start the workers and listen on the unix socket path, or on host and port when no path is given'''
+        self.loop = asyncio.get_running_loop()
+        context = multiprocessing.get_context("spawn")
+        # the progress queue and the cancel events are shared with the workers through a manager process
+        self.manager = context.Manager()
+        self.progress = self.manager.Queue()
+        self.executor = ProcessPoolExecutor(self.max_workers, mp_context=context, initializer=preload, initargs=(self.preload,))
+        self.reader = threading.Thread(target=self._read_progress, daemon=True)
+        self.reader.start()
+
+        if path is not None:
+            if os.path.exists(path):
+                os.unlink(path)
+            self.server = await asyncio.start_unix_server(self.handle_connection, path, limit=LINE_LIMIT)
+        else:
+            self.server = await asyncio.start_server(self.handle_connection, host, port, limit=LINE_LIMIT)
+        return self
+
+    @property
+    def address(self):
+        '''the socket path, or the (host, port) the service listens on'''
+        return self.server.sockets[0].getsockname()
+
+    async def serve_forever(self):
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        '''stop listening, cancel the jobs and stop the workers'''
+        self.server.close()
+        for job in list(self.jobs.values()):
+            self.cancel(job.id)
+        await self.loop.run_in_executor(None, self.executor.shutdown)
+        # the last replies of the cancelled jobs are sent before the connections are closed
+        while self.jobs:
+            await asyncio.sleep(0.01)
+        for writer in self.writers:
+            writer.close()
+        await self.server.wait_closed()
+        self.progress.put(None)
+        await self.loop.run_in_executor(None, self.reader.join)
+        self.manager.shutdown()
+
+    def _read_progress(self):
+        # runs in a thread, a get on the manager queue blocks
+        while True:
+            record = self.progress.get()
+            if record is None:
+                return
+            self.loop.call_soon_threadsafe(self._dispatch, record)
+
+    def _dispatch(self, record: dict):
+        job = self.jobs.get(record["job"])
+        if job is not None:
+            job.records.put_nowait(record)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        '''serve the requests of one client, its unfinished jobs are cancelled when it disconnects'''
+        lock = asyncio.Lock()
+        tasks: dict[int, asyncio.Task] = dict()
+        self.writers.add(writer)
+
+        async def send(message: dict):
+            async with lock:
+                writer.write(encode(message))
+                await writer.drain()
+
+        try:
+            while line := await reader.readline():
+                op = None
+                try:
+                    request = json.loads(line)
+                    op = request.get("op")
+                    if op == "submit":
+                        job = self.submit(request.get("job"))
+                        await send({"event": "accepted", "job": job.id})
+                        tasks[job.id] = asyncio.create_task(self.stream(job, send))
+                    elif op == "cancel":
+                        if not self.cancel(request.get("job")):
+                            raise ValueError(f"no unfinished job {request.get('job')!r}")
+                        await send({"event": "cancelling", "job": request["job"]})
+                    elif op == "status":
+                        await send({"event": "status", "jobs": {str(job.id): job.state for job in self.jobs.values()}})
+                    else:
+                        raise ValueError(f"unknown op {op!r}")
+                except Exception as e:
+                    # a bad request is answered, the connection stays open
+                    await send({"event": "error", "op": op, "message": str(e)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for job_id, task in tasks.items():
+                if not task.done():
+                    self.cancel(job_id)
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            self.writers.discard(writer)
+            writer.close()
+
+    def submit(self, job: dict) -> Job:
+        '''queue a job on the process pool'''
+        validate(job)
+        if len(self.jobs) >= self.max_jobs:
+            raise ValueError(f"the service already has {self.max_jobs} unfinished jobs")
+
+        job = Job(self.next_id, job, self.manager.Event())
+        self.next_id += 1
+        self.jobs[job.id] = job
+        job.future = self.executor.submit(run_job, job.id, job.job, self.progress, job.cancel)
+        return job
+
+    def cancel(self, job_id: int) -> bool:
+        '''cancel a queued job, or stop a running one at its next iteration, returns whether the job was unfinished'''
+        job = self.jobs.get(job_id)
+        if job is None:
+            return False
+        if not job.future.cancel():
+            job.cancel.set()
+        job.cancel_requested = True
+        return True
+
+    async def stream(self, job: Job, send):
+        '''send the progress of a job until it finishes, then its result'''
+        result = asyncio.wrap_future(job.future)
+        try:
+            while True:
+                next_record = asyncio.ensure_future(job.records.get())
+                await asyncio.wait((next_record, result), return_when=asyncio.FIRST_COMPLETED)
+                if next_record.done():
+                    record = next_record.result()
+                else:
+                    next_record.cancel()
+                    if result.cancelled() or result.exception() is not None:
+                        # the worker process may have died without putting the finished marker
+                        break
+                    # the worker put the finished marker before returning
+                    record = await job.records.get()
+                if record.get("event") == FINISHED:
+                    break
+                await send(_reply(record))
+
+            if result.cancelled():
+                await send({"event": "cancelled", "job": job.id})
+                return
+            try:
+                outcome = await result
+            except Exception as e:
+                await send({"event": "error", "job": job.id, "message": f"{type(e).__name__}: {e}"})
+                return
+            event = "cancelled" if outcome["reason"] == CANCELLED else "done"
+            await send({"event": event, "job": job.id, **outcome})
+        finally:
+            del self.jobs[job.id]
+
+def _reply(record: dict) -> dict:
+    # the iterations have no event name
+    if "event" not in record:
+        return {"event": "progress", **record}
+    return record
+
+class ServiceClient:
+    '''blocking client of the service, the replies of several jobs can be read from one connection
+
+    example:
+        with ServiceClient("/tmp/team.sock") as client:
+            job_id = client.submit({"algorithm": "SA", "budget": {"time_budget": 2}})
+            for reply in client.replies(job_id):
+                print(reply)'''
+    def __init__(self, path: str = None, host: str = "127.0.0.1", port: int = None, timeout: float = None):
+        if path is not None:
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.socket.settimeout(timeout)
+            self.socket.connect(path)
+        else:
+            self.socket = socket.create_connection((host, port), timeout)
+        self.file = self.socket.makefile("rb")
+        # replies read while waiting for another one
+        self.unread: list[dict] = list()
+
+    def request(self, request: dict):
+        self.socket.sendall(encode(request))
+
+    def read(self) -> dict:
+        '''the next reply, ConnectionError when the service closed the connection'''
+        if self.unread:
+            return self.unread.pop(0)
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("the service closed the connection")
+        return json.loads(line)
+
+    def _wait(self, match) -> dict:
+        '''the first reply for which match is True, the other replies are kept for later reads'''
+        skipped = list()
+        try:
+            while True:
+                reply = self.read()
+                if match(reply):
+                    return reply
+                skipped.append(reply)
+        finally:
+            self.unread[:0] = skipped
+
+    def submit(self, job: dict) -> int:
+        '''submit a job, returns its id'''
+        self.request({"op": "submit", "job": job})
+        reply = self._wait(lambda r: r["event"] == "accepted" or r["event"] == "error" and r.get("op") == "submit")
+        if reply["event"] == "error":
+            raise ValueError(reply["message"])
+        return reply["job"]
+
+    def cancel(self, job_id: int):
+        self.request({"op": "cancel", "job": job_id})
+
+    def status(self) -> dict:
+        '''the state of every unfinished job of the service'''
+        self.request({"op": "status"})
+        return self._wait(lambda r: r["event"] == "status")["jobs"]
+
+    def replies(self, job_id: int):
+        '''iterate the replies of a job up to its last one ("done", "cancelled" or "error")'''
+        while True:
+            reply = self._wait(lambda r: r.get("job") == job_id and r["event"] != "cancelling")
+            yield reply
+            if reply["event"] in ("done", "cancelled", "error"):
+                return
+
+    def run(self, job: dict, progress=None) -> dict:
+        '''submit a job and wait for its last reply, progress is called with every other reply'''
+        job_id = self.submit(job)
+        for reply in self.replies(job_id):
+            if reply["event"] in ("done", "cancelled", "error"):
+                return reply
+            if progress is not None:
+                progress(reply)
+
+    def close(self):
+        self.file.close()
+        self.socket.close()
+
+    def __enter__(self) -> 'ServiceClient':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+async def serve(path: str = None, host: str = "127.0.0.1", port: int = 0, max_workers: int = None, max_jobs: int = 100):
+    service = await OptimisationService(max_workers, max_jobs).start(path, host, port)
+    print(f"listening on {service.address}", flush=True)
+    try:
+        await service.serve_forever()
+    finally:
+        await service.close()
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description="local team formation optimisation service")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for command in ("serve", "submit"):
+        sub = commands.add_parser(command)
+        sub.add_argument("--socket", default=None, help="unix socket path")
+        sub.add_argument("--host", default="127.0.0.1", help="tcp host when no socket is given")
+        sub.add_argument("--port", type=int, default=0, help="tcp port when no socket is given")
+    commands.choices["serve"].add_argument("--workers", type=int, default=None, help="size of the process pool")
+    commands.choices["serve"].add_argument("--max-jobs", type=int, default=100, help="most unfinished jobs")
+    commands.choices["submit"].add_argument("job", help="json file of the job")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        try:
+            asyncio.run(serve(args.socket, args.host, args.port, args.workers, args.max_jobs))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    with open(args.job, "r") as f:
+        job = json.load(f)
+    with ServiceClient(args.socket, args.host, args.port) as client:
+        print(json.dumps(client.run(job, progress=lambda reply: print(json.dumps(reply)))))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
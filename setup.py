@@ -1,136 +1,286 @@
+'''loads the staff and the project tasks and builds the test scenarios
+
+nothing is loaded when this module is imported, the data is loaded when one of
+members, tasks, skills, collaboration or projects is first read, eg setup.members,
+read and scenarios give the data and the scenarios of other files without changing the module'''
 from models.member import Member
 from models.skill import Skill
 from models.project import Project
 from models.task import Task
 from models.assignment import Assignment
-import difference_checker
-import random, json, pickle
-import pandas as pd
-
-random.seed(1)
-
-staffs = dict()
-staff_skills = dict()
-
-staff_json = dict()
-with open("data/staff_expertise/staff_expertise.json", "r") as f:
-    staff_json = json.load(f)
-
-# creating the list of project members
-for s in staff_json:
-    new_member = Member(s, staff_json[s]["salary"], staff_json[s]["efficiency"])
-    staffs[s] = new_member
-
-    # add the skillset to the new member
-    new_member_skill = list()
-    for s in staff_json[s]["expertise"]:
-        # check if the skill already created, else create one
-        skill_obj = staff_skills.get(s)
-        if skill_obj:
-            new_member_skill.append(skill_obj)
+from models.collaboration import CollaborationMatrix, SparseCollaborationMatrix
+import random, json
+import numpy as np
+
+STAFF_PATH = "data/staff_expertise/staff_expertise.json"
+TASK_PATH = "data/project task/task.json"
+
+# names that are loaded on first access
+_DATA = ("staffs", "staff_skills", "staff_json", "collaboration", "tasks", "task_json", "skills", "members", "instance_hash", "sources")
+_SCENARIOS = ("low_compatibility", "high_load", "big_team", "low_collab", "projects")
+
+
+def collaboration_scores(staff_json: dict) -> np.ndarray:
+    """(members x members) matrix of the peer review scores in the staff json
+
+    a staff either has a dense "scores" list ordered by member id, or a sparse "ratings"
+    list of [member id, score] pairs, unrated pairs score 0"""
+    scores = np.zeros((len(staff_json), len(staff_json)), dtype=float)
+    for i, s in enumerate(staff_json):
+        if "scores" in staff_json[s]:
+            scores[i] = staff_json[s]["scores"]
         else:
-            new_skill = Skill(s)
-            staff_skills[s] = new_skill
-            new_member_skill.append(new_skill)
-
-    new_member.skill_set = set(new_member_skill)
-
-for s in staffs:
-    member: Member = staffs[s]
-    scores = staff_json[s]["scores"]
-
-    for i, m in enumerate(staffs):
-        if scores[i] != 0:
-            member.add_score(staffs[m], scores[i])
-
-tasks: list[Task] = list()
-task_json = dict()
-with open("data/project task/task.json", "r") as f:
-    task_json = json.load(f)
-for t in task_json:
-    new_task = Task(t["task"], set())
-    for s in t["skills_required"]:
-        skill_obj = staff_skills.get(s)
-        if skill_obj:
-            new_task.skills.add(skill_obj)
+            for other_id, score in staff_json[s]["ratings"]:
+                scores[i, other_id] = score
+
+    return scores
+
+
+def collaboration_ratings(staff_json: dict) -> tuple:
+    """(raters, rated, scores) arrays of every non zero score in the staff json, in either layout"""
+    raters, rated, scores = list(), list(), list()
+    for i, s in enumerate(staff_json):
+        if "scores" in staff_json[s]:
+            ratings = enumerate(staff_json[s]["scores"])
         else:
-            new_skill = Skill(s)
-            staff_skills[s] = new_skill
-            new_task.skills.add(new_skill)
+            ratings = staff_json[s]["ratings"]
+
+        for other_id, score in ratings:
+            if score != 0:
+                raters.append(i)
+                rated.append(other_id)
+                scores.append(score)
+
+    return np.array(raters, dtype=np.int64), np.array(rated, dtype=np.int64), np.array(scores, dtype=float)
+
+
+def uses_sparse_ratings(staff_json: dict) -> bool:
+    """whether the staff json stores the collaboration scores as sparse ratings"""
+    return any("ratings" in staff_json[s] for s in staff_json)
+
+
+def read(staff_path: str = STAFF_PATH, task_path: str = TASK_PATH, sparse: bool = None) -> dict:
+    """parse the staff and task json files, returns the data by name (see _DATA) without touching the module
+
+    the collaboration scores are kept in a SparseCollaborationMatrix when sparse is True,
+    by default when the staff json uses sparse ratings, the members collaboration_scores
+    dicts are then left empty"""
+    # instance_compiler imports this module, so it is imported here
+    from instance_compiler import content_hash
+
+    staffs = dict()
+    staff_skills = dict()
+
+    staff_json = dict()
+    with open(staff_path, "r") as f:
+        staff_json = json.load(f)
+
+    # creating the list of project members
+    for i, s in enumerate(staff_json):
+        new_member = Member(s, staff_json[s]["salary"], staff_json[s]["efficiency"], id=i)
+        staffs[s] = new_member
+
+        # add the skillset to the new member
+        new_member_skill = list()
+        for s in staff_json[s]["expertise"]:
+            # check if the skill already created, else create one
+            skill_obj = staff_skills.get(s)
+            if skill_obj:
+                new_member_skill.append(skill_obj)
+            else:
+                new_skill = Skill(s, id=len(staff_skills))
+                staff_skills[s] = new_skill
+                new_member_skill.append(new_skill)
+
+        new_member.skill_set = set(new_member_skill)
+
+    if sparse is None:
+        sparse = uses_sparse_ratings(staff_json)
+
+    if sparse:
+        raters, rated, scores = collaboration_ratings(staff_json)
+        collaboration = SparseCollaborationMatrix.from_ratings(raters, rated, scores, len(staff_json))
+    else:
+        member_list = list(staffs.values())
+        for s in staffs:
+            member: Member = staffs[s]
+            if "scores" in staff_json[s]:
+                ratings = enumerate(staff_json[s]["scores"])
+            else:
+                ratings = staff_json[s]["ratings"]
+
+            for i, score in ratings:
+                if score != 0:
+                    member.add_score(member_list[i], score)
 
-    tasks.append(new_task)
+        collaboration = CollaborationMatrix(collaboration_scores(staff_json))
 
-# extracting the members and skills for easier setup
-skills: list[Skill] = list(staff_skills.values())
-members: list[Member] = list(staffs.values())
+    tasks = list()
+    task_json = dict()
+    with open(task_path, "r") as f:
+        task_json = json.load(f)
+    for t in task_json:
+        new_task = Task(t["task"], set(), id=len(tasks))
+        for s in t["skills_required"]:
+            skill_obj = staff_skills.get(s)
+            if skill_obj:
+                new_task.skills.add(skill_obj)
+            else:
+                new_skill = Skill(s, id=len(staff_skills))
+                staff_skills[s] = new_skill
+                new_task.skills.add(new_skill)
 
+        tasks.append(new_task)
 
-def low_compatibility_team():
+    # extracting the members and skills for easier setup
+    skills = list(staff_skills.values())
+    members = list(staffs.values())
+    # saved solutions refer to the instance by this hash
+    instance_hash = content_hash(staff_path, task_path)
+    # the files the data was loaded from, eg to open their compiled instance
+    sources = (staff_path, task_path)
+
+    return {
+        "staffs": staffs,
+        "staff_skills": staff_skills,
+        "staff_json": staff_json,
+        "collaboration": collaboration,
+        "tasks": tasks,
+        "task_json": task_json,
+        "skills": skills,
+        "members": members,
+        "instance_hash": instance_hash,
+        "sources": sources,
+    }
+
+
+def load(staff_path: str = STAFF_PATH, task_path: str = TASK_PATH, sparse: bool = None):
+    """parse the staff and task json files into the module, see read"""
+    globals().update(read(staff_path, task_path, sparse))
+
+
+def _require_data():
+    if "members" not in globals():
+        load()
+
+
+def _data(data: dict = None) -> dict:
+    """the given data (see read), or the data of the module"""
+    if data is not None:
+        return data
+    _require_data()
+    return globals()
+
+
+def low_compatibility_team(rng: random.Random = random, data: dict = None):
     """create team formation with low compatibility"""
+    data = _data(data)
     assignments = []
-    for t in tasks:
-        member = random.sample(members, 5)
+    for t in data["tasks"]:
+        member = rng.sample(data["members"], 5)
         new_assignment: list[Assignment] = [Assignment(t, m) for m in member]
         assignments.append(min(new_assignment, key=lambda x: x.compatibility))
 
-    project = Project("low compatibility team", assignments)
+    project = Project("low compatibility team", assignments, data["collaboration"], data["instance_hash"])
     return project
 
 
-def big_size_team():
+def big_size_team(rng: random.Random = random, data: dict = None):
     """create team formation with big team size"""
+    data = _data(data)
     assignments = []
     choosen_members = list()
-    for t in tasks:
-        member = random.choice([m for m in members if m not in choosen_members])
+    for t in data["tasks"]:
+        member = rng.choice([m for m in data["members"] if m not in choosen_members])
         choosen_members.append(member)
         new_assignment = Assignment(t, member)
         assignments.append(new_assignment)
 
-    project = Project("big size team", assignments)
+    project = Project("big size team", assignments, data["collaboration"], data["instance_hash"])
     return project
 
 
-def high_task_load_team():
+def high_task_load_team(rng: random.Random = random, data: dict = None):
     """create team formation with high task load"""
-    available_member = random.sample(members, 3)
+    data = _data(data)
+    available_member = rng.sample(data["members"], 3)
     project = Project(
         "high task load team",
-        [Assignment(t, random.choice(available_member)) for t in tasks],
+        [Assignment(t, rng.choice(available_member)) for t in data["tasks"]],
+        data["collaboration"],
+        data["instance_hash"],
     )
 
     return project
 
 
-def low_collab_team():
+def low_collab_team(rng: random.Random = random, data: dict = None):
     """create team formation with low collaboration score"""
+    data = _data(data)
     projects: list[Project] = list()
     for i in range(900):
         project = Project(
-            "low collab team", [Assignment(t, random.choice(members)) for t in tasks]
+            "low collab team", [Assignment(t, rng.choice(data["members"])) for t in data["tasks"]], data["collaboration"], data["instance_hash"]
         )
         projects.append(project)
 
     return min(projects, key=lambda x: x.collab_score)
 
+
+def scenarios(data: dict = None, seed: int = 1) -> list[Project]:
+    """the four test scenarios of the data (see read), or of the data of the module
+
+    a private random generator is used so that the global random state is not touched"""
+    rng = random.Random(seed)
+    low_compatibility = low_compatibility_team(rng, data)
+    high_load = high_task_load_team(rng, data)
+    big_team = big_size_team(rng, data)
+    low_collab = low_collab_team(rng, data)
+
+    return [
+                low_compatibility,
+                big_team,
+                high_load,
+                low_collab
+            ]
+
+
+def build_scenarios(seed: int = 1):
+    """build the four test scenarios into the module"""
+    global low_compatibility, high_load, big_team, low_collab, projects
+
+    projects = scenarios(seed=seed)
+    low_compatibility, big_team, high_load, low_collab = projects
+
+
+def save_scenarios():
+    """save the initial formation of every scenario"""
+    if "projects" not in globals():
+        build_scenarios()
+    for p in projects:
+        p.save_project(before=True)
+
+
+def __getattr__(name: str):
+    # loads the data and scenarios the first time they are read
+    if name in _DATA:
+        load()
+    elif name in _SCENARIOS:
+        build_scenarios()
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    return globals()[name]
+
 def print_project_task():
+    import pandas as pd
+
+    _require_data()
     pd.set_option('display.max_colwidth', None)
     df = pd.DataFrame(task_json)
     print(df)
 
-# print_project_task()
-
-low_compatibility = low_compatibility_team()
-high_load = high_task_load_team()
-big_team = big_size_team()
-low_collab = low_collab_team()
-
-projects:list[Project] = [
-                            low_compatibility, 
-                            big_team, 
-                            high_load, 
-                            low_collab
-                        ]
 
-for p in projects:
-    p.save_project(before=True)
\ No newline at end of file
+if __name__ == "__main__":
+    # print_project_task()
+    save_scenarios()
@@ -0,0 +1,171 @@
+'''publishes the arrays of a problem instance in shared memory for worker processes
+
+the parent publishes the arrays once, the workers attach to them by name without copying,
+only the small handle is pickled into each worker
+
+example:
+    with SharedInstance.publish(instance, {"low compatibility team": baseline}) as shared:
+        executor.submit(job, shared.handle)
+
+    # in the worker
+    instance = attach(handle)
+    baseline = handle.baseline("low compatibility team")'''
+from problem_instance import ProblemInstance
+from models.collaboration import SparseCollaborationMatrix
+from multiprocessing import shared_memory
+import atexit, sys, weakref
+import numpy as np
+
+# every array starts on a cache line
+ALIGNMENT = 64
+
+class SharedInstanceHandle:
+    '''picklable description of a published instance'''
+    def __init__(self, name: str, layout: tuple, sparse_size: int = None, sparse_default: float = 0, baselines: dict = None, source_hash: str = None):
+        # name of the shared memory block
+        self.name = name
+        # (key, dtype, shape, offset) of every array in the block
+        self.layout = layout
+        # member x member collaboration size and default score when the collaboration is sparse
+        self.sparse_size = sparse_size
+        self.sparse_default = sparse_default
+        # baseline vector of each scenario, they are small so they are pickled with the handle
+        self.baselines: dict = baselines or dict()
+        self.source_hash = source_hash
+
+    @property
+    def sparse(self) -> bool:
+        return self.sparse_size is not None
+
+    def baseline(self, name: str) -> np.ndarray:
+        return self.baselines[name]
+
+def _instance_arrays(instance: ProblemInstance) -> dict:
+    '''the arrays the fitness functions read, the raw collaboration scores are not needed'''
+    arrays = {
+        "compatibility": instance.compatibility,
+        "time": instance.time,
+        "salary": instance.salary,
+    }
+    if instance.sparse_collaboration:
+        arrays["pair_indptr"] = instance.pair_collaboration.indptr
+        arrays["pair_indices"] = instance.pair_collaboration.indices
+        arrays["pair_data"] = instance.pair_collaboration.data
+    else:
+        arrays["pair_collaboration"] = instance.pair_collaboration
+
+    return arrays
+
+class SharedInstance:
+    '''owner of the shared memory block of a published instance, the block is removed by close'''
+    def __init__(self, memory: shared_memory.SharedMemory, handle: SharedInstanceHandle):
+        self.memory = memory
+        self.handle = handle
+        # the block is also removed when the owner is garbage collected or the interpreter exits
+        self._finalizer = weakref.finalize(self, _release, memory)
+
+    @classmethod
+    def publish(cls, instance: ProblemInstance, baselines: dict = None) -> 'SharedInstance':
+        '''copy the instance arrays into a new shared memory block'''
+        arrays = {key: np.ascontiguousarray(value) for key, value in _instance_arrays(instance).items()}
+
+        layout = list()
+        size = 0
+        for key, array in arrays.items():
+            size = -(-size // ALIGNMENT) * ALIGNMENT
+            layout.append((key, array.dtype.str, array.shape, size))
+            size += array.nbytes
+
+        memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for key, dtype, shape, offset in layout:
+            np.ndarray(shape, dtype=dtype, buffer=memory.buf, offset=offset)[...] = arrays[key]
+
+        sparse = instance.sparse_collaboration
+        handle = SharedInstanceHandle(
+            name=memory.name,
+            layout=tuple(layout),
+            sparse_size=instance.pair_collaboration.size if sparse else None,
+            sparse_default=instance.pair_collaboration.default if sparse else 0,
+            baselines={name: np.asarray(b, dtype=float) for name, b in (baselines or dict()).items()},
+            source_hash=instance.source_hash,
+        )
+        return cls(memory, handle)
+
+    def close(self):
+        '''unmap and remove the block, workers must not use their attached instances afterwards'''
+        self._finalizer()
+
+    def __enter__(self) -> 'SharedInstance':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _release(memory: shared_memory.SharedMemory):
+    memory.close()
+    try:
+        memory.unlink()
+    except FileNotFoundError:
+        pass
+
+# blocks attached by this process, so that each block is only mapped once per process
+_attached: dict = dict()
+
+def _open(name: str) -> shared_memory.SharedMemory:
+    if sys.version_info >= (3, 13):
+        # the publisher owns the block, it must not be removed when this process exits
+        return shared_memory.SharedMemory(name=name, track=False)
+    # processes started by the publisher share its resource tracker, which keeps the block
+    return shared_memory.SharedMemory(name=name)
+
+def attach(handle: SharedInstanceHandle) -> ProblemInstance:
+    '''open a published instance, the arrays are read only views of the shared block'''
+    memory, instance = _attached.get(handle.name, (None, None))
+    if instance is not None:
+        return instance
+
+    # the block is still mapped when a detach failed because it was still referenced
+    if memory is None:
+        memory = _open(handle.name)
+
+    arrays = dict()
+    for key, dtype, shape, offset in handle.layout:
+        array = np.ndarray(shape, dtype=dtype, buffer=memory.buf, offset=offset)
+        array.flags.writeable = False
+        arrays[key] = array
+
+    if handle.sparse:
+        pair_collaboration = SparseCollaborationMatrix(
+            arrays["pair_indptr"], arrays["pair_indices"], arrays["pair_data"], handle.sparse_size, handle.sparse_default
+        )
+    else:
+        pair_collaboration = arrays["pair_collaboration"]
+    instance = ProblemInstance(arrays["compatibility"], arrays["time"], arrays["salary"], None, pair_collaboration=pair_collaboration)
+    instance.source_hash = handle.source_hash
+
+    _attached[handle.name] = (memory, instance)
+    return instance
+
+def detach(handle: SharedInstanceHandle) -> bool:
+    '''unmap a block attached by this process, returns whether it was unmapped
+
+    the block stays mapped while arrays of the attached instance are still referenced'''
+    return _detach(handle.name)
+
+def _detach(name: str) -> bool:
+    if name not in _attached:
+        return False
+    memory, instance = _attached.pop(name)
+    del instance
+    try:
+        memory.close()
+    except BufferError:
+        # still referenced, the process keeps it mapped
+        _attached[name] = (memory, None)
+        return False
+    return True
+
+@atexit.register
+def _detach_all():
+    for name in list(_attached):
+        _detach(name)
@@ -0,0 +1,119 @@
+'''stopping policy shared by GA, SA and ACO
+
+a run stops at the first of: the iteration limit, the wall clock budget, the evaluation budget,
+no improvement of the best fitness for a number of iterations, reaching a target fitness,
+or a cancel event being set (eg by another process)
+
+example:
+    policy = StoppingPolicy(time_budget=2.0, patience=100)
+    GA.run(members, tasks, project, stopping=policy)
+    print(policy.reason)'''
+import time
+import numpy as np
+
+MAX_ITERATION = "max iteration"
+TIME_BUDGET = "time budget"
+EVALUATION_BUDGET = "evaluation budget"
+STAGNATION = "stagnation"
+TARGET = "target reached"
+CANCELLED = "cancelled"
+
+# seconds between two checks of the cancel event, reading a shared event can cost a round trip to another process
+CANCEL_CHECK_INTERVAL = 0.05
+
+class StoppingPolicy:
+    '''decides after every iteration whether the run stops, every limit is optional
+
+    time_budget is in seconds from start(), the run stops early when the next iteration is expected
+    to end after the budget, an evaluation is the scoring of one candidate solution, the run
+    stagnates when the best fitness improved by no more than min_improvement in the last patience
+    iterations, cancel is any object with is_set (eg a multiprocessing Event), at least one iteration is always run'''
+    def __init__(self, max_iteration: int = None, time_budget: float = None, max_evaluations: int = None, patience: int = None, min_improvement: float = 0, target: float = None, cancel=None):
+        self.max_iteration = max_iteration
+        self.time_budget = time_budget
+        self.max_evaluations = max_evaluations
+        self.patience = patience
+        self.min_improvement = min_improvement
+        self.target = target
+        self.cancel = cancel
+
+        # why the run stopped, None while it is running
+        self.reason: str = None
+        self.start_time: float = None
+        self.last_check: float = None
+        self.last_cancel_check: float = None
+        # best fitness after each of the last patience + 1 iterations, by iteration number
+        self.best_by_iteration: dict[int, float] = dict()
+
+    def settings(self) -> dict:
+        '''the limits of the policy, saved with the solution'''
+        return {
+            "max_iteration": self.max_iteration,
+            "time_budget": self.time_budget,
+            "max_evaluations": self.max_evaluations,
+            "patience": self.patience,
+            "min_improvement": self.min_improvement,
+            "target": self.target,
+        }
+
+    def start(self, elapsed: float = 0):
+        '''start the clock of the time budget, elapsed is the time already spent by a resumed run'''
+        self.reason = None
+        self.best_by_iteration = dict()
+        self.start_time = self.last_check = self.last_cancel_check = time.perf_counter()
+        self.start_time -= elapsed
+
+    def checkpoint_state(self) -> dict:
+        '''the time spent and the stagnation window as arrays, saved with a checkpoint (see checkpoint.py)'''
+        return {
+            "elapsed": np.array(self.elapsed),
+            "stagnation_iterations": np.array(list(self.best_by_iteration), dtype=np.int64),
+            "stagnation_best": np.array(list(self.best_by_iteration.values()), dtype=float),
+        }
+
+    def resume(self, state: dict):
+        '''start the clock of a resumed run, the time spent and the stagnation window carry on from the checkpoint_state'''
+        self.start(elapsed=float(state["elapsed"]))
+        # checkpoints written before the window was saved start with an empty one
+        if "stagnation_iterations" in state:
+            self.best_by_iteration = dict(zip(state["stagnation_iterations"].tolist(), state["stagnation_best"].tolist()))
+
+    def should_stop(self, iteration: int, evaluations: int, best_fit: list[float]) -> bool:
+        '''whether to stop after the given number of completed iterations, sets the reason when it does
+
+        only the last value of best_fit is read, the stagnation is counted in iterations whatever
+        the number of values an algorithm appends to its history per iteration'''
+        if self.start_time is None:
+            self.start()
+        if iteration == 0:
+            return False
+        if self.patience is not None:
+            self.best_by_iteration[iteration] = best_fit[-1]
+            self.best_by_iteration.pop(iteration - self.patience - 1, None)
+
+        now = time.perf_counter()
+        iteration_time = now - self.last_check
+        self.last_check = now
+
+        if self.cancel is not None and now - self.last_cancel_check >= CANCEL_CHECK_INTERVAL:
+            self.last_cancel_check = now
+            if self.cancel.is_set():
+                self.reason = CANCELLED
+                return True
+
+        if self.target is not None and best_fit[-1] >= self.target:
+            self.reason = TARGET
+        elif self.max_iteration is not None and iteration >= self.max_iteration:
+            self.reason = MAX_ITERATION
+        elif self.time_budget is not None and now - self.start_time + iteration_time > self.time_budget:
+            self.reason = TIME_BUDGET
+        elif self.max_evaluations is not None and evaluations >= self.max_evaluations:
+            self.reason = EVALUATION_BUDGET
+        elif self.patience is not None and iteration - self.patience in self.best_by_iteration and best_fit[-1] - self.best_by_iteration[iteration - self.patience] <= self.min_improvement:
+            self.reason = STAGNATION
+
+        return self.reason is not None
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start_time
@@ -0,0 +1,221 @@
+'''progress telemetry of the metaheuristics
+
+GA, SA and ACO report every iteration and every event (eg a new best solution) to a telemetry sink
+instead of printing, the sink decides what is kept, printed or written
+
+example:
+    run(members, tasks, project, telemetry=MultiTelemetry(ConsoleTelemetry(every=50), JsonlTelemetry("run.jsonl")))'''
+from abc import ABC, abstractmethod
+from collections import deque
+import csv, json, time
+
+class Telemetry(ABC):
+    '''base telemetry sink, every record is a dict passed to emit'''
+    # False when every record is dropped, so the caller can skip work that only feeds the telemetry
+    enabled = True
+
+    def __init__(self):
+        self.start = time.perf_counter()
+
+    def iteration(self, algorithm: str, iteration: int, average: float, best: float, **fields):
+        '''report the fitness at the end of an iteration'''
+        self.emit({
+            "algorithm": algorithm,
+            "iteration": int(iteration),
+            "elapsed": time.perf_counter() - self.start,
+            "average": float(average),
+            "best": float(best),
+            **fields,
+        })
+
+    def event(self, algorithm: str, iteration: int, name: str, **fields):
+        '''report something that happened during an iteration, eg "new best"'''
+        self.emit({
+            "algorithm": algorithm,
+            "iteration": int(iteration),
+            "elapsed": time.perf_counter() - self.start,
+            "event": name,
+            **fields,
+        })
+
+    @abstractmethod
+    def emit(self, record: dict):
+        '''keep, print or write one record'''
+
+    def close(self):
+        pass
+
+    def __enter__(self) -> 'Telemetry':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class NullTelemetry(Telemetry):
+    '''drops every record, used by the benchmarks'''
+    enabled = False
+
+    def iteration(self, algorithm: str, iteration: int, average: float, best: float, **fields):
+        pass
+
+    def event(self, algorithm: str, iteration: int, name: str, **fields):
+        pass
+
+    def emit(self, record: dict):
+        pass
+
+class ConsoleTelemetry(Telemetry):
+    '''prints the iterations to the terminal
+
+    only every n-th iteration is printed, and at most one iteration per interval seconds,
+    events are printed when events is True, list and dict fields (eg a whole solution) are not printed'''
+    def __init__(self, every: int = 1, interval: float = 0, events: bool = True):
+        super().__init__()
+        self.every = every
+        self.interval = interval
+        self.events = events
+        self.last_print = float("-inf")
+
+    def iteration(self, algorithm: str, iteration: int, average: float, best: float, **fields):
+        if iteration % self.every != 0:
+            return
+        now = time.perf_counter()
+        if now - self.last_print < self.interval:
+            return
+        self.last_print = now
+        super().iteration(algorithm, iteration, average, best, **fields)
+
+    def event(self, algorithm: str, iteration: int, name: str, **fields):
+        if self.events:
+            super().event(algorithm, iteration, name, **fields)
+
+    def emit(self, record: dict):
+        extra = " | ".join(
+            f"{key}: {value:.8g}" if isinstance(value, float) else f"{key}: {value}"
+            for key, value in record.items()
+            if key not in ("algorithm", "iteration", "elapsed", "average", "best", "event") and not isinstance(value, (list, dict))
+        )
+        if "event" in record:
+            line = f"{record['algorithm']} | Iteration {record['iteration']} | {record['event']}"
+        else:
+            line = f"{record['algorithm']} | Iteration {record['iteration']} | Average fitness: {record['average']:.4f} | Best fit: {record['best']:.4f}"
+        print(f"{line} | {extra}" if extra else line)
+
+class RingBufferTelemetry(Telemetry):
+    '''keeps the last size records in memory'''
+    def __init__(self, size: int = 1000):
+        super().__init__()
+        self.records: deque = deque(maxlen=size)
+
+    def emit(self, record: dict):
+        self.records.append(record)
+
+class JsonlTelemetry(Telemetry):
+    '''streams every record to a json lines file'''
+    def __init__(self, path: str):
+        super().__init__()
+        self.file = open(path, "w")
+
+    def emit(self, record: dict):
+        self.file.write(json.dumps(record))
+        self.file.write("\n")
+
+    def close(self):
+        self.file.close()
+
+class CsvTelemetry(Telemetry):
+    '''streams the iteration records to a csv file, events are not written
+
+    the columns are taken from the first iteration record'''
+    def __init__(self, path: str):
+        super().__init__()
+        self.file = open(path, "w", newline="")
+        self.writer: csv.DictWriter = None
+
+    def event(self, algorithm: str, iteration: int, name: str, **fields):
+        pass
+
+    def emit(self, record: dict):
+        if self.writer is None:
+            self.writer = csv.DictWriter(self.file, fieldnames=list(record), extrasaction="ignore")
+            self.writer.writeheader()
+        self.writer.writerow(record)
+
+    def close(self):
+        self.file.close()
+
+class QueueTelemetry(Telemetry):
+    '''puts the records on a queue, eg a multiprocessing queue read by another process
+
+    fields are added to every record, the iterations are throttled like ConsoleTelemetry,
+    only the named events are sent when events is given'''
+    def __init__(self, queue, fields: dict = None, every: int = 1, interval: float = 0, events: tuple = None):
+        super().__init__()
+        self.queue = queue
+        self.fields: dict = fields or dict()
+        self.every = every
+        self.interval = interval
+        self.events = events
+        self.last_put = float("-inf")
+
+    def iteration(self, algorithm: str, iteration: int, average: float, best: float, **fields):
+        if iteration % self.every != 0:
+            return
+        now = time.perf_counter()
+        if now - self.last_put < self.interval:
+            return
+        self.last_put = now
+        super().iteration(algorithm, iteration, average, best, **fields)
+
+    def event(self, algorithm: str, iteration: int, name: str, **fields):
+        if self.events is None or name in self.events:
+            super().event(algorithm, iteration, name, **fields)
+
+    def emit(self, record: dict):
+        self.queue.put({**record, **self.fields})
+
+class MultiTelemetry(Telemetry):
+    '''sends every record to each of the sinks'''
+    def __init__(self, *sinks: Telemetry):
+        super().__init__()
+        self.sinks = sinks
+        self.enabled = any(s.enabled for s in sinks)
+
+    def iteration(self, algorithm: str, iteration: int, average: float, best: float, **fields):
+        for s in self.sinks:
+            s.iteration(algorithm, iteration, average, best, **fields)
+
+    def event(self, algorithm: str, iteration: int, name: str, **fields):
+        for s in self.sinks:
+            s.event(algorithm, iteration, name, **fields)
+
+    def emit(self, record: dict):
+        for s in self.sinks:
+            s.emit(record)
+
+    def close(self):
+        for s in self.sinks:
+            s.close()
+
+def from_spec(spec: str) -> Telemetry:
+    '''create a sink from a command line spec
+
+    "none", "console", "console:<every>", "ring:<size>", "jsonl:<path>" or "csv:<path>",
+    several specs are separated by commas'''
+    sinks = list()
+    for part in spec.split(","):
+        kind, _, arg = part.partition(":")
+        if kind == "none":
+            sinks.append(NullTelemetry())
+        elif kind == "console":
+            sinks.append(ConsoleTelemetry(every=int(arg) if arg else 1))
+        elif kind == "ring":
+            sinks.append(RingBufferTelemetry(int(arg) if arg else 1000))
+        elif kind == "jsonl":
+            sinks.append(JsonlTelemetry(arg))
+        elif kind == "csv":
+            sinks.append(CsvTelemetry(arg))
+        else:
+            raise ValueError(f"unknown telemetry sink {kind!r}")
+
+    return sinks[0] if len(sinks) == 1 else MultiTelemetry(*sinks)
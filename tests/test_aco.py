@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from ACO import PheromoneACO
+from microbenchmark import synthetic_problem
+from problem_instance import ProblemInstance
+
+@pytest.fixture(scope="module")
+def instance():
+    members, tasks, initial_formation, _ = synthetic_problem(12, 25, 4, seed=5)
+    return ProblemInstance.from_models(members, tasks, initial_formation.collaboration)
+
+def feasible_colony(instance: ProblemInstance, seed: int) -> PheromoneACO:
+    '''a colony where every task can only be given to a few members, the others have no pheromone'''
+    aco = PheromoneACO(instance, population=200, seed=seed)
+    rng = np.random.default_rng(seed)
+    aco.pheromone = rng.uniform(0.5, 2, size=aco.pheromone.shape) * (rng.random(aco.pheromone.shape) < 0.2)
+    # the first and the last member of every task are never feasible, the edges of the slices
+    aco.pheromone[:, [0, -1]] = 0
+    aco.pheromone[np.arange(instance.total_tasks), rng.integers(1, instance.total_members - 1, size=instance.total_tasks)] += 1
+    return aco
+
+class HighestDraws:
+    '''a generator whose draws are the largest value below 1, which rounds a draw up to the end of its slice'''
+    def random(self, shape: tuple) -> np.ndarray:
+        return np.full(shape, np.nextafter(1, 0))
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_ants_only_choose_members_with_pheromone(instance, seed):
+    aco = feasible_colony(instance, seed)
+    for _ in range(20):
+        aco.explore()
+        assert (aco.pheromone[np.arange(instance.total_tasks), aco.paths] > 0).all()
+
+def test_draws_at_the_end_of_a_slice_stay_feasible(instance):
+    aco = feasible_colony(instance, 1)
+    aco.rng = HighestDraws()
+    aco.explore()
+    assert (aco.pheromone[np.arange(instance.total_tasks), aco.paths] > 0).all()
+
+def test_members_are_chosen_in_proportion_to_the_pheromone(instance):
+    aco = PheromoneACO(instance, population=20000, seed=4)
+    aco.pheromone[:] = 1
+    aco.pheromone[0, :3] = [6, 3, 1]
+    aco.pheromone[0, 3:] = 0
+    aco.explore()
+    np.testing.assert_allclose(np.bincount(aco.paths[:, 0], minlength=3) / 20000, [0.6, 0.3, 0.1], atol=0.02)
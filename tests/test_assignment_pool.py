@@ -0,0 +1,39 @@
+import pytest
+import ACO, GA, SA
+from microbenchmark import synthetic_problem
+from problem_instance import ProblemInstance
+from telemetry import NullTelemetry
+
+@pytest.fixture
+def problem():
+    members, tasks, initial_formation, _ = synthetic_problem(8, 12, 3, seed=9)
+    instance = ProblemInstance.from_models(members, tasks, initial_formation.collaboration)
+    return members, tasks, initial_formation, instance
+
+def test_instance_builds_the_pool_once(problem):
+    members, tasks, _, instance = problem
+    pool = instance.assignment_pool()
+    assert instance.assignment_pool() is pool
+    instance.bind(members, tasks)
+    assert instance.assignment_pool() is pool
+    # other member objects need other assignments
+    instance.bind(list(members), tasks)
+    assert instance.assignment_pool() is not pool
+
+def test_algorithms_take_the_pool_of_the_instance(problem):
+    members, tasks, initial_formation, instance = problem
+    pool = instance.assignment_pool()
+    assert GA.GeneticAlgoritm(members, tasks, 10, pool=pool).pool is pool
+    assert SA.SimulatedAnnealing(members, tasks, SA.Solution(initial_formation.assignments), pool=pool).pool is pool
+    colony = ACO.ACO(members, tasks, population=5, pool=pool)
+    assert colony.pool is pool
+    assert all(n is a for n, a in zip(colony.path_nodes, pool))
+
+@pytest.mark.parametrize("mh_func, options", [(GA, dict(use_batch=True)), (SA, dict(use_batch=True)), (ACO, dict(use_batch=True))])
+def test_runs_sharing_a_pool_do_not_affect_each_other(mh_func, options, problem):
+    members, tasks, initial_formation, instance = problem
+    results = [
+        mh_func.run(members, tasks, initial_formation, 15, enable_visuals=False, seed=3, telemetry=NullTelemetry(), instance=instance, save=False, **options)
+        for _ in range(2)
+    ]
+    assert results[0] == results[1]
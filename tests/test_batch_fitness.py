@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from fitness_checker import baseline_vector, check_fitness, check_fitness_batch, evaluate_population
+from microbenchmark import synthetic_problem
+from models.collaboration import SparseCollaborationMatrix
+from models.project import Project
+from problem_instance import ProblemInstance
+
+TOLERANCE = 1e-9
+
+def problem(collaboration: str, seed: int) -> tuple:
+    members, tasks, initial_formation, _ = synthetic_problem(30, 40, 6, seed=seed)
+    if collaboration != "dense":
+        # a sparse matrix that keeps only part of the pairs, the others score the default
+        scores = initial_formation.collaboration.scores * (np.random.default_rng(seed).random((40, 40)) < 0.3)
+        default = 2.5 if collaboration == "sparse with default" else 0
+        initial_formation = Project(initial_formation.name, initial_formation.assignments, SparseCollaborationMatrix.from_dense(scores, default))
+    instance = ProblemInstance.from_models(members, tasks, initial_formation.collaboration)
+    return instance, initial_formation
+
+@pytest.mark.parametrize("collaboration", ["dense", "sparse", "sparse with default"])
+@pytest.mark.parametrize("seed", [1, 2])
+def test_batch_matches_check_fitness(collaboration: str, seed: int):
+    instance, initial_formation = problem(collaboration, seed)
+    assert instance.sparse_collaboration == (collaboration != "dense")
+    rng = np.random.default_rng(seed)
+    population = rng.integers(instance.total_members, size=(60, instance.total_tasks))
+    # small teams, down to a single member
+    population[:10] = rng.integers(3, size=(10, instance.total_tasks))
+    population[10] = 7
+
+    improvements, fitness = check_fitness_batch(population, instance, baseline_vector(initial_formation))
+    expected = [check_fitness(instance.decode(row), initial_formation) for row in population]
+
+    assert improvements.shape == (60, 6)
+    np.testing.assert_allclose(fitness, expected, rtol=0, atol=TOLERANCE)
+    np.testing.assert_allclose(evaluate_population(population, instance, baseline_vector(initial_formation)), expected, rtol=0, atol=TOLERANCE)
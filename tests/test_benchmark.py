@@ -0,0 +1,43 @@
+import csv
+import numpy as np
+import pytest
+import performance_check
+import setup
+from data.instance_generator import generate
+
+def read_csv(path) -> list[list[str]]:
+    with open(path, newline="") as f:
+        return list(csv.reader(f))
+
+def test_benchmark_results_are_averaged_by_iteration(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    results = [
+        (0.5, 100, 0.6, [1.0, 2.0], [3.0, 4.0]),
+        (0.7, 300, 0.8, [3.0, 4.0], [5.0, 6.0]),
+    ]
+    performance_check.save_benchmark("GA", "scenario", results)
+
+    resources = read_csv(tmp_path / "data/pc_resources/scenario/GA.csv")
+    assert resources[0] == ["CPU Time", "Memory Usage", "Elapsed Time"]
+    assert [[float(x) for x in row] for row in resources[1:]] == [[0.5, 100, 0.6], [0.7, 300, 0.8]]
+    fitness = read_csv(tmp_path / "data/fitness/scenario/GA.csv")
+    assert fitness[0] == ["Average Best Fitness", "Grand Average Fitness"]
+    assert [[float(x) for x in row] for row in fitness[1:]] == [[4.0, 2.0], [5.0, 3.0]]
+
+@pytest.mark.parametrize("shared", [False, True])
+def test_parallel_jobs_match_the_jobs_run_in_process(tmp_path, monkeypatch, shared):
+    staff_path, task_path = generate(str(tmp_path / "instance"), members=15, tasks=6, skills=12, seed=2)
+    setup.load(staff_path, task_path)
+    setup.build_scenarios()
+    monkeypatch.chdir(tmp_path)
+
+    options = {"GA": {"engine": "array", "population": 20}}
+    performance_check.benchmark_parallel(["GA"], [0], [1, 2], max_iteration=3, max_workers=2, shared=shared, options=options)
+
+    expected = [performance_check.run_benchmark_job("GA", 0, seed, 3, options=options["GA"]) for seed in (1, 2)]
+    fitness = read_csv(tmp_path / f"data/fitness/{setup.projects[0].name}/GA.csv")
+    np.testing.assert_allclose(
+        [[float(x) for x in row] for row in fitness[1:]],
+        np.column_stack([np.mean([r[4] for r in expected], axis=0), np.mean([r[3] for r in expected], axis=0)]),
+    )
+    assert len(read_csv(tmp_path / f"data/pc_resources/{setup.projects[0].name}/GA.csv")) == 3
@@ -0,0 +1,66 @@
+import pytest
+import ACO, GA, SA
+from checkpoint import Checkpointer
+from microbenchmark import synthetic_problem
+from stopping import STAGNATION, StoppingPolicy
+from telemetry import NullTelemetry, RingBufferTelemetry
+
+CASES = [
+    (GA, dict(engine="object")),
+    (GA, dict(engine="array")),
+    (SA, dict(use_delta=False)),
+    (SA, dict(use_delta=True)),
+    (ACO, dict(engine="node")),
+    (ACO, dict(engine="matrix")),
+]
+
+@pytest.fixture(scope="module")
+def problem():
+    members, tasks, initial_formation, _ = synthetic_problem(12, 25, 4, seed=5)
+    return members, tasks, initial_formation
+
+def run(mh_func, problem, max_iteration: int, options: dict, **kwargs) -> tuple:
+    members, tasks, initial_formation = problem
+    sink = RingBufferTelemetry(1)
+    average_fit, best_fit = mh_func.run(
+        members, tasks, initial_formation, max_iteration, enable_visuals=False, telemetry=sink, save=False, **options, **kwargs,
+    )
+    return average_fit, best_fit, sink.records[-1]["solution"]["members"]
+
+@pytest.mark.parametrize("mh_func, options", CASES, ids=lambda case: getattr(case, "__name__", None) or str(case))
+def test_resumed_run_matches_uninterrupted_run(mh_func, options, problem, tmp_path):
+    path = str(tmp_path / "run.npz")
+    uninterrupted = run(mh_func, problem, 30, options, seed=5)
+
+    checkpointer = Checkpointer(path, every=20)
+    run(mh_func, problem, 20, options, seed=5, checkpointer=checkpointer)
+    assert checkpointer.written == 1
+    # the random states come from the checkpoint, not from the seed
+    resumed = run(mh_func, problem, 30, options, seed=999, resume=path)
+
+    assert resumed == uninterrupted
+
+def test_resume_rejects_another_algorithm(problem, tmp_path):
+    path = str(tmp_path / "sa.npz")
+    run(SA, problem, 20, dict(), seed=5, checkpointer=Checkpointer(path, every=20))
+    with pytest.raises(ValueError):
+        run(GA, problem, 30, dict(), resume=path)
+
+@pytest.mark.parametrize("mh_func, options", CASES, ids=lambda case: getattr(case, "__name__", None) or str(case))
+def test_resumed_run_keeps_the_stagnation_window(mh_func, options, problem, tmp_path):
+    path = str(tmp_path / "run.npz")
+    patience = 10
+    policy = StoppingPolicy(max_iteration=500, patience=patience)
+    uninterrupted = run(mh_func, problem, 500, options, seed=5, stopping=policy)
+    assert policy.reason == STAGNATION
+    # the checkpoint is taken while the iteration the run stagnates against is still in the window
+    stopped = len(uninterrupted[0])
+    every = stopped - patience // 2
+
+    checkpointer = Checkpointer(path, every=every)
+    run(mh_func, problem, every, options, seed=5, checkpointer=checkpointer, stopping=StoppingPolicy(max_iteration=every, patience=patience))
+    resumed_policy = StoppingPolicy(max_iteration=500, patience=patience)
+    resumed = run(mh_func, problem, 500, options, seed=999, resume=path, stopping=resumed_policy)
+
+    assert resumed_policy.reason == STAGNATION
+    assert resumed == uninterrupted
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from microbenchmark import synthetic_problem
+from models.collaboration import CollaborationMatrix, SparseCollaborationMatrix
+from models.project import Project
+
+def scored_members(seed: int) -> tuple:
+    '''members of a synthetic problem with their own collaboration_scores, and the initial formation'''
+    members, _, initial_formation, _ = synthetic_problem(20, 15, 6, seed=seed)
+    scores = initial_formation.collaboration.scores
+    for m in members:
+        for other_member in members:
+            if other_member is not m:
+                m.add_score(other_member, scores[m.id, other_member.id])
+    return members, initial_formation
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_matrix_collab_score_matches_the_member_scores(seed: int):
+    members, initial_formation = scored_members(seed)
+    matrix = CollaborationMatrix.from_members(members)
+    np.testing.assert_allclose(matrix.scores[~np.eye(len(members), dtype=bool)], initial_formation.collaboration.scores[~np.eye(len(members), dtype=bool)])
+
+    with_matrix = Project("matrix", initial_formation.assignments, matrix)
+    with_dicts = Project("dicts", initial_formation.assignments)
+    assert with_matrix.collab_score == pytest.approx(with_dicts.collab_score, abs=1e-12)
+
+def test_team_keeps_its_average_up_to_date():
+    members, initial_formation = scored_members(4)
+    matrix = initial_formation.collaboration
+    rng = np.random.default_rng(4)
+    team = matrix.team([0, 1])
+    for _ in range(50):
+        member_id = int(rng.integers(len(members)))
+        if member_id in team.members and len(team.members) > 1:
+            team.remove(member_id)
+        elif member_id not in team.members:
+            team.add(member_id)
+        assert team.average == pytest.approx(matrix.team_average(team.members), abs=1e-9)
+
+def test_team_average_of_small_teams():
+    matrix = CollaborationMatrix(np.array([[0, 4], [2, 0]]))
+    assert matrix.team_average([]) == 0
+    assert matrix.team_average([1]) == 0
+    assert matrix.team_average([0, 1]) == 3
+
+def sparse_and_dense(seed: int, default: float) -> tuple:
+    '''the same ratings as a SparseCollaborationMatrix and as a CollaborationMatrix where a missing rating scores the default'''
+    rng = np.random.default_rng(seed)
+    scores = rng.uniform(1, 5, size=(40, 40)) * (rng.random((40, 40)) < 0.15)
+    np.fill_diagonal(scores, 0)
+    dense = CollaborationMatrix(np.where(scores == 0, default, scores))
+    return SparseCollaborationMatrix.from_dense(scores, default), dense
+
+@pytest.mark.parametrize("default", [0, 2.5])
+@pytest.mark.parametrize("seed", [1, 2])
+def test_sparse_matrix_agrees_with_the_dense_matrix(default: float, seed: int):
+    sparse, dense = sparse_and_dense(seed, default)
+    rng = np.random.default_rng(seed)
+    for size in (0, 1, 2, 5, 17, 40):
+        ids = rng.choice(40, size=size, replace=False).tolist()
+        assert sparse.team_average(ids) == pytest.approx(dense.team_average(ids), abs=1e-9)
+        assert sparse.pair_sum(ids) == pytest.approx(dense.pair_sum(ids), abs=1e-9)
+        for member_id in ids[:3]:
+            assert sparse.member_sum(member_id, ids) == pytest.approx(dense.member_sum(member_id, [i for i in ids if i != member_id]), abs=1e-9)
+
+    present = rng.random((30, 40)) < 0.2
+    expected = [dense.pair_sum(np.flatnonzero(row)) for row in present]
+    np.testing.assert_allclose(sparse.pair_sums(present), expected, atol=1e-9)
+
+def test_sparse_subset_keeps_the_pair_scores():
+    sparse, dense = sparse_and_dense(3, 2.5)
+    ids = [31, 4, 17, 8, 22]
+    subset = sparse.subset(ids)
+    assert subset.size == len(ids)
+    assert subset.team_average(range(len(ids))) == pytest.approx(dense.team_average(ids), abs=1e-9)
+    assert subset.pair_sum([0, 2]) == pytest.approx(dense.pair_scores[31, 17], abs=1e-9)
+
+def test_sparse_team_keeps_its_average_up_to_date():
+    sparse, dense = sparse_and_dense(4, 1.0)
+    team = sparse.team([3, 9, 27])
+    team.add(11)
+    team.remove(9)
+    assert team.average == pytest.approx(dense.team_average([3, 27, 11]), abs=1e-9)
@@ -0,0 +1,34 @@
+import random
+import pytest
+import fitness_checker
+from microbenchmark import synthetic_problem
+from problem_instance import ProblemInstance
+from SA import SimulatedAnnealing, Solution
+
+@pytest.mark.parametrize("temperature", [20000, 0.2])
+def test_delta_evaluation_uses_the_cache(temperature: float):
+    '''the delta evaluation of SA reads and fills the cache, a high temperature changes enough
+    tasks to take the full evaluation fallback, a low one scores the changes'''
+    members, tasks, initial_formation, _ = synthetic_problem(20, 30, 5, seed=2)
+    instance = ProblemInstance.from_models(members, tasks, initial_formation.collaboration)
+    sa = SimulatedAnnealing(members, tasks, Solution(initial_formation.assignments), initial_temperature=temperature, total_neighbour=20)
+    sa.evaluator = fitness_checker.IncrementalFitness(
+        instance, fitness_checker.baseline_vector(initial_formation), instance.encode(initial_formation.assignments)
+    )
+    sa.cache = fitness_checker.FitnessCache(1000)
+
+    random.seed(2)
+    sa.create_neighbour_solution()
+    sa.evaluate_solution(initial_formation, instance)
+    assert sa.cache.misses == len(sa.neighbours) - sa.cache.hits
+    assert len(sa.cache) > 0
+
+    fitness = [n.fitness for n in sa.neighbours]
+    hits = sa.cache.hits
+    for n in sa.neighbours:
+        n.fitness = None
+    sa.evaluate_solution(initial_formation, instance)
+    assert sa.cache.hits == hits + len(sa.neighbours)
+    assert [n.fitness for n in sa.neighbours] == fitness
+    for n in sa.neighbours:
+        assert n.fitness == pytest.approx(fitness_checker.check_fitness(n.states, initial_formation), abs=1e-9)
@@ -0,0 +1,61 @@
+import json
+import pytest
+import GA
+import fitness_checker
+from microbenchmark import synthetic_problem
+from models.project import Project
+from telemetry import RingBufferTelemetry
+
+@pytest.fixture(scope="module")
+def problem():
+    members, tasks, initial_formation, _ = synthetic_problem(12, 25, 4, seed=5)
+    return members, tasks, initial_formation
+
+@pytest.mark.parametrize("engine", ["object", "array"])
+def test_population_and_rates_are_run_parameters(engine, problem):
+    members, tasks, initial_formation = problem
+    sink = RingBufferTelemetry()
+    GA.run(
+        members, tasks, initial_formation, 5, enable_visuals=False, engine=engine, seed=1, telemetry=sink, save=False,
+        population=30, mutation=0.2, cross_over=0.7,
+    )
+
+    iterations = [r for r in sink.records if "event" not in r]
+    assert len(iterations) == 5
+    assert all(r["population"] == 30 for r in iterations)
+    stopped = next(r for r in sink.records if r.get("event") == "stopped")
+    # the first generation scores the whole population
+    assert 30 <= stopped["evaluations"] <= 5 * 30
+    params = next(r for r in sink.records if r.get("event") == "solution")["solution"]["params"]
+    assert (params["population"], params["mutation"], params["cross_over"]) == (30, 0.2, 0.7)
+
+def test_island_topology():
+    assert GA.island_topology(1) == [[]]
+    assert GA.island_topology(3) == [[1], [2], [0]]
+    assert GA.island_topology(3, "full") == [[1, 2], [0, 2], [0, 1]]
+    assert GA.island_topology(2, [[1], []]) == [[1], []]
+    with pytest.raises(ValueError):
+        GA.island_topology(3, [[1], [0]])
+
+def test_islands_return_the_best_of_every_island(problem, tmp_path, monkeypatch):
+    members, tasks, initial_formation = problem
+    monkeypatch.chdir(tmp_path)
+    sink = RingBufferTelemetry()
+    average_fit, best_fit = GA.run_islands(
+        members, tasks, initial_formation, islands=2, migration_interval=2, migrants=2, population=20,
+        mutation=[0.1, 0.3], max_iteration=6, enable_visuals=False, seed=4, telemetry=sink,
+    )
+
+    assert len(average_fit) == len(best_fit) == 6
+    assert all(later >= earlier for earlier, later in zip(best_fit, best_fit[1:]))
+    islands = [r for r in sink.records if r.get("event") == "island stopped"]
+    assert sorted(r["island"] for r in islands) == [0, 1]
+    stopped = next(r for r in sink.records if r.get("event") == "stopped")
+    assert stopped["best_fitness"] == max(r["best_fitness"] for r in islands) == best_fit[-1]
+
+    with open(tmp_path / f"data/solution/after/{initial_formation.name}/GA.json") as f:
+        record = json.load(f)
+    assert record["params"]["engine"] == "islands"
+    assert record["params"]["mutation"] == [0.1, 0.3]
+    solution = Project.from_record(record, members, tasks, initial_formation.collaboration)
+    assert fitness_checker.check_fitness(solution.assignments, initial_formation) == pytest.approx(best_fit[-1])
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from fitness_checker import IncrementalFitness, baseline_vector, check_fitness
+from microbenchmark import synthetic_problem
+from models.collaboration import SparseCollaborationMatrix
+from models.project import Project
+from problem_instance import ProblemInstance
+
+TOLERANCE = 1e-9
+
+def problem(sparse: bool, seed: int) -> tuple:
+    members, tasks, initial_formation, _ = synthetic_problem(30, 40, 6, seed=seed)
+    if sparse:
+        collaboration = SparseCollaborationMatrix.from_dense(initial_formation.collaboration.scores)
+        initial_formation = Project(initial_formation.name, initial_formation.assignments, collaboration)
+    instance = ProblemInstance.from_models(members, tasks, initial_formation.collaboration)
+    assert instance.sparse_collaboration == sparse
+    return instance, initial_formation
+
+@pytest.mark.parametrize("sparse", [False, True])
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_random_moves_match_check_fitness(sparse: bool, seed: int):
+    '''random moves, scores, commits and rollbacks give the fitness of check_fitness'''
+    instance, initial_formation = problem(sparse, seed)
+    rng = np.random.default_rng(seed)
+    evaluator = IncrementalFitness(instance, baseline_vector(initial_formation), instance.encode(initial_formation.assignments))
+
+    for _ in range(500):
+        task = int(rng.integers(instance.total_tasks))
+        member = int(rng.integers(instance.total_members))
+
+        action = rng.random()
+        if action < 0.2:
+            fitness = evaluator.score(task, member)
+            candidate = list(evaluator.solution)
+            candidate[task] = member
+        else:
+            evaluator.move(task, member)
+            if action < 0.6:
+                evaluator.commit()
+            elif action < 0.7:
+                evaluator.rollback()
+            fitness = evaluator.fitness
+            candidate = evaluator.solution
+
+        assert fitness == pytest.approx(check_fitness(instance.decode(candidate), initial_formation), abs=TOLERANCE)
+
+@pytest.mark.parametrize("sparse", [False, True])
+def test_assign_matches_check_fitness(sparse: bool):
+    instance, initial_formation = problem(sparse, 4)
+    rng = np.random.default_rng(4)
+    evaluator = IncrementalFitness(instance, baseline_vector(initial_formation), instance.encode(initial_formation.assignments))
+
+    for _ in range(20):
+        solution = rng.integers(instance.total_members, size=instance.total_tasks)
+        evaluator.assign(solution)
+        assert evaluator.fitness == pytest.approx(check_fitness(instance.decode(solution), initial_formation), abs=TOLERANCE)
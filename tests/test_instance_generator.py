@@ -0,0 +1,28 @@
+import json
+import numpy as np
+import pytest
+from data.instance_generator import generate, sample_ratings
+
+@pytest.mark.parametrize("members, density", [(1, 1.0), (30, 1.0), (200, 0.05)])
+def test_generated_files(tmp_path, members, density):
+    staff_path, task_path = generate(str(tmp_path), members, 7, 20, seed=3, density=density, chunk_size=8)
+    with open(staff_path) as f:
+        staff = json.load(f)
+    with open(task_path) as f:
+        tasks = json.load(f)
+
+    assert len(staff) == members
+    assert len(tasks) == 7
+    for i, (name, record) in enumerate(staff.items()):
+        assert name == f"staff{i}"
+        assert 1 <= len(record["expertise"]) <= 5
+        rated = [other for other, _ in record["ratings"]]
+        assert i not in rated
+        assert len(rated) == len(set(rated))
+        assert all(0 <= other < members for other in rated)
+        assert all(1 <= score <= 5 for _, score in record["ratings"])
+    if density == 1.0:
+        assert all(len(record["ratings"]) == members - 1 for record in staff.values())
+
+def test_single_member_rates_nobody():
+    assert sample_ratings(np.random.default_rng(0), 0, 1, 1.0) == []
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+import fitness_checker
+import instance_compiler
+import setup
+from data.instance_generator import generate
+from models.project import Project
+from problem_instance import ProblemInstance
+
+def test_instance_hash_does_not_depend_on_the_compiled_format(tmp_path, monkeypatch):
+    staff_path, task_path = generate(str(tmp_path), members=20, tasks=5, skills=15, seed=3)
+    setup.load(staff_path, task_path)
+    record = setup.high_task_load_team().to_record()
+    compiled_key = instance_compiler.source_hash(staff_path, task_path)
+
+    monkeypatch.setattr(instance_compiler, "FORMAT_VERSION", instance_compiler.FORMAT_VERSION + 1)
+    setup.load(staff_path, task_path)
+    assert setup.instance_hash == record["instance"]
+    assert instance_compiler.source_hash(staff_path, task_path) != compiled_key
+    # a solution saved before the format change still loads
+    Project.from_record(record, setup.members, setup.tasks, setup.collaboration, setup.instance_hash)
+
+def test_instance_hash_changes_with_the_files(tmp_path):
+    first = generate(str(tmp_path / "a"), members=20, tasks=5, skills=15, seed=3)
+    second = generate(str(tmp_path / "b"), members=20, tasks=5, skills=15, seed=4)
+    assert instance_compiler.content_hash(*first) != instance_compiler.content_hash(*second)
+
+@pytest.mark.parametrize("density", [1.0, 0.2])
+def test_compiled_instance_matches_the_models(tmp_path, density):
+    staff_path, task_path = generate(str(tmp_path / "json"), members=20, tasks=5, skills=15, seed=3, density=density)
+    setup.load(staff_path, task_path)
+    expected = ProblemInstance.from_models(setup.members, setup.tasks, setup.collaboration)
+
+    compiled_dir = str(tmp_path / "compiled")
+    instance = instance_compiler.load_instance(*setup.sources, compiled_dir=compiled_dir)
+    # the second load opens the same compiled directory
+    assert instance_compiler.load_instance(staff_path, task_path, compiled_dir).source_hash == instance.source_hash
+    assert instance.member_names == [m.name for m in setup.members]
+    np.testing.assert_allclose(instance.compatibility, expected.compatibility)
+    np.testing.assert_allclose(instance.time, expected.time)
+    np.testing.assert_allclose(instance.salary, expected.salary)
+    assert instance.sparse_collaboration == expected.sparse_collaboration
+    solution = np.random.default_rng(0).integers(20, size=(8, 5))
+    baseline = fitness_checker.baseline_vector(setup.low_compatibility_team())
+    np.testing.assert_allclose(
+        fitness_checker.check_fitness_batch(solution, instance, baseline)[1],
+        fitness_checker.check_fitness_batch(solution, expected, baseline)[1],
+    )
@@ -0,0 +1,52 @@
+import json
+import pytest
+import microbenchmark
+from microbenchmark import IMPROVEMENT, REGRESSION, UNCHANGED
+
+ARGS = ["--sizes", "5x8x2", "--filter", "check_fitness", "--repeat", "3", "--warmup", "1", "--min-time", "0.001"]
+
+def result(median: float, q1: float, q3: float) -> dict:
+    return {"median": median, "q1": q1, "q3": q3, "iqr": q3 - q1, "min": q1, "loops": 1, "repeat": 3}
+
+def baseline_file(path, report: dict, median: float) -> str:
+    '''the cases of the report saved with the same median and no spread'''
+    baseline = dict(report, results={key: result(median, median, median) for key in report["results"]})
+    path.write_text(json.dumps(baseline))
+    return str(path)
+
+def test_measure_reports_the_quartiles():
+    measured = microbenchmark.measure(lambda: sum(range(100)), repeat=5, warmup=1, min_time=0.001)
+    assert measured["q1"] <= measured["median"] <= measured["q3"]
+    assert measured["iqr"] == pytest.approx(measured["q3"] - measured["q1"])
+    assert measured["repeat"] == 5 and measured["loops"] >= 1
+
+def test_compare_needs_a_slowdown_beyond_the_spread():
+    baseline = {"results": {"a": result(1.0, 0.9, 1.1), "b": result(1.0, 0.9, 1.1), "c": result(1.0, 0.9, 1.1), "d": result(1.0, 0.9, 1.1)}}
+    report = {"results": {
+        # slower and outside the spread of the baseline
+        "a": result(1.5, 1.4, 1.6),
+        # slower, but the interquartile ranges overlap
+        "b": result(1.5, 1.0, 2.0),
+        "c": result(0.5, 0.4, 0.6),
+        "d": result(1.05, 1.0, 1.1),
+        # not in the baseline
+        "e": result(1.0, 0.9, 1.1),
+    }}
+    comparison = microbenchmark.compare(baseline, report, threshold=0.1)
+    assert {key: status for key, (status, _) in comparison.items()} == {"a": REGRESSION, "b": UNCHANGED, "c": IMPROVEMENT, "d": UNCHANGED}
+    assert comparison["a"][1] == pytest.approx(1.5)
+
+def test_main_returns_1_on_a_regression(tmp_path):
+    saved = str(tmp_path / "report.json")
+    assert microbenchmark.main(ARGS + ["--save", saved]) == 0
+    report = microbenchmark.load(saved)
+    assert list(report["results"]) == ["check_fitness[5x8x2]"]
+
+    assert microbenchmark.main(ARGS + ["--baseline", baseline_file(tmp_path / "fast.json", report, 1e-12)]) == 1
+    assert microbenchmark.main(ARGS + ["--baseline", baseline_file(tmp_path / "slow.json", report, 10.0)]) == 0
+
+def test_baselines_of_another_version_are_rejected(tmp_path):
+    path = tmp_path / "old.json"
+    path.write_text(json.dumps({"version": 0, "results": {}}))
+    with pytest.raises(ValueError):
+        microbenchmark.load(str(path))
@@ -0,0 +1,47 @@
+import random
+import numpy as np
+import pytest
+import setup
+from data.instance_generator import generate
+from models.assignment import Assignment
+from models.member import Member
+from models.skill import Skill
+from models.task import Task
+from problem_instance import ProblemInstance
+
+@pytest.fixture(scope="module")
+def loaded(tmp_path_factory):
+    staff_path, task_path = generate(str(tmp_path_factory.mktemp("instance")), members=15, tasks=6, skills=12, seed=2)
+    setup.load(staff_path, task_path)
+    return setup.members, setup.tasks, setup.skills, setup.collaboration
+
+def test_loaded_ids_are_positions(loaded):
+    members, tasks, skills, _ = loaded
+    assert [m.id for m in members] == list(range(len(members)))
+    assert [t.id for t in tasks] == list(range(len(tasks)))
+    assert sorted(s.id for s in skills) == list(range(len(skills)))
+
+@pytest.mark.parametrize("model", [
+    Skill("python", id=0),
+    Task("backend", set(), id=0),
+    Member("member 0", 3000, 1.0, set(), id=0),
+    Assignment(Task("backend", {Skill("python", id=0)}, id=0), Member("member 0", 3000, 1.0, {Skill("python", id=0)}, id=0)),
+])
+def test_models_have_no_instance_dict(model):
+    assert not hasattr(model, "__dict__")
+    with pytest.raises(AttributeError):
+        model.unknown = 1
+
+def test_encoding_does_not_depend_on_the_ids(loaded):
+    members, tasks, _, collaboration = loaded
+    instance = ProblemInstance.from_models(members, tasks, collaboration)
+    assert instance.ids_are_positions
+    shuffled = members[:]
+    random.Random(1).shuffle(shuffled)
+    by_index = ProblemInstance.from_models(shuffled, tasks, collaboration)
+    assert not by_index.ids_are_positions
+
+    solution = [Assignment(t, random.Random(t.id).choice(members)) for t in tasks]
+    np.testing.assert_array_equal(instance.encode(solution), [a.member.id for a in solution])
+    np.testing.assert_array_equal(by_index.encode(solution), [shuffled.index(a.member) for a in solution])
+    assert [a.member for a in by_index.decode(by_index.encode(solution))] == [a.member for a in solution]
@@ -0,0 +1,64 @@
+import json
+import pytest
+import GA, SA, ACO
+from microbenchmark import synthetic_problem
+from profiler import Profiler, compare_reports, format_comparison, format_report, load_report
+from telemetry import RingBufferTelemetry
+
+@pytest.fixture(scope="module")
+def problem():
+    members, tasks, initial_formation, _ = synthetic_problem(12, 25, 4, seed=5)
+    return members, tasks, initial_formation
+
+def report(algorithm: str, total_time: float, **times) -> dict:
+    phases = {name: {"calls": 1, "time": t, "mean_time": t, "share": t / total_time, "evaluations": 0, "evaluations_per_second": 0.0} for name, t in times.items()}
+    return {"version": 1, "algorithm": algorithm, "total_time": total_time, "memory": False, "phases": phases}
+
+def test_compare_reports():
+    before = report("GA", 4.0, evaluate_chromosome=3.0, produce_bebes=1.0)
+    after = report("GA", 2.0, evaluate_chromosome=1.5, checkpoint=0.5)
+    comparison = compare_reports(before, after)
+
+    assert comparison["algorithm"] == ("GA", "GA")
+    assert list(comparison["phases"]) == ["evaluate_chromosome", "produce_bebes", "checkpoint"]
+    assert comparison["phases"]["evaluate_chromosome"] == {"before": 3.0, "after": 1.5, "ratio": 0.5}
+    # a phase missing on one side has no ratio
+    assert comparison["phases"]["produce_bebes"] == {"before": 1.0, "after": None, "ratio": None}
+    assert comparison["phases"]["checkpoint"] == {"before": None, "after": 0.5, "ratio": None}
+    assert comparison["total"] == {"before": 4.0, "after": 2.0, "ratio": 0.5}
+
+    lines = format_comparison(comparison).splitlines()
+    assert lines[0] == "GA -> GA"
+    assert "x0.50" in lines[1] and lines[2].rstrip().endswith("-")
+    assert lines[-1].lstrip().startswith("total")
+
+@pytest.mark.parametrize("mh_func, options, phases, evaluation", [
+    (GA, {"engine": "array"}, ["evaluate_chromosome", "tournament_selection", "produce_bebes", "telemetry"], "evaluate_chromosome"),
+    (SA, {"use_delta": True}, ["create_neighbour_solution", "evaluate_solution", "decide_solution", "telemetry"], "evaluate_solution"),
+    (ACO, {"engine": "matrix"}, ["explore", "evaluate_fitness", "update_pheromone", "telemetry"], "evaluate_fitness"),
+])
+def test_every_phase_of_an_iteration_is_recorded(problem, tmp_path, mh_func, options, phases, evaluation):
+    members, tasks, initial_formation = problem
+    profiler = Profiler(memory=True)
+    sink = RingBufferTelemetry()
+    mh_func.run(members, tasks, initial_formation, 4, enable_visuals=False, seed=1, telemetry=sink, save=False, profiler=profiler, **options)
+
+    result = profiler.report()
+    assert list(result["phases"]) == phases
+    assert all(p["calls"] == 4 for p in result["phases"].values())
+    assert sum(p["time"] for p in result["phases"].values()) <= result["total_time"]
+    stopped = next(r for r in sink.records if r.get("event") == "stopped")
+    # the evaluations are counted by the evaluation phase only
+    assert sum(p["evaluations"] for p in result["phases"].values()) == result["phases"][evaluation]["evaluations"] == stopped["evaluations"]
+    assert all("peak_memory_kb" in p for p in result["phases"].values())
+
+    path = str(tmp_path / "profile.json")
+    profiler.save(path)
+    assert load_report(path) == json.loads(json.dumps(result))
+    assert format_report(result).startswith(f"{mh_func.__name__} | total")
+
+def test_reports_of_another_version_are_rejected(tmp_path):
+    path = tmp_path / "old.json"
+    path.write_text(json.dumps(dict(report("GA", 1.0), version=0)))
+    with pytest.raises(ValueError):
+        load_report(str(path))
@@ -0,0 +1,35 @@
+import pytest
+import performance_check
+from data.instance_generator import generate
+
+def result(algorithm: str, members: int, tasks: int, population: int, time_per_evaluation: float) -> dict:
+    return {
+        "algorithm": algorithm, "members": members, "tasks": tasks, "size": members * tasks,
+        "population": population, "time_per_evaluation": time_per_evaluation,
+    }
+
+def test_exponents_along_the_size_and_the_population():
+    # time per evaluation grows linearly with the size and with the square root of the population
+    results = [
+        result("GA", members, 10, population, 1e-6 * members * 10 * population ** 0.5)
+        for members in (10, 20, 40)
+        for population in (25, 100)
+    ] + [result("SA", members, 10, None, 1e-6 * (members * 10) ** 2) for members in (10, 20, 40)]
+
+    by_size = performance_check.scaling_exponents(results)
+    assert set(by_size) == {"GA population 25", "GA population 100", "SA"}
+    assert by_size["GA population 25"] == pytest.approx(1)
+    assert by_size["SA"] == pytest.approx(2)
+
+    by_population = performance_check.scaling_exponents(results, size="population")
+    assert set(by_population) == {"GA 10x10", "GA 20x10", "GA 40x10"}
+    assert all(exponent == pytest.approx(0.5) for exponent in by_population.values())
+
+@pytest.mark.parametrize("mh_name, options", [("GA", {"engine": "array"}), ("ACO", {"engine": "matrix"})])
+def test_scaling_job_runs_with_the_population(mh_name, options, tmp_path):
+    staff_path, task_path = generate(str(tmp_path), members=30, tasks=8, skills=20, seed=2, density=0.3)
+    record = performance_check.run_scaling_job(mh_name, staff_path, task_path, seed=1, max_evaluations=100, options=options, population=20)
+
+    assert (record["members"], record["tasks"], record["population"]) == (30, 8, 20)
+    # the budget is checked after every iteration, which scores at most 20 solutions
+    assert 100 <= record["evaluations"] < 120
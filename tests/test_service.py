@@ -0,0 +1,71 @@
+import asyncio, threading
+import pytest
+import setup
+from data.instance_generator import generate
+from service import LoadedInstance, OptimisationService, ServiceClient
+from stopping import CANCELLED, MAX_ITERATION
+
+@pytest.fixture(scope="module")
+def instance(tmp_path_factory):
+    staff_path, task_path = generate(str(tmp_path_factory.mktemp("instance")), members=15, tasks=6, skills=12, seed=2)
+    return {"staff": staff_path, "task": task_path}
+
+@pytest.fixture
+def socket_path(instance, tmp_path):
+    '''the unix socket of a service running on its own event loop thread'''
+    path = str(tmp_path / "team.sock")
+    service = OptimisationService(max_workers=2, preload=[instance])
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    asyncio.run_coroutine_threadsafe(service.start(path), loop).result(timeout=60)
+    yield path
+
+    asyncio.run_coroutine_threadsafe(service.close(), loop).result(timeout=60)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+def test_loaded_instance_leaves_the_setup_data(instance, tmp_path):
+    other = generate(str(tmp_path / "other"), members=10, tasks=4, skills=8, seed=3)
+    setup.load(*other)
+    loaded = LoadedInstance(instance["staff"], instance["task"])
+
+    assert setup.sources == other
+    assert len(setup.members) == 10
+    assert len(loaded.members) == 15 and len(loaded.tasks) == 6
+    assert [p.name for p in loaded.projects] == ["low compatibility team", "big size team", "high task load team", "low collab team"]
+    assert all(a.member in loaded.members for p in loaded.projects for a in p.assignments)
+
+def test_jobs_stream_their_progress_and_can_be_cancelled(instance, socket_path):
+    with ServiceClient(socket_path, timeout=60) as client:
+        progress = list()
+        result = client.run(
+            {"algorithm": "GA", "instance": instance, "scenario": "big size team", "budget": {"max_iteration": 20}, "options": {"engine": "array"}, "seed": 1},
+            progress=progress.append,
+        )
+        assert result["event"] == "done"
+        assert result["reason"] == MAX_ITERATION
+        assert result["iteration"] == 20
+        assert len(result["solution"]["members"]) == 6
+        iterations = [r for r in progress if r["event"] == "progress"]
+        assert iterations[0]["iteration"] == 1 and all(r["job"] == result["job"] for r in progress)
+        assert progress[-1]["event"] == "stopped"
+
+        job_id = client.submit({"algorithm": "SA", "instance": instance, "budget": {"max_iteration": 10 ** 7, "time_budget": 60}, "options": {"use_delta": True}})
+        replies = client.replies(job_id)
+        # the run has started once its first record arrived
+        assert next(replies)["event"] in ("progress", "new best")
+        client.cancel(job_id)
+        last = list(replies)[-1]
+        assert last["event"] == "cancelled"
+        assert last["reason"] == CANCELLED
+        assert len(last["solution"]["members"]) == 6
+        assert client.status() == dict()
+
+def test_invalid_jobs_are_rejected(instance, socket_path):
+    with ServiceClient(socket_path, timeout=60) as client:
+        with pytest.raises(ValueError):
+            client.submit({"algorithm": "PSO", "instance": instance})
+        with pytest.raises(ValueError):
+            client.submit({"algorithm": "GA", "instance": {"staff": "missing.json", "task": instance["task"]}})
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+import GA, SA, ACO
+import fitness_checker
+import performance_check
+from microbenchmark import synthetic_problem
+from problem_instance import ProblemInstance
+from shared_instance import SharedInstance, attach
+
+@pytest.fixture(scope="module")
+def published():
+    members, tasks, initial_formation, _ = synthetic_problem(12, 25, 4, seed=5)
+    instance = ProblemInstance.from_models(members, tasks, initial_formation.collaboration)
+    baseline = fitness_checker.baseline_vector(initial_formation)
+    with SharedInstance.publish(instance) as shared:
+        yield shared.handle, baseline, instance.encode(initial_formation.assignments)
+
+@pytest.mark.parametrize("mh_func", [GA, SA, ACO])
+def test_array_engines_run_on_an_attached_instance(mh_func, published):
+    handle, baseline, start = published
+    instance = attach(handle)
+    assert instance.collaboration is None
+
+    average_fit, best_fit = mh_func.run_arrays(instance, baseline, start, max_iteration=5, seed=3)
+    assert len(average_fit) == 5
+    assert np.all(np.diff(best_fit) >= 0)
+    # the same seed gives the same run
+    assert mh_func.run_arrays(instance, baseline, start, max_iteration=5, seed=3) == (average_fit, best_fit)
+
+def test_shared_job_ignores_the_engine_options(published):
+    handle, baseline, start = published
+    cpu_time, peak_memory, elapsed_time, average_fit, best_fit = performance_check.run_shared_job(
+        "GA", handle, baseline, start, seed=1, max_iteration=3, options={"engine": "array", "use_batch": True, "population": 20},
+    )
+    assert len(average_fit) == len(best_fit) == 3
+    assert cpu_time >= 0 and elapsed_time > 0
@@ -0,0 +1,55 @@
+import json, pickle
+import pytest
+import setup
+from data.instance_generator import generate
+from models.assignment import Assignment
+from models.project import Project
+
+@pytest.fixture
+def loaded(tmp_path):
+    staff_path, task_path = generate(str(tmp_path / "instance"), members=15, tasks=6, skills=12, seed=2)
+    setup.load(staff_path, task_path)
+    return setup.members, setup.tasks, setup.collaboration, setup.instance_hash
+
+def test_record_round_trip(loaded, tmp_path, monkeypatch):
+    members, tasks, collaboration, instance_hash = loaded
+    monkeypatch.chdir(tmp_path)
+    project = setup.high_task_load_team()
+    record = project.save_project(mh_name="GA", params={"population": 30}, seed=7)
+
+    with open(tmp_path / f"data/solution/after/{project.name}/GA.json") as f:
+        assert json.load(f) == record
+    assert record["members"] == [a.member.id for a in project.assignments]
+    # the task ids are left out when they are the task positions
+    assert "tasks" not in record
+
+    loaded_project = Project.load_project(str(tmp_path / f"data/solution/after/{project.name}/GA.json"), members, tasks, collaboration, instance_hash)
+    assert [(a.task, a.member) for a in loaded_project.assignments] == [(a.task, a.member) for a in project.assignments]
+    assert loaded_project.formation_metrics() == record["metrics"]
+
+def test_record_keeps_the_task_ids_out_of_order(loaded):
+    members, tasks, collaboration, instance_hash = loaded
+    project = Project("reversed", [Assignment(t, members[t.id]) for t in reversed(tasks)], collaboration, instance_hash)
+    record = project.to_record()
+    assert record["tasks"] == [t.id for t in reversed(tasks)]
+    rebuilt = Project.from_record(record, members, tasks, collaboration, instance_hash)
+    assert [a.task for a in rebuilt.assignments] == list(reversed(tasks))
+
+def test_record_of_another_instance_is_rejected(loaded):
+    members, tasks, collaboration, instance_hash = loaded
+    record = setup.big_size_team().to_record()
+    with pytest.raises(ValueError):
+        Project.from_record(dict(record, instance="another"), members, tasks, collaboration, instance_hash)
+    with pytest.raises(ValueError):
+        Project.from_record(dict(record, version=0), members, tasks, collaboration, instance_hash)
+
+def test_pickled_projects_are_still_loaded(loaded, tmp_path):
+    members, tasks, collaboration, instance_hash = loaded
+    project = setup.big_size_team()
+    path = tmp_path / "big size team.pickle"
+    with open(path, "wb") as f:
+        pickle.dump(project, f)
+
+    loaded_project = Project.load_project(str(path), members, tasks, collaboration, instance_hash)
+    assert [(a.task.name, a.member.name) for a in loaded_project.assignments] == [(a.task.name, a.member.name) for a in project.assignments]
+    assert loaded_project.collab_score == pytest.approx(project.collab_score)
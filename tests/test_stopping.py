@@ -0,0 +1,34 @@
+import SA
+from microbenchmark import synthetic_problem
+from stopping import StoppingPolicy, STAGNATION
+from telemetry import NullTelemetry
+
+def test_patience_counts_iterations_not_history_values():
+    policy = StoppingPolicy(patience=3)
+    policy.start()
+    best_fit = list()
+    for iteration in range(1, 4):
+        # two values per iteration, like SA
+        best_fit += [1.0, 1.0]
+        assert not policy.should_stop(iteration, 0, best_fit)
+    best_fit += [1.0, 1.0]
+    assert policy.should_stop(4, 0, best_fit)
+    assert policy.reason == STAGNATION
+
+def test_improvement_resets_patience():
+    policy = StoppingPolicy(patience=2)
+    policy.start()
+    for iteration, best in enumerate([1.0, 1.0, 2.0, 2.0], start=1):
+        assert not policy.should_stop(iteration, 0, [best])
+    assert policy.should_stop(5, 0, [2.0])
+
+def test_sa_runs_at_least_patience_iterations():
+    members, tasks, initial_formation, _ = synthetic_problem(5, 6, 3, seed=1)
+    patience = 40
+    policy = StoppingPolicy(max_iteration=2000, patience=patience)
+    average_fit, best_fit = SA.run(
+        members, tasks, initial_formation, enable_visuals=False, seed=1, telemetry=NullTelemetry(), stopping=policy, save=False,
+    )
+    assert policy.reason == STAGNATION
+    # one average per iteration
+    assert len(average_fit) > patience
@@ -0,0 +1,22 @@
+import queue
+import pytest
+import telemetry
+from telemetry import Telemetry, RingBufferTelemetry, MultiTelemetry, QueueTelemetry
+
+def test_base_sink_cannot_be_created():
+    with pytest.raises(TypeError):
+        Telemetry()
+
+def test_every_sink_implements_emit(tmp_path):
+    sinks = [
+        telemetry.NullTelemetry(),
+        telemetry.ConsoleTelemetry(),
+        RingBufferTelemetry(4),
+        telemetry.JsonlTelemetry(str(tmp_path / "run.jsonl")),
+        telemetry.CsvTelemetry(str(tmp_path / "run.csv")),
+        QueueTelemetry(queue.Queue()),
+    ]
+    with MultiTelemetry(*sinks) as sink:
+        sink.iteration("GA", 1, 0.5, 1.0)
+        sink.event("GA", 1, "new best", previous=0.5, fitness=1.0)
+    assert [r.get("event") for r in sinks[2].records] == [None, "new best"]
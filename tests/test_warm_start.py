@@ -0,0 +1,87 @@
+import random
+import numpy as np
+import pytest
+from microbenchmark import synthetic_problem
+from models.collaboration import SparseCollaborationMatrix
+from models.member import Member
+from problem_instance import ProblemInstance
+from warm_start import InstanceDiff, prepare, update_instance
+
+def with_scores(members: list[Member], seed: int) -> list[Member]:
+    rng = random.Random(seed)
+    for m in members:
+        for other_member in members:
+            if other_member is not m:
+                m.add_score(other_member, rng.randint(0, 5))
+    return members
+
+def copy_members(members: list[Member]) -> list[Member]:
+    '''new member objects with the same fields and scores'''
+    copies = [Member(m.name, m.salary, m.efficiency, set(m.skill_set), id=m.id) for m in members]
+    by_name = {c.name: c for c in copies}
+    for m, c in zip(members, copies):
+        for other_member, score in m.collaboration_scores.items():
+            c.add_score(by_name[other_member.name], score)
+    return copies
+
+def build_instance(members: list[Member], tasks: list, storage: str) -> ProblemInstance:
+    '''instance with dense scores, sparse pair scores or dense pair scores only (like an attached one)'''
+    instance = ProblemInstance.from_models(members, tasks)
+    if storage == "sparse":
+        instance = ProblemInstance.from_models(members, tasks, SparseCollaborationMatrix.from_dense(instance.collaboration))
+    elif storage == "pairs":
+        instance = ProblemInstance(instance.compatibility, instance.time, instance.salary, None, members, tasks, instance.pair_collaboration)
+    return instance
+
+def pair_matrix(instance: ProblemInstance) -> np.ndarray:
+    pairs = instance.pair_collaboration
+    if not instance.sparse_collaboration:
+        return pairs
+    dense = np.full((pairs.size, pairs.size), float(pairs.default))
+    np.fill_diagonal(dense, 0)
+    rows = np.repeat(np.arange(pairs.size), np.diff(pairs.indptr))
+    dense[rows, pairs.indices] = pairs.data
+    return dense
+
+def assert_same_instance(instance: ProblemInstance, expected: ProblemInstance):
+    np.testing.assert_allclose(instance.compatibility, expected.compatibility)
+    np.testing.assert_allclose(instance.time, expected.time)
+    np.testing.assert_allclose(instance.salary, expected.salary)
+    assert instance.sparse_collaboration == expected.sparse_collaboration
+    if expected.collaboration is not None:
+        np.testing.assert_allclose(instance.collaboration, expected.collaboration)
+    np.testing.assert_allclose(pair_matrix(instance), pair_matrix(expected))
+
+@pytest.mark.parametrize("storage", ["dense", "sparse", "pairs"])
+def test_changed_collaboration_scores_are_rebuilt(storage):
+    members, tasks, initial_formation, _ = synthetic_problem(10, 15, 4, seed=7)
+    members = with_scores(members, 7)
+    old_instance = build_instance(members, tasks, storage)
+
+    new_members = copy_members(members)
+    by_name = {m.name: m for m in new_members}
+    new_members[3].add_score(by_name[members[8].name], 5 - members[3].collaboration_scores[members[8]])
+    # an added member rates the changed one and is rated by it and by member 5, which changes too
+    added = Member("member 15", 2000, 1.0, set(members[0].skill_set), id=15)
+    added.add_score(new_members[3], 4)
+    new_members[3].add_score(added, 2)
+    new_members[5].add_score(added, 1)
+    new_members.append(added)
+
+    diff = InstanceDiff.between(members, tasks, new_members, tasks)
+    assert diff.changed_members == [members[3].name, members[5].name]
+    assert diff.added_members == [added.name]
+    expected = build_instance(new_members, tasks, storage)
+    assert_same_instance(update_instance(old_instance, diff, new_members, tasks), expected)
+
+@pytest.mark.parametrize("storage", ["dense", "sparse", "pairs"])
+def test_unchanged_instance_is_copied(storage):
+    members, tasks, initial_formation, solution = synthetic_problem(10, 15, 4, seed=8)
+    members = with_scores(members, 8)
+    old_instance = build_instance(members, tasks, storage)
+    new_members = copy_members(members)
+
+    diff, instance, repaired = prepare(solution, old_instance, new_members, tasks)
+    assert diff.empty
+    assert_same_instance(instance, build_instance(new_members, tasks, storage))
+    assert [a.member.name for a in repaired] == [a.member.name for a in solution]
@@ -0,0 +1,209 @@
+'''warm start re-optimisation after members or tasks of an instance changed
+
+the previous solution is repaired for the changed instance and seeds the GA population,
+the SA state or the ACO pheromone, the arrays of the new instance are built from the old
+ones and only the compatibility of the added and changed tasks and members is computed
+
+example:
+    old_members, old_tasks, old_instance = setup.members, setup.tasks, instance
+    setup.load(new_staff_path, new_task_path)
+    diff, instance, seed = prepare(previous.assignments, old_instance, setup.members, setup.tasks, setup.collaboration)
+    formation = Project("replan", seed, setup.collaboration, setup.instance_hash)
+    GA.run(setup.members, setup.tasks, formation, engine="array", instance=instance, warm_start=seed)'''
+from models.assignment import Assignment
+from models.member import Member
+from models.task import Task
+from models.collaboration import CollaborationMatrix, SparseCollaborationMatrix
+from problem_instance import ProblemInstance
+from instance_compiler import skill_matrix
+import numpy as np
+
+def _member_key(m: Member) -> tuple:
+    scores = frozenset((other_member.name, score) for other_member, score in m.collaboration_scores.items())
+    return (frozenset(s.name for s in m.skill_set), m.salary, m.efficiency, scores)
+
+def _task_key(t: Task) -> frozenset:
+    return frozenset(s.name for s in t.skills)
+
+def _source(old: list, new: list, key) -> tuple:
+    '''position in old of every unchanged item of new (-1 otherwise), and the added, changed and removed names'''
+    old_position = {item.name: i for i, item in enumerate(old)}
+    source = np.full(len(new), -1, dtype=np.intp)
+    added, changed = list(), list()
+    for i, item in enumerate(new):
+        j = old_position.get(item.name)
+        if j is None:
+            added.append(item.name)
+        elif key(old[j]) != key(item):
+            changed.append(item.name)
+        else:
+            source[i] = j
+
+    new_names = {item.name for item in new}
+    removed = [item.name for item in old if item.name not in new_names]
+    return source, added, changed, removed
+
+class InstanceDiff:
+    '''differences between two versions of an instance, members and tasks are matched by name
+
+    a member changed when its skills, salary, efficiency or the collaboration scores it gave changed,
+    a task when its skills changed,
+    member_source and task_source give the position in the old instance of every unchanged member
+    and task of the new one, -1 for the added and changed ones'''
+    def __init__(self, member_source: np.ndarray, task_source: np.ndarray, members: tuple, tasks: tuple):
+        self.member_source = member_source
+        self.task_source = task_source
+        # names of the added, changed and removed members and tasks
+        self.added_members, self.changed_members, self.removed_members = members
+        self.added_tasks, self.changed_tasks, self.removed_tasks = tasks
+
+    @classmethod
+    def between(cls, old_members: list[Member], old_tasks: list[Task], members: list[Member], tasks: list[Task]) -> 'InstanceDiff':
+        member_source, *member_names = _source(old_members, members, _member_key)
+        task_source, *task_names = _source(old_tasks, tasks, _task_key)
+        return cls(member_source, task_source, member_names, task_names)
+
+    @property
+    def empty(self) -> bool:
+        return (self.member_source >= 0).all() and (self.task_source >= 0).all() and not self.removed_members and not self.removed_tasks
+
+    def summary(self) -> dict:
+        '''number of added, changed and removed members and tasks'''
+        return {
+            "added members": len(self.added_members),
+            "changed members": len(self.changed_members),
+            "removed members": len(self.removed_members),
+            "added tasks": len(self.added_tasks),
+            "changed tasks": len(self.changed_tasks),
+            "removed tasks": len(self.removed_tasks),
+        }
+
+def compatibility_block(tasks: list[Task], members: list[Member]) -> np.ndarray:
+    '''(tasks x members) compatibility, the shared skills over all the skills of the task and the member'''
+    task_skills = [{s.name for s in t.skills} for t in tasks]
+    member_skills = [{s.name for s in m.skill_set} for m in members]
+    skill_ids = dict()
+    for skills in task_skills + member_skills:
+        for s in skills:
+            skill_ids.setdefault(s, len(skill_ids))
+
+    task_matrix = skill_matrix(task_skills, skill_ids).astype(np.int64)
+    member_matrix = skill_matrix(member_skills, skill_ids).astype(np.int64)
+    overlap = task_matrix @ member_matrix.T
+    union = task_matrix.sum(axis=1)[:, None] + member_matrix.sum(axis=1)[None, :] - overlap
+    if (union == 0).any():
+        raise ValueError("a task and a member without any skill cannot be compared")
+    return overlap / union
+
+def update_instance(instance: ProblemInstance, diff: InstanceDiff, members: list[Member], tasks: list[Task], collaboration: 'CollaborationMatrix | SparseCollaborationMatrix' = None) -> ProblemInstance:
+    '''the instance of the new members and tasks built from the instance of the old ones
+
+    the compatibility of the unchanged tasks and members is copied, only the rows of the added and
+    changed tasks and the columns of the added and changed members are computed, the collaboration
+    is taken from the matrix when given, else the scores between unchanged members are copied and
+    only the added and changed members read their collaboration_scores, a member whose scores
+    changed is a changed member (see InstanceDiff), a sparse instance gives a sparse instance and an
+    instance without the raw scores (eg attached from shared memory) gives one with pair scores only
+
+    members loaded with sparse ratings keep no collaboration_scores, the collaboration matrix must
+    then be given so that the added and changed members get their scores'''
+    kept_tasks = np.flatnonzero(diff.task_source >= 0)
+    kept_members = np.flatnonzero(diff.member_source >= 0)
+    fresh_tasks = np.flatnonzero(diff.task_source < 0)
+    fresh_members = np.flatnonzero(diff.member_source < 0)
+
+    compatibility = np.empty((len(tasks), len(members)), dtype=float)
+    compatibility[np.ix_(kept_tasks, kept_members)] = instance.compatibility[np.ix_(diff.task_source[kept_tasks], diff.member_source[kept_members])]
+    if len(fresh_tasks):
+        compatibility[fresh_tasks] = compatibility_block([tasks[t] for t in fresh_tasks], members)
+    if len(fresh_members) and len(kept_tasks):
+        compatibility[np.ix_(kept_tasks, fresh_members)] = compatibility_block([tasks[t] for t in kept_tasks], [members[m] for m in fresh_members])
+
+    time = np.array([1 / m.efficiency for m in members], dtype=float)
+    salary = np.array([m.salary for m in members], dtype=float)
+
+    if collaboration is not None:
+        scores, pair_scores = ProblemInstance.collaboration_arrays(members, collaboration)
+    elif instance.sparse_collaboration:
+        scores = None
+        pair_scores = _update_pairs(instance.pair_collaboration, diff, members, kept_members, fresh_members)
+    elif instance.collaboration is None:
+        # only the pair scores are kept, eg by an instance attached from shared memory
+        scores = None
+        pair_scores = np.zeros((len(members), len(members)), dtype=float)
+        source = diff.member_source[kept_members]
+        pair_scores[np.ix_(kept_members, kept_members)] = instance.pair_collaboration[np.ix_(source, source)]
+        for i in fresh_members:
+            m = members[i]
+            for j, other_member in enumerate(members):
+                if j != i:
+                    pair_scores[i, j] = pair_scores[j, i] = (m.collaboration_scores.get(other_member, 0) + other_member.collaboration_scores.get(m, 0)) / 2
+    else:
+        pair_scores = None
+        scores = np.zeros((len(members), len(members)), dtype=float)
+        source = diff.member_source[kept_members]
+        scores[np.ix_(kept_members, kept_members)] = instance.collaboration[np.ix_(source, source)]
+        for i in fresh_members:
+            m = members[i]
+            for j, other_member in enumerate(members):
+                scores[i, j] = m.collaboration_scores.get(other_member, 0)
+                scores[j, i] = other_member.collaboration_scores.get(m, 0)
+
+    return ProblemInstance(compatibility, time, salary, scores, members, tasks, pair_scores)
+
+def _update_pairs(pairs: SparseCollaborationMatrix, diff: InstanceDiff, members: list[Member], kept_members: np.ndarray, fresh_members: np.ndarray) -> SparseCollaborationMatrix:
+    '''the sparse pair scores of the new members, the pairs of unchanged members are copied'''
+    kept = pairs.subset(diff.member_source[kept_members])
+    rows = np.repeat(np.arange(kept.size), np.diff(kept.indptr))
+    # every stored pair once, renumbered to the positions of the new members
+    upper = rows < kept.indices
+    low, high, values = kept_members[rows[upper]].tolist(), kept_members[kept.indices[upper]].tolist(), kept.data[upper].tolist()
+
+    fresh = set(fresh_members.tolist())
+    for i in fresh_members:
+        m = members[i]
+        for j, other_member in enumerate(members):
+            # a pair of two fresh members is only added once
+            if j == i or (j in fresh and j < i):
+                continue
+            given = m.collaboration_scores.get(other_member, 0)
+            received = other_member.collaboration_scores.get(m, 0)
+            rated = (given != 0) + (received != 0)
+            if rated:
+                low.append(min(i, j))
+                high.append(max(i, j))
+                values.append((given + received + pairs.default * (2 - rated)) / 2)
+
+    return SparseCollaborationMatrix.from_pairs(low, high, values, len(members), pairs.default)
+
+def repair(previous: list[Assignment], diff: InstanceDiff, instance: ProblemInstance) -> list[Assignment]:
+    '''the previous solution for the new instance
+
+    an unchanged task keeps its member when the member is still there, the other tasks get the
+    most compatible member, a member already in the team is taken when it is as compatible'''
+    member_position = {m.name: i for i, m in enumerate(instance.members)}
+    previous_member = {a.task.name: a.member.name for a in previous}
+
+    solution = np.full(instance.total_tasks, -1, dtype=np.intp)
+    for t, task in enumerate(instance.tasks):
+        name = previous_member.get(task.name)
+        if diff.task_source[t] >= 0 and name in member_position:
+            solution[t] = member_position[name]
+
+    team = set(solution[solution >= 0].tolist())
+    for t in np.flatnonzero(solution < 0):
+        row = instance.compatibility[t]
+        candidates = np.flatnonzero(row == row.max())
+        in_team = [m for m in candidates if m in team]
+        solution[t] = in_team[0] if in_team else candidates[0]
+        team.add(int(solution[t]))
+
+    return instance.decode(solution)
+
+def prepare(previous: list[Assignment], old_instance: ProblemInstance, members: list[Member], tasks: list[Task], collaboration: 'CollaborationMatrix | SparseCollaborationMatrix' = None) -> tuple:
+    '''(diff, instance, repaired solution) for re-optimising a previous solution of old_instance
+
+    old_instance must be bound to the old members and tasks'''
+    diff = InstanceDiff.between(old_instance.members, old_instance.tasks, members, tasks)
+    instance = update_instance(old_instance, diff, members, tasks, collaboration)
+    return diff, instance, repair(previous, diff, instance)